@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# benchmark.py
+# Benchmark suite for personnel_generator.py: runs the generator at several scales and
+# checks the results against stored baselines.
+#
+# Every run is a fresh `personnel_generator.py` process (so peak RSS is per run, read
+# with os.wait4) writing to a temporary directory. Per run it records:
+# - wall time, and wall time per phase from the generator's metrics.json (department,
+#   position, employee, payroll, employee_license, oncall_shift, merge, sequences, ...);
+# - rows and rows/sec per table, and output bytes per table;
+# - peak RSS: the largest of the generator process and its --workers processes.
+#
+# --save-baseline stores the results as JSON; later runs with the same generator
+# options are compared against it and the suite exits with status 1 when a run is
+# slower (--time-tolerance) or uses more memory (--rss-tolerance) than the baseline
+# allows. Baselines are machine specific; keep one per box.
+#
+# With --repeat N each scale runs N times and the fastest run is kept (least noise).
+#
+# Usage:
+#     python3 benchmark.py [--scales 1000,10000,100000,1000000] [--baseline PATH] [--save-baseline]
+#                          [--time-tolerance 0.25] [--rss-tolerance 0.25] [--repeat N] [--output PATH]
+#                          [generator options: --format, --backend, --workers, --compress, --stream, --batch-size]
+#
+# Runs offline; needs nothing beyond the generator itself.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATOR = os.path.join(SCRIPT_DIR, "personnel_generator.py")
+DEFAULT_SCALES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+TIME_TOLERANCE = 0.25   # a run may be this much slower than its baseline
+RSS_TOLERANCE = 0.25    # and use this much more memory
+BENCH_SEED = 20205      # fixed so every run generates the same data
+
+TABLES = ["department", "position", "employee", "payroll", "employee_license", "oncall_shift"]
+
+# --------------------------- Running ---------------------------
+
+def run_generator(num_employees, out_dir, gen_args):
+    """Run the generator once; return (wall seconds, peak RSS in bytes)."""
+    cmd = [sys.executable, GENERATOR, "-n", str(num_employees), "-o", out_dir, "--seed", str(BENCH_SEED), "--progress", "0"] + gen_args
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 instead of proc.wait(): it also returns this child's resource usage
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stderr = proc.stderr.read().decode("utf-8", "replace")
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise RuntimeError("generator failed (exit %d) for %d employees:\n%s" % (proc.returncode, num_employees, stderr))
+    return wall, usage.ru_maxrss * 1024  # ru_maxrss is in KiB on Linux
+
+def output_bytes(out_dir):
+    """Bytes per table file stem (department, employee, ...) in out_dir."""
+    sizes = {}
+    for name in os.listdir(out_dir):
+        stem = name.split(".", 1)[0]
+        sizes[stem] = sizes.get(stem, 0) + os.path.getsize(os.path.join(out_dir, name))
+    return sizes
+
+def run_scale(num_employees, gen_args):
+    """One benchmark run at a scale; returns its result dict."""
+    out_dir = tempfile.mkdtemp(prefix="personnel_bench_")
+    try:
+        wall, peak_rss = run_generator(num_employees, out_dir, gen_args)
+        with open(os.path.join(out_dir, "metrics.json"), encoding="utf-8") as f:
+            metrics = json.load(f)
+        sizes = output_bytes(out_dir)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    phases = metrics["phases"]
+    tables = {}
+    for table in TABLES:
+        rows, sec = metrics["tables"][table]["rows"], phases.get(table, 0.0)
+        tables[table] = {"rows": rows, "seconds": sec, "bytes": sizes.get(table, 0),
+                         "rows_per_sec": round(rows / sec) if sec else None}
+    return {"employees": num_employees, "wall_seconds": round(wall, 3),
+            "generator_seconds": metrics["wall_seconds"], "peak_rss_bytes": peak_rss,
+            "output_bytes": sum(sizes.values()), "phases": phases, "tables": tables}
+
+def best_of(num_employees, gen_args, repeat):
+    """Fastest of `repeat` runs, with the lowest peak RSS seen across them."""
+    runs = [run_scale(num_employees, gen_args) for _ in range(max(1, repeat))]
+    best = min(runs, key=lambda r: r["wall_seconds"])
+    best["peak_rss_bytes"] = min(r["peak_rss_bytes"] for r in runs)
+    best["repeat"] = len(runs)
+    return best
+
+# --------------------------- Baselines ---------------------------
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, config, results):
+    """Write results as the baseline for config, keeping runs at other scales."""
+    baseline = load_baseline(path)
+    if baseline is None or baseline.get("config") != config:
+        baseline = {"config": config, "runs": {}}
+    for res in results:
+        baseline["runs"][str(res["employees"])] = res
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+def compare(results, baseline, time_tol, rss_tol):
+    """Regression messages for results exceeding the baseline by more than the tolerances."""
+    failures = []
+    for res in results:
+        base = baseline["runs"].get(str(res["employees"]))
+        if base is None:
+            continue
+        limit = base["wall_seconds"] * (1 + time_tol)
+        if res["wall_seconds"] > limit:
+            failures.append("%d employees: %.2fs wall, baseline %.2fs (limit %.2fs)"
+                            % (res["employees"], res["wall_seconds"], base["wall_seconds"], limit))
+        limit = base["peak_rss_bytes"] * (1 + rss_tol)
+        if res["peak_rss_bytes"] > limit:
+            failures.append("%d employees: %.1f MiB peak RSS, baseline %.1f MiB (limit %.1f MiB)"
+                            % (res["employees"], res["peak_rss_bytes"] / 2**20, base["peak_rss_bytes"] / 2**20, limit / 2**20))
+    return failures
+
+# --------------------------- CLI entrypoint ---------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark personnel_generator.py at several scales against stored baselines.')
+    p.add_argument('--scales', default=",".join(map(str, DEFAULT_SCALES)), help='Comma-separated employee counts (default %(default)s).')
+    p.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file (default %(default)s).')
+    p.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline instead of comparing against it.')
+    p.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE, help='Allowed wall-time increase over the baseline (default %(default)s).')
+    p.add_argument('--rss-tolerance', type=float, default=RSS_TOLERANCE, help='Allowed peak-RSS increase over the baseline (default %(default)s).')
+    p.add_argument('--repeat', type=int, default=1, help='Runs per scale; the fastest is kept (default %(default)s).')
+    p.add_argument('--output', default=None, help='Also write this run\'s results to a JSON file.')
+    # Generator options that change performance; they are part of the baseline config
+    p.add_argument('--format', dest='fmt', default='sql', help='Generator --format (default %(default)s).')
+    p.add_argument('--backend', default='python', help='Generator --backend (default %(default)s).')
+    p.add_argument('--workers', '-j', type=int, default=1, help='Generator --workers (default %(default)s).')
+    p.add_argument('--compress', default=None, help='Generator --compress.')
+    p.add_argument('--stream', action='store_true', help='Generator --stream.')
+    p.add_argument('--batch-size', type=int, default=None, help='Generator --batch-size.')
+    return p.parse_args()
+
+def generator_args(args):
+    gen_args = ['--format', args.fmt, '--backend', args.backend, '--workers', str(args.workers)]
+    if args.compress:
+        gen_args += ['--compress', args.compress]
+    if args.stream:
+        gen_args.append('--stream')
+    if args.batch_size:
+        gen_args += ['--batch-size', str(args.batch_size)]
+    return gen_args
+
+def main():
+    args = parse_args()
+    scales = [int(n) for n in args.scales.split(",") if n.strip()]
+    gen_args = generator_args(args)
+    config = {"generator_args": gen_args, "python": "%d.%d" % sys.version_info[:2]}
+    results = []
+    print('%10s %9s %10s %10s  %s' % ('employees', 'wall s', 'peak MiB', 'out MiB', 'rows/s per table'))
+    for n in scales:
+        res = best_of(n, gen_args, args.repeat)
+        results.append(res)
+        rates = ", ".join("%s %s" % (t, st["rows_per_sec"]) for t, st in res["tables"].items() if st["rows"] > 100)
+        print('%10d %9.2f %10.1f %10.1f  %s' % (n, res["wall_seconds"], res["peak_rss_bytes"] / 2**20,
+                                                res["output_bytes"] / 2**20, rates))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "runs": results}, f, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, config, results)
+        print('Baseline saved to %s' % args.baseline)
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print('No baseline at %s; run with --save-baseline to create one.' % args.baseline)
+        return 0
+    if baseline.get("config") != config:
+        print('Baseline %s was recorded with %s; not comparing.' % (args.baseline, baseline.get("config")))
+        return 0
+    failures = compare(results, baseline, args.time_tolerance, args.rss_tolerance)
+    for msg in failures:
+        print('REGRESSION: ' + msg)
+    if not failures:
+        print('All runs within tolerance of %s.' % args.baseline)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
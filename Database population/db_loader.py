@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# db_loader.py
+# Direct-to-PostgreSQL loading for personnel_generator.py (--dsn).
+#
+# Instead of writing SQL files and replaying them through psql, generated rows are
+# streamed into the database with COPY FROM STDIN:
+# - department and position are copied and committed first;
+# - every generator batch copies and commits its employee rows, then copies the batch's
+#   payroll, employee_license and oncall_shift rows in parallel, one pooled connection
+#   per table. Children are only sent after their employees are committed, so the
+#   foreign keys of personnel_init.sql stay enforced throughout;
+# - the next batch's employees are loaded while the previous batch's children are still
+#   in flight, and at most one batch of children is outstanding (bounded memory);
+# - finally the set_sequences.sql setval logic is run on the loaded tables.
+#
+# Per-table rows and time spent in COPY are recorded so rows/sec can be reported.
+#
+# Requires psycopg (v3) or psycopg2; neither is needed for file output.
+
+import io
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from table_writers import literal_cache
+
+try:
+    import psycopg
+except ImportError:  # optional dependency
+    psycopg = None
+try:
+    import psycopg2
+except ImportError:  # optional dependency
+    psycopg2 = None
+
+DEFAULT_POOL_SIZE = 4  # one connection for employee + one per child table
+
+
+def _connect(dsn):
+    if psycopg is not None:
+        return psycopg.connect(dsn)
+    if psycopg2 is not None:
+        return psycopg2.connect(dsn)
+    raise RuntimeError("--dsn needs the psycopg (or psycopg2) package: pip install psycopg")
+
+
+class ConnectionPool:
+    """Fixed-size pool of open connections handed out to one thread at a time."""
+
+    def __init__(self, dsn, size=DEFAULT_POOL_SIZE):
+        self._conns = [_connect(dsn) for _ in range(size)]
+        self._free = queue.Queue()
+        for conn in self._conns:
+            self._free.put(conn)
+
+    def get(self):
+        return self._free.get()
+
+    def put(self, conn):
+        self._free.put(conn)
+
+    def close(self):
+        for conn in self._conns:
+            conn.close()
+
+
+class DbTableWriter:
+    """Stands in for a file TableWriter: buffers one batch of rows as COPY text bytes
+    until the loader sends it."""
+
+    def __init__(self, table, cols, cache=None):
+        self.table = table
+        self.cols = cols
+        self.count = 0
+        self.bytes = 0
+        self.cache = cache or literal_cache("copy")
+        self._lines = []
+
+    def write_rows(self, rows):
+        self.count += len(rows)
+        encode = self.cache.encode_row
+        lines = [encode(r, b"\t") + b"\n" for r in rows]
+        self.bytes += sum(map(len, lines))
+        self._lines.extend(lines)
+
+    def take(self):
+        """Return the buffered COPY bytes and their row count, and reset the buffer."""
+        data, n = b"".join(self._lines), len(self._lines)
+        self._lines = []
+        return data, n
+
+    def close(self):
+        pass
+
+
+class DbLoader:
+    """Streams generated rows into PostgreSQL with COPY FROM STDIN."""
+
+    def __init__(self, dsn, pool_size=DEFAULT_POOL_SIZE):
+        self.pool = ConnectionPool(dsn, pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+        self._in_flight = []
+        self.parents = {}
+        self.children = {}
+        self.rows = {}
+        self.seconds = {}
+        self._started = time.perf_counter()
+
+    def table_writer(self, table, cols, parent=False, cache=None):
+        """Writer for a table; parent tables are committed before children each batch.
+        cache is a copy-format LiteralCache shared by the writers."""
+        writer = DbTableWriter(table, cols, cache)
+        (self.parents if parent else self.children)[table] = writer
+        return writer
+
+    def execute_file(self, path):
+        """Run a SQL script (e.g. personnel_init.sql) in one transaction."""
+        with open(path, encoding="utf-8") as f:
+            self.execute(f.read())
+
+    def execute(self, sql):
+        """Run SQL statements in one transaction."""
+        conn = self.pool.get()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+            conn.commit()
+        finally:
+            self.pool.put(conn)
+
+    def copy(self, table, cols, data, n):
+        """COPY one block of COPY-text rows (bytes) into table and commit."""
+        if not n:
+            return
+        sql = "COPY %s (%s) FROM STDIN" % (table, ", ".join(cols))
+        conn = self.pool.get()
+        t0 = time.perf_counter()
+        try:
+            with conn.cursor() as cur:
+                if psycopg is not None:
+                    with cur.copy(sql) as cp:
+                        cp.write(data)
+                else:
+                    cur.copy_expert(sql, io.BytesIO(data))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.put(conn)
+        # one thread per table at a time, so these per-table counters are not shared
+        self.rows[table] = self.rows.get(table, 0) + n
+        self.seconds[table] = self.seconds.get(table, 0.0) + time.perf_counter() - t0
+
+    def copy_rows(self, table, cols, rows):
+        """Load a list of plain-value rows right away (small tables)."""
+        writer = DbTableWriter(table, cols)
+        writer.write_rows(rows)
+        self.copy(table, cols, *writer.take())
+
+    def end_batch(self):
+        """Commit this batch's parent rows, then start loading its child rows in parallel."""
+        for writer in self.parents.values():
+            self.copy(writer.table, writer.cols, *writer.take())
+        self._wait()
+        self._in_flight = [self._executor.submit(self.copy, w.table, w.cols, *w.take())
+                           for w in self.children.values()]
+
+    def _wait(self):
+        for future in self._in_flight:
+            future.result()  # re-raises a failed COPY
+        self._in_flight = []
+
+    def set_sequences(self, sequences):
+        """Run the set_sequences.sql setval logic: (sequence, table, column) triples."""
+        conn = self.pool.get()
+        try:
+            with conn.cursor() as cur:
+                for seq_name, table, col in sequences:
+                    cur.execute("SELECT setval('%s', (SELECT COALESCE(MAX(%s),0) FROM %s), true)" % (seq_name, col, table))
+            conn.commit()
+        finally:
+            self.pool.put(conn)
+
+    def close(self):
+        """Finish outstanding batches and release connections; returns load stats."""
+        try:
+            self.end_batch()
+            self._wait()
+        finally:
+            self._executor.shutdown(wait=True)
+            self.pool.close()
+        return self.stats()
+
+    def stats(self):
+        """Rows, COPY seconds and rows/sec per table, plus total wall time."""
+        tables = {t: {"rows": n, "copy_seconds": round(self.seconds.get(t, 0.0), 6),
+                      "rows_per_sec": round(n / self.seconds[t]) if self.seconds.get(t) else None}
+                  for t, n in self.rows.items()}
+        return {"tables": tables, "wall_seconds": round(time.perf_counter() - self._started, 3)}
+
+
+def combine_load_stats(stats_list):
+    """Merge stats() of several loaders (one per generator shard)."""
+    tables = {}
+    for st in stats_list:
+        for t, s in st["tables"].items():
+            acc = tables.setdefault(t, {"rows": 0, "copy_seconds": 0.0})
+            acc["rows"] += s["rows"]
+            acc["copy_seconds"] += s["copy_seconds"]
+    for acc in tables.values():
+        acc["copy_seconds"] = round(acc["copy_seconds"], 6)
+        acc["rows_per_sec"] = round(acc["rows"] / acc["copy_seconds"]) if acc["copy_seconds"] else None
+    return {"tables": tables, "wall_seconds": max((st["wall_seconds"] for st in stats_list), default=0.0)}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# employee_store.py
+# Columnar store of one batch of employees, shared by the payroll, license and on-call
+# stages of personnel_generator.py (and by the rollups and --tables regeneration).
+#
+# make_employee() returns a 16-key dict (ISO date strings, email, address, a nested
+# emergency_contacts dict), about 2 KB per employee. Each employee row is now written
+# as soon as the employee is made and only the facts the later stages read are kept,
+# as typed arrays in generation-index order:
+# - employee_id: 8 bytes;
+# - hire day as an offset from DATE_MIN: 4 bytes;
+# - department_id (0 = none): 2 bytes;
+# - active flag: 1 byte.
+# That is 15 bytes per employee instead of the dict, and license holders are picked as
+# an array of offsets into the batch rather than a list of employee objects.
+#
+# A store rebuilt from an employee snapshot (--tables) only fills the employee_id,
+# hire_day and department_id columns, which is all the child tables need.
+
+from array import array
+
+from state import day, iso
+
+
+class EmployeeStore:
+    """One batch of employees as parallel typed arrays; hire_day holds offsets from
+    date_min."""
+
+    def __init__(self, date_min):
+        self.base = date_min.toordinal()
+        self.employee_id = array("q")
+        self.hire_day = array("i")
+        self.department_id = array("h")
+        self.active = array("b")
+        self._offsets = {}   # ISO date -> day offset
+        self._isos = {}      # day offset -> ISO date
+
+    @classmethod
+    def from_snapshot(cls, snapshot, start, end, date_min):
+        """Employees start <= idx < end of an EmployeeSnapshot (IDs, hires, departments)."""
+        store = cls(date_min)
+        store.employee_id = snapshot.employee_id[start:end]
+        store.hire_day = array("i", [d - store.base for d in snapshot.hire_day[start:end]])
+        store.department_id = snapshot.department_id[start:end]
+        return store
+
+    def __len__(self):
+        return len(self.employee_id)
+
+    def _offset(self, iso_date):
+        offset = self._offsets.get(iso_date)
+        if offset is None:
+            offset = self._offsets[iso_date] = day(iso_date) - self.base
+        return offset
+
+    def add(self, emp):
+        """Append an employee dict as returned by make_employee()."""
+        self.employee_id.append(emp["employee_id"])
+        self.hire_day.append(self._offset(emp["hire"]))
+        self.department_id.append(emp["department_id"] or 0)
+        self.active.append(emp["active"])
+
+    def hire(self, i):
+        """Hire date of employee i as an ISO string."""
+        offset = self.hire_day[i]
+        s = self._isos.get(offset)
+        if s is None:
+            s = self._isos[offset] = iso(self.base + offset)
+        return s
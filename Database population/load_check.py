@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# load_check.py
+# Loads a generated dataset with --rollups --performance-profile into PostgreSQL and
+# checks that the two scripts agree on fn_department_headcount. Both define it:
+# rollups.sql reads department_headcount, performance_profile.sql counts employee rows.
+# The rollup version must be the one left, whichever script runs last.
+#
+# Two loads, each into a fresh database:
+# - files: table files plus load.sql (--format, default csv), run with psql after
+#   personnel_init.sql. load.sql runs the profile first and rollups.sql after it;
+# - dsn: personnel_generator.py --dsn --init-schema, which applies both scripts directly.
+# After each load, performance_profile.sql is run once more to try the other order.
+#
+# Checks on every database:
+# - fn_department_headcount is the rollup version (its body reads department_headcount),
+#   both right after the load and after the profile has run again;
+# - fn_department_headcount(d) equals the active employees of department d for every
+#   department, and department_headcount matches a live count.
+# Any failure is printed and makes the run exit with status 1.
+#
+# Like query_benchmark.py it uses a throwaway initdb cluster unless --dsn names a server
+# you own (one database per load is created there and dropped afterwards).
+#
+# Usage:
+#     python3 load_check.py [-n EMPLOYEES] [--format csv|copy|sql] [--dsn DSN] [--keep-databases]
+#
+# Requires psycopg (v3) or psycopg2, psql, and PostgreSQL server binaries (or --dsn).
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from personnel_generator import INIT_SCHEMA_FILE, PERFORMANCE_PROFILE_FILE
+from query_benchmark import BENCH_SEED, GENERATOR, ThrowawayCluster, connect, run_statements, with_dbname
+
+DEFAULT_EMPLOYEES = 5_000
+DB_PREFIX = "personnel_loadcheck_"
+
+FUNCTION_BODY_SQL = "SELECT pg_get_functiondef('fn_department_headcount(int)'::regprocedure)"
+# Departments whose headcount from the function differs from a live count
+HEADCOUNT_MISMATCH_SQL = """
+SELECT d.department_id, fn_department_headcount(d.department_id), COUNT(e.employee_id)
+FROM department d LEFT JOIN employee e ON e.department_id = d.department_id AND e.active
+GROUP BY d.department_id
+HAVING fn_department_headcount(d.department_id) <> COUNT(e.employee_id)
+"""
+# Rollup rows that differ from a live count (department_id 0 = no department)
+ROLLUP_MISMATCH_SQL = """
+SELECT COALESCE(r.department_id, l.department_id), r.active_employees, l.active_employees
+FROM department_headcount r
+FULL JOIN (SELECT COALESCE(department_id, 0) AS department_id, COUNT(*) AS active_employees
+           FROM employee WHERE active GROUP BY 1) l ON l.department_id = r.department_id
+WHERE r.active_employees IS DISTINCT FROM l.active_employees
+"""
+
+# --------------------------- Loads ---------------------------
+
+def run(cmd, what, cwd=None):
+    proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError("%s failed:\n%s" % (what, proc.stderr.decode("utf-8", "replace")))
+
+def load_files(dsn, num_employees, fmt):
+    """Generate table files with both flags and load them with psql and load.sql."""
+    with tempfile.TemporaryDirectory(prefix="personnel_loadcheck_") as tmp:
+        out_dir = os.path.join(tmp, "out")
+        run([sys.executable, GENERATOR, "-n", str(num_employees), "-o", out_dir, "--seed", str(BENCH_SEED),
+             "--format", fmt, "--rollups", "--performance-profile", "--progress", "0"], "generating")
+        run(["psql", "-X", "-q", "-v", "ON_ERROR_STOP=1", "-d", dsn, "-f", INIT_SCHEMA_FILE], "personnel_init.sql")
+        run(["psql", "-X", "-q", "-v", "ON_ERROR_STOP=1", "-d", dsn, "-f", "load.sql"], "load.sql", cwd=out_dir)
+
+def load_dsn(dsn, num_employees, fmt):
+    """Generate straight into the database with both flags."""
+    with tempfile.TemporaryDirectory(prefix="personnel_loadcheck_") as out_dir:
+        run([sys.executable, GENERATOR, "-n", str(num_employees), "-o", out_dir, "--seed", str(BENCH_SEED),
+             "--dsn", dsn, "--init-schema", "--rollups", "--performance-profile", "--progress", "0"],
+            "generating into the database")
+
+LOADS = [("files", load_files), ("dsn", load_dsn)]
+
+# --------------------------- Checks ---------------------------
+
+def check(dsn, stage):
+    """Failure messages for one database at one stage."""
+    conn = connect(dsn)
+    try:
+        cur = conn.cursor()
+        cur.execute(FUNCTION_BODY_SQL)
+        body = cur.fetchone()[0]
+        failures = []
+        if "department_headcount" not in body.replace("fn_department_headcount", ""):
+            failures.append("%s: fn_department_headcount is not the rollups.sql version" % stage)
+        cur.execute(HEADCOUNT_MISMATCH_SQL)
+        failures += ["%s: department %s: fn_department_headcount %s, active employees %s" % ((stage,) + row)
+                     for row in cur.fetchall()]
+        cur.execute(ROLLUP_MISMATCH_SQL)
+        failures += ["%s: department_headcount for department %s is %s, live count %s" % ((stage,) + row)
+                     for row in cur.fetchall()]
+        conn.rollback()
+    finally:
+        conn.close()
+    return failures
+
+def check_load(admin_dsn, name, load, args):
+    """Load one database and return its failure messages."""
+    dbname = DB_PREFIX + name
+    run_statements(admin_dsn, ["DROP DATABASE IF EXISTS %s" % dbname, "CREATE DATABASE %s" % dbname])
+    dsn = with_dbname(admin_dsn, dbname)
+    try:
+        load(dsn, args.employees, args.format)
+        failures = check(dsn, name + " load")
+        with open(PERFORMANCE_PROFILE_FILE, encoding="utf-8") as f:
+            run_statements(dsn, [f.read()])
+        failures += check(dsn, name + " load, profile run again")
+    finally:
+        if args.dsn and not args.keep_databases:
+            run_statements(admin_dsn, ["DROP DATABASE IF EXISTS %s" % dbname])
+    return failures
+
+# --------------------------- CLI entrypoint ---------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Load with --rollups --performance-profile and check fn_department_headcount.')
+    p.add_argument('-n', '--employees', type=int, default=DEFAULT_EMPLOYEES, help='Employees to generate (default %(default)s).')
+    p.add_argument('--format', choices=('sql', 'copy', 'csv'), default='csv', help='Table file format of the files load (default %(default)s).')
+    p.add_argument('--dsn', default=None, help='Server to create the check databases on (default: a throwaway initdb cluster).')
+    p.add_argument('--keep-databases', action='store_true', help='With --dsn, keep the check databases.')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    if shutil.which("psql") is None:
+        print('psql not found on PATH; it runs load.sql for the files load.')
+        return 1
+    cluster = None
+    admin_dsn = args.dsn
+    if admin_dsn is None:
+        cluster = ThrowawayCluster()
+        cluster.start()
+        admin_dsn = cluster.dsn
+    failures = []
+    try:
+        for name, load in LOADS:
+            print('Loading %d employees (%s)...' % (args.employees, name), flush=True)
+            found = check_load(admin_dsn, name, load, args)
+            print('  %s' % ('%d failures' % len(found) if found else 'ok'))
+            failures += found
+    finally:
+        if cluster:
+            cluster.stop()
+    for msg in failures:
+        print('FAIL: ' + msg)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# metrics.py
+# Run instrumentation for personnel_generator.py: phase timers, per-table rows and
+# bytes, RSS samples, live progress and optional cProfile dumps.
+#
+# - Metrics follows one process's run as a sequence of phases (department, position,
+#   employee, payroll, employee_license, oncall_shift, merge, sequences, ...).
+#   start(phase) closes the running phase, so all time is charged to exactly one
+#   phase; phases that recur per batch accumulate.
+# - Table writers registered with track() report their rows and bytes written; rows/sec
+#   per table is rows over the time of the phase named after the table.
+# - RSS is sampled from /proc/self/statm on phase changes (at most every
+#   RSS_SAMPLE_SECONDS) and on every progress report; peak RSS comes from getrusage.
+# - ProgressReporter is a daemon thread printing the running phase, rows per table,
+#   rows/sec and RSS every `interval` seconds, so long runs show where they are.
+# - combine() merges the parent's and every shard's to_dict() into the metrics.json
+#   layout. Shards run in parallel, so a phase's seconds are the parent's time plus the
+#   longest shard's and rows/sec is the run's real throughput; the time summed over all
+#   processes is kept as cpu_seconds. run_profiled() runs a function under cProfile and
+#   dumps its stats.
+
+import os
+import time
+import cProfile
+import pstats
+import threading
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+RSS_SAMPLE_SECONDS = 1.0   # minimum spacing of RSS samples taken on phase changes
+PROFILE_TOP = 40           # functions listed in the text summary next to each .pstats dump
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is missing."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None if unknown)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+
+class Metrics:
+    """Phase timers, tracked table writers and RSS samples for one process."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.phase = None
+        self.writers = {}
+        self.rss_samples = []
+        self._started = self._phase_started = time.perf_counter()
+        self._last_sample = None
+        self._lock = threading.Lock()
+        self.sample_rss()
+
+    def start(self, phase):
+        """Close the running phase (if any) and start `phase`."""
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.seconds[self.phase] = self.seconds.get(self.phase, 0.0) + now - self._phase_started
+        self.phase = phase
+        self._phase_started = now
+        if self._last_sample is None or now - self._last_sample >= RSS_SAMPLE_SECONDS:
+            self.sample_rss()
+
+    def stop(self):
+        """Close the running phase."""
+        self.start(None)
+
+    def track(self, table, writer):
+        """Report rows/bytes of a writer (anything with .count and .bytes) under table."""
+        self.writers[table] = writer
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def sample_rss(self):
+        """Record (elapsed seconds, RSS bytes); returns the RSS."""
+        rss = current_rss()
+        with self._lock:
+            self._last_sample = time.perf_counter()
+            if rss is not None:
+                self.rss_samples.append((round(self.elapsed(), 3), rss))
+        return rss
+
+    def rows(self):
+        return {table: w.count for table, w in self.writers.items()}
+
+    def to_dict(self):
+        """Plain-value snapshot (picklable, JSON-serializable)."""
+        return {
+            "wall_seconds": round(self.elapsed(), 6),
+            "phases": {phase: round(sec, 6) for phase, sec in self.seconds.items()},
+            "tables": {table: {"rows": w.count, "bytes": w.bytes} for table, w in self.writers.items()},
+            "peak_rss_bytes": peak_rss(),
+            "rss_samples": list(self.rss_samples),
+        }
+
+
+def combine(parent, shards):
+    """metrics.json layout from the parent's and the shards' to_dict(). Table rows/bytes
+    are summed. phases holds wall time: the parent's plus the longest shard's, as the
+    shards run side by side; phase_cpu_seconds sums every process. Each table gets both
+    (seconds, cpu_seconds), and rows/sec uses the wall time."""
+    phases, cpu, longest, tables = dict(parent["phases"]), dict(parent["phases"]), {}, {}
+    for m in shards:
+        for phase, sec in m["phases"].items():
+            longest[phase] = max(longest.get(phase, 0.0), sec)
+            cpu[phase] = cpu.get(phase, 0.0) + sec
+    for phase, sec in longest.items():
+        phases[phase] = phases.get(phase, 0.0) + sec
+    for m in [parent] + shards:
+        for table, t in m["tables"].items():
+            acc = tables.setdefault(table, {"rows": 0, "bytes": 0})
+            acc["rows"] += t["rows"]
+            acc["bytes"] += t["bytes"]
+    for table, acc in tables.items():
+        sec = phases.get(table)
+        acc["seconds"] = round(sec, 6) if sec else 0.0
+        acc["cpu_seconds"] = round(cpu.get(table, 0.0), 6)
+        acc["rows_per_sec"] = round(acc["rows"] / sec) if sec else None
+    peaks = [m["peak_rss_bytes"] for m in [parent] + shards if m["peak_rss_bytes"] is not None]
+    return {
+        "wall_seconds": parent["wall_seconds"],
+        "phases": {phase: round(sec, 6) for phase, sec in phases.items()},
+        "phase_cpu_seconds": {phase: round(sec, 6) for phase, sec in cpu.items()},
+        "tables": tables,
+        "bytes_written": sum(t["bytes"] for t in tables.values()),
+        "peak_rss_bytes": max(peaks) if peaks else None,
+        "rss_samples": parent["rss_samples"],
+        "shards": [{"shard": k, "wall_seconds": m["wall_seconds"], "peak_rss_bytes": m["peak_rss_bytes"],
+                    "rss_samples": m["rss_samples"]} for k, m in enumerate(shards)],
+    }
+
+# --------------------------- Live progress ---------------------------
+
+class ProgressReporter:
+    """Daemon thread printing a progress line for a Metrics every `interval` seconds."""
+
+    def __init__(self, metrics, interval, label=""):
+        self.metrics = metrics
+        self.interval = interval
+        self.label = label
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            print(self.line(), flush=True)
+
+    def line(self):
+        m = self.metrics
+        elapsed = m.elapsed()
+        rss = m.sample_rss()
+        rows = " ".join("%s %d (%d/s)" % (t, n, n / elapsed) for t, n in m.rows().items() if n)
+        return "%s[%7.1fs] %-16s %s  rss %s" % (self.label, elapsed, m.phase or "-", rows or "no rows yet",
+                                                "%.1f MiB" % (rss / 2**20) if rss else "n/a")
+
+# --------------------------- Profiling ---------------------------
+
+def run_profiled(path, func, *args, **kwargs):
+    """Call func under cProfile; dump the stats to path (.pstats) and a cumulative-time
+    summary of the top PROFILE_TOP functions to path with a .txt suffix."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(PROFILE_TOP)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# oncall_benchmark.py
+# Benchmark of oncall_index.py against the SQL it replaces, on generated data:
+# - overlaps: the overlapping-shifts query at the end of Queries.sql (self-join of
+#   oncall_shift on the same day) against OncallIndex.overlap_summary;
+# - on call: ON_CALL_SQL ("who is on call on day d at time t?") against
+#   OncallIndex.on_call, for --points random quarter-hours of the week.
+#
+# For every scale factor (employee count) a database is created and loaded as in
+# query_benchmark.py (throwaway initdb cluster, or one database per scale on --dsn).
+# The index is built from that database, so both sides answer from the same rows, and
+# their answers are compared: a mismatch is reported and makes the run exit with
+# status 1. The overlap query runs for day 3 (query_benchmark.DEFAULT_VARS) and, by
+# default, only for the lowest 0.1% of the employee ID space (s1.employee_id below
+# --max-employee): without a limit the report has a row for most pairs of employees,
+# which grows with the square of the headcount on both sides.
+#
+# SQL times are client wall time including fetching all rows (p50 of --runs runs after
+# --warmup); index times are the same for the Python calls, plus the one-off time to
+# load the shifts and build the index.
+#
+# --offline skips PostgreSQL: the data is generated to a temporary directory and only
+# the index side (built from the files) is timed.
+#
+# Usage:
+#     python3 oncall_benchmark.py [--scales 10000,100000] [--dsn DSN] [--runs N] [--warmup N]
+#                                 [--points N] [--day DOW] [--max-employee N] [--offline]
+#                                 [--output PATH] [--keep-databases]
+#
+# Requires psycopg (v3) or psycopg2 and PostgreSQL server binaries (or --dsn) unless
+# --offline is given.
+
+import os
+import sys
+import json
+import time
+import random
+import datetime
+import argparse
+import tempfile
+import subprocess
+
+from oncall_index import ON_CALL_SQL, OncallIndex, clock, seconds_of, shifts_from_database, shifts_from_files
+from personnel_generator import EID_COUNT, EID_MIN
+from query_benchmark import (BENCH_SEED, DB_PREFIX, DEFAULT_VARS, GENERATOR, QUERY_SOURCES, ThrowawayCluster, connect,
+                             create_database, percentile, run_statements, split_sql, substitute)
+
+DEFAULT_SCALES = [10_000, 100_000]
+DEFAULT_OUTPUT = os.path.join(os.getcwd(), "oncall_bench_results.json")
+RUNS = 5
+WARMUP = 1
+POINTS = 200
+POINT_STEP = 900       # point queries fall on quarter hours, like the generated shifts
+MAX_EMPLOYEE = EID_MIN + EID_COUNT // 1000
+
+# --------------------------- Workload ---------------------------
+
+def overlap_query(variables):
+    """The overlapping-shifts statement of Queries.sql with its psql variables filled in."""
+    path = dict(QUERY_SOURCES)["queries"]
+    with open(path, encoding="utf-8") as f:
+        for stmt, label in split_sql(f.read()):
+            if "JOIN oncall_shift s2" in stmt:
+                return substitute(stmt, variables)
+    raise RuntimeError("no overlapping-shifts query in %s" % path)
+
+def sample_points(n, seed=BENCH_SEED):
+    rng = random.Random(seed)
+    return [(rng.randint(1, 7), rng.randrange(0, 86400, POINT_STEP)) for _ in range(n)]
+
+def p50_seconds(fn, runs, warmup):
+    """(p50 wall seconds, last result) of fn() over runs timed calls."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return percentile(times, 50), result
+
+# --------------------------- Sides ---------------------------
+
+def sql_overlaps(conn, sql):
+    cur = conn.cursor()
+    cur.execute(sql)
+    rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+def sql_on_call(conn, points):
+    cur = conn.cursor()
+    answers = []
+    for day, at in points:
+        cur.execute(ON_CALL_SQL, {"dow": day, "at": datetime.time(at // 3600, at // 60 % 60, at % 60)})
+        answers.append(cur.fetchall())
+    conn.rollback()
+    return answers
+
+def index_on_call(index, points):
+    return [index.on_call(day, at) for day, at in points]
+
+def build_index(shifts):
+    """(index, load seconds, build seconds)."""
+    started = time.perf_counter()
+    rows = list(shifts)
+    loaded = time.perf_counter()
+    index = OncallIndex(rows)
+    return index, loaded - started, time.perf_counter() - loaded
+
+def mismatches(sql_overlap_rows, overlap_rows, sql_point_rows, point_rows, points):
+    """Messages for every answer on which SQL and the index disagree."""
+    found = []
+    sql_overlap = sorted((r[0], r[2], r[4], seconds_of(r[5]), seconds_of(r[6])) for r in sql_overlap_rows)
+    if sql_overlap != sorted(overlap_rows):
+        found.append("overlaps: SQL returned %d employee pairs, the index %d (or different counts/times)"
+                     % (len(sql_overlap), len(overlap_rows)))
+    for (day, at), sql_rows, rows in zip(points, sql_point_rows, point_rows):
+        expected = [(order, eid, sid, seconds_of(start), seconds_of(end)) for order, eid, sid, start, end in sql_rows]
+        if expected != rows:
+            found.append("on call day %d %s: SQL %d shifts, index %d" % (day, clock(at), len(expected), len(rows)))
+    return found
+
+# --------------------------- Runs ---------------------------
+
+def run_database(dsn, args, sql, points):
+    """Results for one loaded database: both sides timed and compared."""
+    index, load_s, build_s = build_index(shifts_from_database(dsn))
+    conn = connect(dsn)
+    try:
+        sql_overlap_s, sql_overlap_rows = p50_seconds(lambda: sql_overlaps(conn, sql), args.runs, args.warmup)
+        sql_point_s, sql_point_rows = p50_seconds(lambda: sql_on_call(conn, points), args.runs, args.warmup)
+    finally:
+        conn.close()
+    overlap_s, overlap_rows = p50_seconds(lambda: index.overlap_summary(args.day, args.max_employee), args.runs, args.warmup)
+    point_s, point_rows = p50_seconds(lambda: index_on_call(index, points), args.runs, args.warmup)
+    return {
+        "shifts": len(index), "index_load_s": round(load_s, 4), "index_build_s": round(build_s, 4),
+        "overlap_pairs": len(overlap_rows),
+        "sql_overlap_ms": round(sql_overlap_s * 1000, 3), "index_overlap_ms": round(overlap_s * 1000, 3),
+        "sql_on_call_ms": round(sql_point_s * 1000 / len(points), 3),
+        "index_on_call_ms": round(point_s * 1000 / len(points), 3),
+        "mismatches": mismatches(sql_overlap_rows, overlap_rows, sql_point_rows, point_rows, points),
+    }
+
+def run_offline(num_employees, args, points):
+    """Index-only results on generated files."""
+    with tempfile.TemporaryDirectory(prefix="personnel_oncall_") as out_dir:
+        cmd = [sys.executable, GENERATOR, "-n", str(num_employees), "-o", out_dir, "--seed", str(BENCH_SEED),
+               "--format", "csv", "--progress", "0"]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError("generating %d employees failed:\n%s" % (num_employees, proc.stderr.decode("utf-8", "replace")))
+        index, load_s, build_s = build_index(shifts_from_files([out_dir]))
+    overlap_s, overlap_rows = p50_seconds(lambda: index.overlap_summary(args.day, args.max_employee), args.runs, args.warmup)
+    point_s, point_rows = p50_seconds(lambda: index_on_call(index, points), args.runs, args.warmup)
+    return {
+        "shifts": len(index), "index_load_s": round(load_s, 4), "index_build_s": round(build_s, 4),
+        "overlap_pairs": len(overlap_rows), "index_overlap_ms": round(overlap_s * 1000, 3),
+        "index_on_call_ms": round(point_s * 1000 / len(points), 3),
+    }
+
+def print_result(n, res):
+    print('%d employees, %d shifts: index loaded in %.2fs, built in %.2fs; %d employee pairs overlap on day %d'
+          % (n, res["shifts"], res["index_load_s"], res["index_build_s"], res["overlap_pairs"], res["day"]))
+    print('  %-22s %12s %12s %9s' % ('', 'SQL ms', 'index ms', 'speedup'))
+    for label, key in (("overlaps", "overlap_ms"), ("on call (per query)", "on_call_ms")):
+        mine = res["index_" + key]
+        if "sql_" + key in res:
+            theirs = res["sql_" + key]
+            print('  %-22s %12.2f %12.2f %8.1fx' % (label, theirs, mine, theirs / mine if mine else float("inf")))
+        else:
+            print('  %-22s %12s %12.2f %9s' % (label, '-', mine, '-'))
+    for msg in res.get("mismatches", []):
+        print('  MISMATCH: ' + msg)
+
+# --------------------------- CLI entrypoint ---------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark oncall_index.py against the on-call SQL queries on generated data.')
+    p.add_argument('--scales', default=",".join(map(str, DEFAULT_SCALES)), help='Comma-separated employee counts (default %(default)s).')
+    p.add_argument('--dsn', default=None, help='Server to create the benchmark databases on (default: a throwaway initdb cluster).')
+    p.add_argument('--runs', type=int, default=RUNS, help='Timed runs per measurement (default %(default)s).')
+    p.add_argument('--warmup', type=int, default=WARMUP, help='Untimed runs per measurement first (default %(default)s).')
+    p.add_argument('--points', type=int, default=POINTS, help='Random point-in-time queries per run (default %(default)s).')
+    p.add_argument('--day', type=int, default=int(DEFAULT_VARS["dow"]), help='day_of_week of the overlap query (default %(default)s).')
+    p.add_argument('--max-employee', type=int, default=MAX_EMPLOYEE, help='Employee limit of the overlap query (default %(default)s).')
+    p.add_argument('--offline', action='store_true', help='No PostgreSQL: time the index on generated files only.')
+    p.add_argument('--output', default=DEFAULT_OUTPUT, help='Results JSON file (default %(default)s).')
+    p.add_argument('--keep-databases', action='store_true', help='With --dsn, keep the benchmark databases.')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    scales = [int(n) for n in args.scales.split(",") if n.strip()]
+    points = sample_points(max(1, args.points))
+    sql = overlap_query(dict(DEFAULT_VARS, dow=args.day, max=args.max_employee))
+    results = {}
+    cluster = None
+    admin_dsn = args.dsn
+    if admin_dsn is None and not args.offline:
+        cluster = ThrowawayCluster()
+        cluster.start()
+        admin_dsn = cluster.dsn
+    try:
+        for n in scales:
+            print('Loading %d employees...' % n, flush=True)
+            if args.offline:
+                res = run_offline(n, args, points)
+            else:
+                dsn = create_database(admin_dsn, n, [])
+                res = run_database(dsn, args, sql, points)
+                if args.dsn and not args.keep_databases:
+                    run_statements(admin_dsn, ["DROP DATABASE IF EXISTS %s%d" % (DB_PREFIX, n)])
+            res["day"] = args.day
+            results[str(n)] = res
+            print_result(n, res)
+    finally:
+        if cluster:
+            cluster.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"config": {"runs": args.runs, "points": len(points), "day": args.day,
+                              "max_employee": args.max_employee, "seed": BENCH_SEED, "offline": args.offline},
+                   "runs": results}, f, indent=2)
+    if any(res.get("mismatches") for res in results.values()):
+        print('The index and SQL disagree; see MISMATCH lines above.')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# oncall_index.py
+# In-memory on-call coverage index: answers "who is on call at a given time?" (README)
+# and the overlapping-shifts report of Queries.sql without a self-join.
+#
+# oncall_shift is loaded from the table files written by personnel_generator.py (any
+# format or compression validate_files.py reads) or from a database, and kept as
+# parallel typed arrays (shift, employee, escalation order, start and end: about 40
+# bytes per shift) sorted by start second of the week, (day_of_week - 1) * 86400 +
+# seconds since midnight. Times are kept to the second so results match the TIME
+# comparisons in SQL. Shifts are half-open intervals [start, end): a shift ending at
+# 14:00 no longer covers 14:00, and two shifts meeting at 14:00 do not overlap (the
+# strict < of the Queries.sql join).
+#
+# - on_call(day, at): binary search for the shifts starting in [at - longest shift,
+#   at], keep those ending after at, sorted by escalation_order. Cost is the log of the
+#   table plus that window, which is within a small factor of the answer itself.
+# - overlapping_pairs(day): one sweep over the day's shifts in start order with a heap
+#   of running shifts keyed by end; after popping the shifts that ended, everything
+#   left in the heap overlaps the new shift. O(n log n + pairs) instead of the
+#   self-join's comparison of every pair of same-day shifts. With an employee limit
+#   a second heap holds only the running shifts of employees below it, so pairs where
+#   neither employee qualifies are never generated.
+# - overlap_summary(day, max_employee): the Queries.sql aggregate (per employee pair:
+#   overlaps, first overlap start, last overlap end) computed from those pairs.
+#
+# day_of_week is used as stored; personnel_generator.py writes 1=Mon .. 7=Sun, which is
+# what --now assumes. Shifts with a NULL day or time, or not starting before they end,
+# are skipped (Constraints.sql rejects them anyway).
+#
+# Usage:
+#     python3 oncall_index.py [DIR ...] [--dsn DSN] [--at DOW HH:MM[:SS] | --now]
+#                             [--overlaps DOW] [--max-employee N] [--limit N]
+#
+# Standard library only for files; --dsn needs psycopg (v3) or psycopg2. NumPy, when
+# installed, speeds up building the index.
+
+import sys
+import time
+import heapq
+import bisect
+import argparse
+import datetime
+from array import array
+
+from personnel_generator import OUT_DIR_DEFAULT
+from validate_files import Report, ValueParser, argsort, read_rows, table_files
+
+DAY_SECONDS = 86400
+NO_EMPLOYEE = -1 << 63
+SHIFT_COLUMNS = ("shift_id", "employee_id", "day_of_week", "start_time", "end_time", "escalation_order")
+LIMIT = 20
+
+SHIFTS_SQL = """
+SELECT shift_id, employee_id, day_of_week, EXTRACT(EPOCH FROM start_time)::int, EXTRACT(EPOCH FROM end_time)::int,
+       escalation_order
+FROM oncall_shift
+WHERE day_of_week IS NOT NULL AND start_time < end_time
+"""
+
+# The SQL the index replaces for point queries (the overlap query is in Queries.sql)
+ON_CALL_SQL = """
+SELECT escalation_order, employee_id, shift_id, start_time, end_time
+FROM oncall_shift
+WHERE day_of_week = %(dow)s AND start_time <= %(at)s AND end_time > %(at)s
+ORDER BY escalation_order, employee_id, shift_id
+"""
+
+# ---------- Loading ----------
+
+def seconds_of(value):
+    """Seconds since midnight of a datetime.time or an ISO time string."""
+    if isinstance(value, str):
+        value = datetime.time.fromisoformat(value.strip())
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+def clock(seconds):
+    """HH:MM, or HH:MM:SS when there are seconds."""
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return "%02d:%02d:%02d" % (h, m, s) if s else "%02d:%02d" % (h, m)
+
+def shifts_from_files(dirs):
+    """(shift_id, employee_id, day_of_week, start, end, escalation_order) of the
+    oncall_shift files in dirs, start/end in seconds since midnight; unparsable rows
+    are reported on stderr and skipped."""
+    report = Report(out=sys.stderr)
+    values = ValueParser()
+    for path, fmt in table_files(dirs)["oncall_shift"]:
+        cols = pick = None
+        for line, row_cols, row in read_rows(path, fmt, "oncall_shift", report):
+            if row_cols is not cols:
+                cols = row_cols
+                pick = [cols.index(c) for c in SHIFT_COLUMNS]
+            sid, eid, dow, start, end, order = [row[i] for i in pick]
+            try:
+                shift = (int(sid), _int(eid), _int(dow), _seconds(values, start), _seconds(values, end), _int(order))
+            except (TypeError, ValueError):
+                report.add(path, line, "invalid_value", "cannot read shift %r" % (row,))
+                continue
+            yield shift
+
+def _int(text):
+    return None if text is None else int(text)
+
+def _seconds(values, text):
+    if text is None:
+        return None
+    t = values.time(text)
+    if t is None:
+        raise ValueError(text)
+    return seconds_of(t)
+
+def shifts_from_database(dsn):
+    """The same tuples as shifts_from_files, read from oncall_shift in a database."""
+    from query_benchmark import connect
+    conn = connect(dsn)
+    try:
+        cur = conn.cursor()
+        cur.execute(SHIFTS_SQL)
+        while True:
+            rows = cur.fetchmany(10_000)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def employee_names(employee_ids, dirs=None, dsn=None):
+    """{employee_id: 'first last'} for the given IDs, from the employee files in dirs
+    or from the database."""
+    wanted = set(employee_ids)
+    names = {}
+    if not wanted:
+        return names
+    if dsn is not None:
+        from query_benchmark import connect
+        conn = connect(dsn)
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT employee_id, first_name || ' ' || last_name FROM employee WHERE employee_id = ANY(%s)",
+                        (sorted(wanted),))
+            names.update(cur.fetchall())
+        finally:
+            conn.close()
+        return names
+    report = Report(out=sys.stderr)
+    for path, fmt in table_files(dirs)["employee"]:
+        for line, cols, row in read_rows(path, fmt, "employee", report):
+            eid = int(row[cols.index("employee_id")])
+            if eid in wanted:
+                names[eid] = "%s %s" % (row[cols.index("first_name")], row[cols.index("last_name")])
+    return names
+
+# ---------- Index ----------
+
+class OncallIndex:
+    """Shifts as parallel arrays sorted by start second of the week."""
+
+    def __init__(self, shifts):
+        start, end, shift_id, employee_id, order = array("q"), array("q"), array("q"), array("q"), array("q")
+        for sid, eid, dow, s, e, esc in shifts:
+            if dow is None or s is None or e is None or not s < e:
+                continue
+            base = (dow - 1) * DAY_SECONDS
+            start.append(base + s)
+            end.append(base + e)
+            shift_id.append(sid)
+            employee_id.append(NO_EMPLOYEE if eid is None else eid)
+            order.append(esc if esc is not None else 0)
+        pos = argsort(start)
+        self.start = array("q", [start[p] for p in pos])
+        self.end = array("q", [end[p] for p in pos])
+        self.shift_id = array("q", [shift_id[p] for p in pos])
+        self.employee_id = array("q", [employee_id[p] for p in pos])
+        self.order = array("q", [order[p] for p in pos])
+        self.longest = max((e - s for s, e in zip(self.start, self.end)), default=0)
+
+    def __len__(self):
+        return len(self.start)
+
+    def _day_range(self, day):
+        base = (day - 1) * DAY_SECONDS
+        return bisect.bisect_left(self.start, base), bisect.bisect_left(self.start, base + DAY_SECONDS)
+
+    def on_call(self, day, at):
+        """Shifts covering second `at` of day as (escalation_order, employee_id,
+        shift_id, start, end), by escalation order, then employee and shift."""
+        base = (day - 1) * DAY_SECONDS
+        t = base + at
+        lo = bisect.bisect_left(self.start, max(base, t - self.longest))
+        hi = bisect.bisect_right(self.start, t)
+        start, end = self.start, self.end
+        hits = [(self.order[i], self.employee_id[i], self.shift_id[i], start[i] - base, end[i] - base)
+                for i in range(lo, hi) if end[i] > t]
+        hits.sort()
+        return hits
+
+    def on_call_at(self, when):
+        """on_call for a datetime, with ISO weekdays (1=Mon .. 7=Sun)."""
+        return self.on_call(when.isoweekday(), when.hour * 3600 + when.minute * 60 + when.second)
+
+    def overlapping_pairs(self, day, max_employee=None):
+        """Positions (i, j) of every pair of overlapping shifts on day, i starting first.
+        With max_employee only pairs where at least one shift's employee_id is below it:
+        shifts of other employees are only paired with the running shifts that qualify."""
+        lo, hi = self._day_range(day)
+        start, end, employee_id = self.start, self.end, self.employee_id
+        running = []  # (end, position) of shifts started so far that may still run
+        qualifying = running if max_employee is None else []
+        for j in range(lo, hi):
+            s = start[j]
+            while running and running[0][0] <= s:
+                heapq.heappop(running)
+            while qualifying and qualifying[0][0] <= s:
+                heapq.heappop(qualifying)
+            low = max_employee is None or employee_id[j] < max_employee
+            for e, i in (running if low else qualifying):
+                yield i, j
+            heapq.heappush(running, (end[j], j))
+            if low and qualifying is not running:
+                heapq.heappush(qualifying, (end[j], j))
+
+    def overlap_summary(self, day, max_employee=None):
+        """Queries.sql overlap report for day: (emp1_id, emp2_id, overlapping_shifts_count,
+        first_overlap_start, last_overlap_end) with times in seconds since midnight,
+        ordered by count descending, then IDs. As in SQL, emp1 owns the shift with the
+        lower shift_id, only its employee_id is compared with max_employee, and an
+        employee's own overlapping shifts count as a pair."""
+        base = (day - 1) * DAY_SECONDS
+        start, end, shift_id, employee_id = self.start, self.end, self.shift_id, self.employee_id
+        groups = {}
+        for i, j in self.overlapping_pairs(day, max_employee):
+            if shift_id[i] > shift_id[j]:
+                i, j = j, i
+            e1, e2 = employee_id[i], employee_id[j]
+            if e1 == NO_EMPLOYEE or e2 == NO_EMPLOYEE or (max_employee is not None and not e1 < max_employee):
+                continue
+            first, last = max(start[i], start[j]), min(end[i], end[j])
+            acc = groups.get((e1, e2))
+            if acc is None:
+                groups[(e1, e2)] = [1, first, last]
+            else:
+                acc[0] += 1
+                if first < acc[1]:
+                    acc[1] = first
+                if last > acc[2]:
+                    acc[2] = last
+        rows = [(e1, e2, count, first - base, last - base) for (e1, e2), (count, first, last) in groups.items()]
+        rows.sort(key=lambda r: (-r[2], r[0], r[1]))
+        return rows
+
+# ---------- CLI ----------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Who is on call when, and whose shifts overlap, from an in-memory index of oncall_shift.')
+    p.add_argument('dirs', nargs='*', default=[OUT_DIR_DEFAULT], help='Output directories to read oncall_shift from (default %s).' % OUT_DIR_DEFAULT)
+    p.add_argument('--dsn', default=None, help='Read oncall_shift and names from this database instead of files.')
+    p.add_argument('--at', nargs=2, metavar=('DOW', 'TIME'), default=None, help='Who is on call on day DOW at TIME (HH:MM[:SS]).')
+    p.add_argument('--now', action='store_true', help='Who is on call now (local time, 1=Mon .. 7=Sun); the default.')
+    p.add_argument('--overlaps', type=int, metavar='DOW', default=None, help='Overlapping shifts per employee pair on day DOW.')
+    p.add_argument('--max-employee', type=int, default=None, help='With --overlaps: only pairs whose first employee_id is below this.')
+    p.add_argument('--limit', type=int, default=LIMIT, help='Rows printed per answer (default %(default)s).')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    index = OncallIndex(shifts_from_database(args.dsn) if args.dsn else shifts_from_files(args.dirs))
+    print('Indexed %d shifts in %.2fs' % (len(index), time.perf_counter() - started))
+
+    def names(ids):
+        return employee_names(ids, args.dirs, args.dsn)
+
+    if args.at or args.now or args.overlaps is None:
+        if args.at:
+            day, at = int(args.at[0]), seconds_of(args.at[1])
+        else:
+            now = datetime.datetime.now()
+            day, at = now.isoweekday(), now.hour * 3600 + now.minute * 60 + now.second
+        started = time.perf_counter()
+        hits = index.on_call(day, at)
+        print('%d on call on day %d at %s (%.1f ms):' % (len(hits), day, clock(at), (time.perf_counter() - started) * 1000))
+        shown = hits[:args.limit]
+        known = names(h[1] for h in shown)
+        for order, eid, sid, start, end in shown:
+            print(' %3d  %-10s %-30s shift %-10d %s-%s' % (order, eid if eid != NO_EMPLOYEE else '-', known.get(eid, ''),
+                                                           sid, clock(start), clock(end)))
+    if args.overlaps is not None:
+        started = time.perf_counter()
+        rows = index.overlap_summary(args.overlaps, args.max_employee)
+        print('%d employee pairs with overlapping shifts on day %d (%.1f ms):'
+              % (len(rows), args.overlaps, (time.perf_counter() - started) * 1000))
+        shown = rows[:args.limit]
+        known = names([r[0] for r in shown] + [r[1] for r in shown])
+        for e1, e2, count, first, last in shown:
+            print(' %-10d %-30s %-10d %-30s %4d  %s-%s' % (e1, known.get(e1, ''), e2, known.get(e2, ''), count,
+                                                          clock(first), clock(last)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# org_tree.py
+# Linear-time org-chart builder used by personnel_generator.py to fill employee.manager_id.
+#
+# Employees are registered in generation order; each one gets its manager in O(1):
+# - Every group (one per department by default, or one for the whole company) is a
+#   heap-numbered tree: the group's first `roots` members have no manager, member j
+#   after them reports to member (j - roots) // span.
+# - With max_depth set, the tree stops growing downwards once the last level is full;
+#   further members become leaves spread round-robin over the last managing level, so
+#   span is then a target rather than a hard cap.
+# - A manager always has a lower ordinal than its reports, so it is generated (and
+#   written to employee.sql) before them.
+#
+# Only members that can still become managers are remembered, so with max_depth the
+# builder uses bounded memory regardless of the number of employees.
+#
+# stats() reports depth and fan-out so queries that walk manager chains can be
+# benchmarked against realistic org shapes. state()/from_state() save and restore a
+# builder as plain values, so a later run (--delta) can keep growing the same trees.
+
+from array import array
+from collections import Counter
+
+DEFAULT_SPAN = 8          # target direct reports per manager
+DEFAULT_MAX_DEPTH = 8     # levels per group, including the root level (None = unbounded)
+DEFAULT_ROOTS = 1         # employees without a manager in each group
+
+
+class _Group:
+    """Per-group tree state: members that can manage, their report counts and the
+    current level cursor."""
+
+    __slots__ = ("count", "members", "reports", "level", "level_start", "level_size")
+
+    def __init__(self, roots):
+        self.count = 0
+        self.members = array("q")   # generation index of each potential manager, by ordinal
+        self.reports = array("l")   # direct reports of each potential manager, by ordinal
+        self.level = 0
+        self.level_start = 0
+        self.level_size = roots
+
+
+class OrgTreeBuilder:
+    """Assigns managers in generation order (O(1) per employee)."""
+
+    def __init__(self, span=DEFAULT_SPAN, max_depth=DEFAULT_MAX_DEPTH, per_department=True, roots=DEFAULT_ROOTS):
+        if span < 1:
+            raise ValueError("span must be >= 1")
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be >= 1 (or None)")
+        if roots < 1:
+            raise ValueError("roots must be >= 1")
+        self.span = span
+        self.max_depth = max_depth
+        self.per_department = per_department
+        self.roots = roots
+        self._groups = {}
+        self._depths = Counter()
+        # Start and size of the last managing level (max_depth - 2) and the number of
+        # ordinals that fit in a full max_depth tree; identical for every group.
+        self._last_mgr_start = self._last_mgr_size = self._capacity = None
+        if max_depth is not None:
+            start, size = 0, roots
+            for _ in range(max_depth - 2):
+                start, size = start + size, size * span
+            self._last_mgr_start, self._last_mgr_size = start, size
+            self._capacity = sum(roots * span ** lvl for lvl in range(max_depth))
+
+    def assign(self, idx, department_id=None):
+        """Register employee at generation index idx; return its manager's index or None."""
+        key = department_id if self.per_department else None
+        g = self._groups.get(key)
+        if g is None:
+            g = self._groups[key] = _Group(self.roots)
+        j = g.count
+        g.count += 1
+
+        if self._capacity is not None and j >= self._capacity:
+            # tree is full: extra leaves hang off the last managing level, round-robin
+            level = self.max_depth - 1
+            parent = None if level == 0 else self._last_mgr_start + (j - self._capacity) % self._last_mgr_size
+        else:
+            while j >= g.level_start + g.level_size:
+                g.level_start += g.level_size
+                g.level_size *= self.span
+                g.level += 1
+            level = g.level
+            parent = None if level == 0 else (j - self.roots) // self.span
+
+        if self.max_depth is None or level < self.max_depth - 1:
+            g.members.append(idx)
+            g.reports.append(0)
+        self._depths[level] += 1
+        if parent is None:
+            return None
+        g.reports[parent] += 1
+        return g.members[parent]
+
+    def config(self):
+        """Constructor arguments, so worker processes can build identical builders."""
+        return {"span": self.span, "max_depth": self.max_depth, "per_department": self.per_department, "roots": self.roots}
+
+    def state(self):
+        """JSON-serializable snapshot of the builder (config, groups, depth counts)."""
+        groups = [[key, g.count, g.level, g.level_start, g.level_size, g.members.tolist(), g.reports.tolist()]
+                  for key, g in self._groups.items()]
+        return {"config": self.config(), "groups": groups, "depths": {str(lvl): n for lvl, n in self._depths.items()}}
+
+    @classmethod
+    def from_state(cls, state):
+        """Builder continuing from a state() snapshot."""
+        builder = cls(**state["config"])
+        for key, count, level, level_start, level_size, members, reports in state["groups"]:
+            g = builder._groups[key] = _Group(builder.roots)
+            g.count, g.level, g.level_start, g.level_size = count, level, level_start, level_size
+            g.members.extend(members)
+            g.reports.extend(reports)
+        builder._depths.update({int(lvl): n for lvl, n in state["depths"].items()})
+        return builder
+
+    def stats(self):
+        """Tree shape summary: group/root counts, depth and fan-out distributions."""
+        fanout = Counter()
+        for g in self._groups.values():
+            fanout.update(r for r in g.reports if r)
+        return _summarize(self._depths, fanout, len(self._groups))
+
+
+def _summarize(depths, fanout, groups):
+    """Stats dict from a level -> employees Counter and a reports -> managers Counter."""
+    employees = sum(depths.values())
+    managers = sum(fanout.values())
+    return {
+        "employees": employees,
+        "groups": groups,
+        "roots": depths.get(0, 0),
+        "managers": managers,
+        "depth": (max(depths) + 1) if depths else 0,
+        "avg_depth": round(sum(lvl * n for lvl, n in depths.items()) / employees, 3) if employees else 0.0,
+        "depth_histogram": {str(lvl): n for lvl, n in sorted(depths.items())},
+        "fanout_max": max(fanout) if fanout else 0,
+        "fanout_avg": round(sum(r * n for r, n in fanout.items()) / managers, 3) if managers else 0.0,
+        "fanout_histogram": {str(r): n for r, n in sorted(fanout.items())},
+    }
+
+
+def combine_stats(stats_list):
+    """Merge stats() of several builders (e.g. one per generator shard) into one summary."""
+    depths, fanout = Counter(), Counter()
+    for st in stats_list:
+        depths.update({int(k): v for k, v in st["depth_histogram"].items()})
+        fanout.update({int(k): v for k, v in st["fanout_histogram"].items()})
+    return _summarize(depths, fanout, sum(st["groups"] for st in stats_list))
@@ -0,0 +1,99 @@
+-- performance_profile.sql
+-- Optional performance profile for the personnel schema (personnel_init.sql).
+-- Run it after the bulk load; personnel_generator.py --performance-profile does
+-- that from load.sql (or directly with --dsn). Building the indexes once after the
+-- load is much cheaper than maintaining them row by row during it.
+--
+-- personnel_init.sql only has primary keys, so every join on a foreign key, every
+-- ON DELETE CASCADE from employee and every date filter scans the whole table.
+-- Measure the difference with:  python3 query_benchmark.py --profile-compare
+--
+-- Measured on 1M employees (query_benchmark.py --scales 1000000 --profile-compare;
+-- PostgreSQL 16.2 with default settings on a 1-CPU, 5 GB machine; full numbers and
+-- plans in query_bench_results/), p50 before -> after:
+--   view.v_employee_overview             > 300 s (timeout) -> 5.7 s
+--   queries.q05 / q07                    117 / 339 ms      -> 0.1 / 0.1 ms
+--   function.f3 fn_monthly_pay           225 ms            -> 0.4 ms
+--   function.f4 fn_department_headcount  2589 ms           -> 66 ms
+--   stage3_fn.q03                        2680 ms           -> 68 ms
+--   queries.q03 / q10 / q11              251 / 239 / 2550  -> 136 / 141 / 1040 ms
+-- f3 is timed for employee 100050348 (September 2025, one payment), which
+-- query_benchmark.py picks from the loaded data as :emp. queries.q12 (overlapping
+-- on-call shifts) times out at 300 s either way. The other full scans and large joins
+-- land between 0.7x and 1.2x (sub-millisecond lookups aside). That includes function.f2
+-- (fn_license_status over all of employee_license, 1729 -> 1813 ms): it is a sequential
+-- scan with the same buffers with or without the profile, and timing it with and
+-- without idx_employee_license_expiry_date, alternating, gave medians of 1867 and
+-- 1710 ms with overlapping ranges. On this machine such differences are run-to-run
+-- noise, not the indexes.
+
+-- ---------- Foreign-key indexes ----------
+-- (employee_id, pay_date) serves the payroll FK, the CASCADE from employee, per-employee
+-- pay history and fn_monthly_pay's month range, all from one index.
+CREATE INDEX IF NOT EXISTS idx_payroll_employee_pay_date ON payroll (employee_id, pay_date);
+CREATE INDEX IF NOT EXISTS idx_employee_license_employee_id ON employee_license (employee_id);
+CREATE INDEX IF NOT EXISTS idx_oncall_shift_employee_id ON oncall_shift (employee_id);
+CREATE INDEX IF NOT EXISTS idx_employee_manager_id ON employee (manager_id);
+CREATE INDEX IF NOT EXISTS idx_employee_department_id ON employee (department_id);
+CREATE INDEX IF NOT EXISTS idx_employee_position_id ON employee (position_id);
+CREATE INDEX IF NOT EXISTS idx_position_department_id ON position (department_id);
+
+-- ---------- Date indexes ----------
+-- Pay-period reports (Queries.sql year / date-range payroll, 7-year payroll purge)
+CREATE INDEX IF NOT EXISTS idx_payroll_pay_date ON payroll (pay_date);
+-- Licenses expiring within N days
+CREATE INDEX IF NOT EXISTS idx_employee_license_expiry_date ON employee_license (expiry_date);
+
+-- ---------- Partial indexes ----------
+-- Active employees are the usual filter (directory, headcount, v_active_employees);
+-- these indexes skip terminated employees entirely.
+CREATE INDEX IF NOT EXISTS idx_employee_active_department ON employee (department_id) WHERE active;
+CREATE INDEX IF NOT EXISTS idx_employee_active_name ON employee (last_name, first_name) WHERE active;
+-- Employees due to be deactivated (Queries.sql: active AND termination_date <= today)
+CREATE INDEX IF NOT EXISTS idx_employee_active_termination ON employee (termination_date)
+  WHERE active AND termination_date IS NOT NULL;
+-- On-call overlap checks compare shifts of the same weekday
+CREATE INDEX IF NOT EXISTS idx_oncall_shift_day_start ON oncall_shift (day_of_week, start_time);
+
+-- ---------- Sargable functions ----------
+-- Same signatures and results as the versions in `function`, written so the indexes
+-- above can serve them. fn_monthly_pay compares pay_date with the month's date range
+-- instead of EXTRACT(YEAR/MONTH FROM pay_date), which no index can serve. An invalid
+-- month or year 0 yields a NULL range (no rows, result 0) like the EXTRACT version.
+CREATE OR REPLACE FUNCTION fn_monthly_pay(emp_id INT, yr INT, mon INT)
+RETURNS NUMERIC LANGUAGE sql STABLE AS $$
+  SELECT COALESCE(SUM(p.amount), 0)
+  FROM payroll p,
+       (SELECT make_date(NULLIF(yr, 0), CASE WHEN mon BETWEEN 1 AND 12 THEN mon END, 1) AS first_day) m
+  WHERE p.employee_id = emp_id
+    AND p.pay_date >= m.first_day
+    AND p.pay_date < (m.first_day + INTERVAL '1 month')::date;
+$$;
+
+-- Counts from idx_employee_active_department (index-only once the table is vacuumed).
+-- rollups.sql defines fn_department_headcount over its department_headcount table;
+-- where that table exists the rollup version is kept, so the function has one body
+-- whichever of the two scripts runs last.
+DO $do$
+BEGIN
+  IF to_regclass('department_headcount') IS NULL THEN
+    CREATE OR REPLACE FUNCTION fn_department_headcount(dept_id INT)
+    RETURNS INT LANGUAGE sql STABLE AS $$
+      SELECT COUNT(*)::int
+      FROM employee
+      WHERE department_id = dept_id AND active;
+    $$;
+  END IF;
+END
+$do$;
+
+-- Equivalence check against the EXTRACT-based definition (expects 0 rows):
+-- SELECT e.employee_id, y.yr, m.mon
+-- FROM (SELECT employee_id FROM employee ORDER BY employee_id LIMIT 1000) e,
+--      generate_series(2020, 2029) y(yr), generate_series(0, 13) m(mon)
+-- WHERE fn_monthly_pay(e.employee_id, y.yr, m.mon) IS DISTINCT FROM
+--       (SELECT COALESCE(SUM(amount), 0) FROM payroll
+--        WHERE employee_id = e.employee_id
+--          AND EXTRACT(YEAR FROM pay_date) = y.yr AND EXTRACT(MONTH FROM pay_date) = m.mon);
+
+ANALYZE employee, payroll, employee_license, oncall_shift, position;
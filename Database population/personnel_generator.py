@@ -7,6 +7,9 @@
 # Features & constraints implemented:
 # - Employee IDs: unique nine-digit integers that do NOT start with 0.
 # - Emails: unique, randomized domains drawn from a common list (gmail, yahoo, etc.).
+#   Uniqueness uses a next-suffix counter per name/domain (see uniqueness.py); phones
+#   come from a keyed bijection of the generation index like employee IDs, so they are
+#   unique without keeping any index of the phones handed out.
 # - Date/time values: minute precision (YYYY-MM-DD HH:MM), no timezones, times HH:MM (no seconds).
 # - Employee constraints:
 #     * hire_date <= termination_date (termination may be NULL)
@@ -18,13 +21,85 @@
 #     * Shifts reference day_of_week (1=Mon..7=Sun), start_time, end_time, escalation_order
 #     * contact_method column removed
 # - Chunked INSERTs (configurable CHUNK_SIZE) for performance when importing into PostgreSQL.
+# - Streaming mode (--stream): employees are generated in batches and every batch's
+#   employee/payroll/license/on-call rows are written right away, so memory stays flat
+#   at any --employees. Employee IDs come from a keyed permutation (EmployeeIdSpace)
+#   rather than a sampled in-memory list.
+# - Managers come from org_tree.OrgTreeBuilder: O(1) per employee, one hierarchy per
+#   department by default, settable span-of-control (--span) and depth (--max-depth);
+#   tree statistics are written to org_tree_stats.json.
+# - Multi-process mode (--workers N): employees are split into N shards generated in
+#   parallel, each with its own seeded RNG and disjoint employee/payroll/license/shift
+#   ID ranges; part-files are merged into the per-table files (or kept, --keep-parts).
+#   --seed makes runs reproducible for a given worker count.
+# - Output formats (--format sql|copy|csv): INSERT statements, or COPY text / CSV data
+#   files for much faster loads. load.sql loads the files in FK order; for copy/csv it
+#   drops FKs and disables user triggers (payroll pay_date trigger) during the load,
+#   then re-adds and validates them in the same transaction. See table_writers.py.
+#   Each table is written as bytes through one buffered handle; vocabulary strings and
+#   2020-2029 dates are escaped and encoded once per run (literal_strings()).
+# - Compressed output (--compress gzip|xz|bz2): table files are compressed while they
+#   are written, on a background thread per file fed through a bounded queue. load.sql
+#   reads compressed copy/csv files with \copy ... FROM PROGRAM; compressed INSERT files
+#   are piped into psql by load.sh.
+# - Metrics (see metrics.py): wall time per phase (department, position, each employee
+#   table, merge, sequences), rows/sec and bytes per table and RSS samples go to
+#   metrics.json; live progress lines every --progress seconds; --profile dumps
+#   cProfile stats of the generation loop per shard.
+# - Direct load (--dsn): rows are streamed into PostgreSQL with COPY FROM STDIN over a
+#   small connection pool; each batch's employees are committed before its payroll,
+#   license and on-call rows are copied in parallel. Sequences are set afterwards and
+#   rows/sec per table are reported. Needs psycopg. See db_loader.py.
+# - NumPy backend (--backend numpy): dates, timestamps, amounts and child-row values are
+#   drawn as whole columns per batch from integer day/minute offsets. Same constraints
+#   as the default per-row Python backend. Needs numpy. See vectorized.py.
+# - Incremental deltas (--state, --delta): a full run saves the facts later runs need
+#   (employee IDs, hire/termination days, licenses, ID and email counters, org
+#   trees, RNG state) to a state file. A delta run reads it and writes one day's
+#   changes: new hires with their shifts and licenses, terminations, a payroll cycle
+#   and license renewals, keeping IDs, emails and phones unique and every constraint
+#   intact. Its load.sql inserts the new rows and applies terminations/renewals from
+#   temporary staging tables in one transaction. See state.py.
+# - Per-table regeneration (--tables payroll,oncall_shift): payroll, license and on-call
+#   rows each come from their own RNG stream (seeded from --seed, shard and table), and
+#   every file run leaves employee_snapshot.zip (employee IDs, hire dates, departments)
+#   in the output directory. After changing e.g. PAYROLL_PER_EMP_RANGE or the on-call
+#   settings, --tables rewrites just those files from the snapshot without redoing the
+#   employee phase; all other files stay as they are.
+# - Performance profile (--performance-profile): performance_profile.sql adds foreign-key,
+#   date and partial (active employees) indexes plus index-friendly versions of
+#   fn_monthly_pay and fn_department_headcount, run after the bulk load.
+# - Rollups (--rollups): rollups.sql adds monthly payroll totals per employee and
+#   department and active headcount per department, kept in sync by triggers on
+#   payroll and employee (so delta loads update them too). The generator aggregates
+#   payroll while writing it and emits the rollup rows as table files, which load.sql
+#   loads right after rollups.sql instead of rebuilding them with a full scan.
+#   With --performance-profile too, fn_department_headcount is the rollup version
+#   (rollups.sql runs last, and the profile skips it once the rollup table exists);
+#   load_check.py loads with both flags and checks that. See rollups.py.
+# - Employee batches are held as an EmployeeStore (typed columns, about 15 bytes per
+#   employee) instead of per-employee dicts: every employee row is written as soon as
+#   it is made, and the payroll, license and on-call stages (and --tables) read the
+#   store's columns; license holders are an index array. See employee_store.py.
 # - Optionally writes a sequences file (`set_sequences.sql`) that sets sequence values if you used SERIAL in the DDL.
 # - Well commented and configurable parameters at the top of the file.
 #
 # Usage:
 #     python3 generator_personnel_explicit_ids.py [--employees N] [--outdir PATH] [--no-sequences]
+#                                                 [--stream] [--batch-size N]
+#                                                 [--span N] [--max-depth N] [--org-roots N] [--flat-org]
+#                                                 [--workers N] [--seed N] [--keep-parts]
+#                                                 [--format sql|copy|csv] [--dsn DSN [--init-schema]]
+#                                                 [--backend python|numpy] [--compress gzip|xz|bz2]
+#                                                 [--progress SECONDS] [--profile] [--state PATH]
+#                                                 [--performance-profile] [--rollups]
+#     python3 generator_personnel_explicit_ids.py --tables payroll,employee_license,oncall_shift [--outdir PATH]
+#     python3 generator_personnel_explicit_ids.py --delta --state PATH [--outdir PATH] [--as-of YYYY-MM-DD]
+#                                                 [--new-hires N] [--terminations N] [--renewals N]
+#                                                 [--format sql|copy|csv] [--no-sequences]
 #
-# The script writes SQL files to the output directory and does not require a DB connection.
+# The script writes SQL (or COPY/CSV) files plus load.sql to the output directory and
+# does not require a DB connection unless --dsn is given.
 #
 
 import os
@@ -32,7 +107,21 @@ import sys
 import random
 import datetime
 import json
+import shutil
 import argparse
+import multiprocessing
+from array import array
+
+from org_tree import OrgTreeBuilder, combine_stats, DEFAULT_SPAN, DEFAULT_MAX_DEPTH, DEFAULT_ROOTS
+from uniqueness import UniquenessEngine, SuffixCounterIndex
+from table_writers import (WRITERS, FORMATS, COMPRESSIONS, file_suffix, literal_cache, merge_parts, write_load_script,
+                           write_delta_load_script)
+from db_loader import DbLoader, combine_load_stats
+from vectorized import VectorBackend
+from metrics import Metrics, ProgressReporter, combine as combine_metrics, run_profiled
+from state import GeneratorState, EmployeeSnapshot, day, iso
+from rollups import Rollups
+from employee_store import EmployeeStore
 
 # --------------------------- Configurable parameters ---------------------------
 DEFAULT_NUM_EMPLOYEES = 100000
@@ -43,6 +132,29 @@ LICENSE_RATIO = 0.5              # fraction of employees who have license rows
 LICENSE_PER_EMP_RANGE = (1, 3)
 ONCALL_SHIFTS_MIN = 1
 ONCALL_SHIFTS_MAX = 5
+TERMINATION_RATE = 0.02          # fraction of employees with a termination date
+PAYROLL_AMOUNT_RANGE = (800, 15000)
+PROGRESS_INTERVAL = 10.0         # seconds between live progress lines (0 = off)
+BACKENDS = ("python", "numpy")   # value generation: per-row Python or NumPy columns (vectorized.py)
+STREAM_BATCH_SIZE = 10000        # employees generated and flushed per batch with --stream
+
+# Delta runs (--delta): daily changes applied to a dataset saved with --state
+DELTA_NEW_HIRES = 300
+DELTA_TERMINATIONS = 50
+DELTA_RENEWALS = 100
+RENEWAL_WINDOW_DAYS = 60         # licenses expiring within this many days can be renewed
+
+# Employee ID space: 9-digit IDs 100000000..999999999 (see EmployeeIdSpace)
+EID_MIN = 100_000_000
+EID_COUNT = 900_000_000
+EID_HALF_BITS = 15               # 2 x 15 bits = 2^30 >= EID_COUNT
+EID_HALF_MASK = (1 << EID_HALF_BITS) - 1
+EID_ROUNDS = 4
+
+# Phone numbers: +1 followed by 10 digits in PHONE_MIN..PHONE_MIN+PHONE_COUNT-1
+PHONE_MIN = 2_000_000_000
+PHONE_COUNT = 8_000_000_000
+PHONE_HALF_BITS = 17             # 2 x 17 bits = 2^34 >= PHONE_COUNT
 
 # Date bounds used for most generated dates
 DATE_MIN = datetime.date(2020, 1, 1)
@@ -99,7 +211,7 @@ def rand_date():
     d = DATE_MIN + datetime.timedelta(days=random.randint(0, delta))
     return d.isoformat()
 
-def rand_date_between(start_iso, end_iso):
+def rand_date_between(start_iso, end_iso, rng=random):
     """Random ISO date between two ISO dates/objects (inclusive)."""
     if isinstance(start_iso, str):
         start = datetime.date.fromisoformat(start_iso)
@@ -112,28 +224,60 @@ def rand_date_between(start_iso, end_iso):
     if end < start:
         start, end = end, start
     delta = (end - start).days
-    d = start + datetime.timedelta(days=random.randint(0, max(0, delta)))
+    d = start + datetime.timedelta(days=rng.randint(0, max(0, delta)))
     return d.isoformat()
 
-def rand_datetime_minute():
+def rand_datetime_minute(rng=random):
     """Random timestamp (minute precision) between DT_MIN and DT_MAX in format YYYY-MM-DD HH:MM."""
     total_minutes = int((DT_MAX - DT_MIN).total_seconds() // 60)
-    mins = random.randint(0, total_minutes)
+    mins = rng.randint(0, total_minutes)
     dt = DT_MIN + datetime.timedelta(minutes=mins)
     return dt.strftime("%Y-%m-%d %H:%M")
 
-def rand_time(min_hour=0, max_hour=23, minute_choices=(0,15,30,45)):
+def rand_time(min_hour=0, max_hour=23, minute_choices=(0,15,30,45), rng=random):
     """Return a time string HH:MM (no seconds)."""
-    h = random.randint(min_hour, max_hour)
-    m = random.choice(minute_choices)
+    h = rng.randint(min_hour, max_hour)
+    m = rng.choice(minute_choices)
     return f"{h:02d}:{m:02d}"
 
+class EmployeeIdSpace:
+    """Keyed bijections from a generation index (0, 1, 2, ...) to a unique 9-digit
+    employee ID that doesn't start with 0, and to a unique phone number.
+
+    A 4-round Feistel network over 30 bits, cycle-walked into the 900M-wide ID range,
+    so the ID of any earlier employee can be recomputed in O(1) instead of keeping a
+    sampled list of every ID in memory. Phones use the same keys over 34 bits,
+    cycle-walked into PHONE_COUNT: distinct indexes (any shard, any later delta) never
+    share a phone, and nothing has to remember the phones already used."""
+
+    def __init__(self, rng=random, keys=None):
+        self.keys = list(keys) if keys is not None else [rng.getrandbits(32) for _ in range(EID_ROUNDS)]
+
+    def _permute(self, x, half_bits=EID_HALF_BITS):
+        mask = (1 << half_bits) - 1
+        left, right = x >> half_bits, x & mask
+        for key in self.keys:
+            left, right = right, left ^ ((((right + key) * 0x9E3779B1) >> 11) & mask)
+        return (left << half_bits) | right
+
+    def eid(self, idx):
+        """Employee ID for generation index idx (0 <= idx < EID_COUNT)."""
+        x = self._permute(idx)
+        while x >= EID_COUNT:
+            x = self._permute(x)
+        return EID_MIN + x
+
+    def phone(self, idx):
+        """Phone number '+1NNNNNNNNNN' for generation index idx."""
+        x = self._permute(idx, PHONE_HALF_BITS)
+        while x >= PHONE_COUNT:
+            x = self._permute(x, PHONE_HALF_BITS)
+        return "+1%d" % (PHONE_MIN + x)
+
 def generate_unique_eids(n):
     """Generate n unique 9-digit employee IDs that don't start with 0."""
-    start = 100_000_000
-    end = 999_999_999
-    # sample without replacement
-    return random.sample(range(start, end+1), n)
+    id_space = EmployeeIdSpace()
+    return [id_space.eid(i) for i in range(n)]
 
 def generate_address():
     """Generate a random address like '123 Maple St.'"""
@@ -230,227 +374,918 @@ STREET_SUFFIXES = ["St.", "Ave.", "Blvd.", "Rd.", "Ln.", "Dr."]
 
 # --------------------------- Core generation logic ---------------------------
 
-def write_inserts_chunked(path, table, cols, rows, chunk=CHUNK_SIZE):
-    """Append chunked INSERT statements to the file at 'path'. Rows are pre-escaped strings."""
-    with open(path, "a", encoding="utf-8") as f:
-        for i in range(0, len(rows), chunk):
-            chunk_rows = rows[i:i+chunk]
-            values = ",\n".join("(" + ", ".join(r) + ")" for r in chunk_rows)
-            f.write(f"INSERT INTO {table} ({', '.join(cols)}) VALUES\n{values};\n\n")
+POSITIONS_BY_DEPT = {}
+for _pos_id, (_title, _dept_idx, _desc) in enumerate(POSITIONS, start=1):
+    POSITIONS_BY_DEPT.setdefault(_dept_idx, []).append(_pos_id)
+LICENSE_INDEX = {name: i for i, name in enumerate(LICENSE_NAMES)}
+
+def employee_dates(hire_iso=None, termination_rate=TERMINATION_RATE):
+    """(hire, birth, termination or None, created_at) ISO strings for one employee:
+    birth 18-65 years before hire, termination (rare) after hire. hire_iso fixes the
+    hire date (default: random in DATE_MIN..DATE_MAX)."""
+    hire_iso = hire_iso or rand_date()
+    hire_date_obj = datetime.date.fromisoformat(hire_iso)
+    birth_latest = hire_date_obj - datetime.timedelta(days=18*365 + 4)    # approx adjust for leap years
+    birth_earliest = hire_date_obj - datetime.timedelta(days=65*365 + 16)
+    if birth_earliest > birth_latest:
+        birth_date_obj = hire_date_obj - datetime.timedelta(days=30*365)
+    else:
+        span = (birth_latest - birth_earliest).days
+        birth_date_obj = birth_earliest + datetime.timedelta(days=random.randint(0, max(0, span)))
+    birth_iso = birth_date_obj.isoformat()
+    termination_iso = None
+    if random.random() < termination_rate:
+        # small chance of termination; ensure after hire
+        term_iso = rand_date_between(hire_iso, DATE_MAX.isoformat())
+        if not hire_before_termination(hire_iso, term_iso):
+            # fallback to hire + 30 days
+            term_iso = (hire_date_obj + datetime.timedelta(days=30)).isoformat()
+        termination_iso = term_iso
+    created_at = rand_datetime_minute()
+    # enforce birth constraint; fallback to 30 years before hire if violated
+    if not birth_within_age_range(hire_iso, birth_iso):
+        birth_iso = (hire_date_obj - datetime.timedelta(days=30*365)).isoformat()
+    return hire_iso, birth_iso, termination_iso, created_at
+
+def make_employee(idx, id_space, unique, org_tree, dates=None):
+    """Build the employee at generation index idx. The org tree only hands out
+    managers with lower indexes, i.e. employees already written to employee.sql.
+    ID and phone both come from id_space, so they are unique across shards and runs.
+    dates is a precomputed employee_dates() tuple (NumPy backend) or None."""
+    eid = id_space.eid(idx)
+    first = random.choice(FIRST_NAMES)
+    last = random.choice(LAST_NAMES)
+    base = f"{first.lower()}.{last.lower()}"
+    domain = random.choice(EMAIL_DOMAINS)
+    email = f"{base}{unique.next_suffix('email', f'{base}@{domain}')}@{domain}"
+    phone = id_space.phone(idx)
+    address = generate_address()
+    hire_iso, birth_iso, termination_iso, created_at = dates if dates is not None else employee_dates()
+    dept_id = random.randint(1, len(DEPARTMENTS))
+    valid_positions = POSITIONS_BY_DEPT.get(dept_id)
+    pos_id = random.choice(valid_positions) if valid_positions else random.randint(1, len(POSITIONS))
+    manager_idx = org_tree.assign(idx, dept_id)
+    manager = None if manager_idx is None else id_space.eid(manager_idx)
+    ec = {"contacts":[{"name": random.choice(FIRST_NAMES) + " " + random.choice(LAST_NAMES), "phone": f"+1{random.randint(2000000000, 9999999999)}"}]}
+    notes = random.choice(NOTES) if random.random() < 0.35 else ""
+    return {
+        "employee_id": eid,
+        "first": first,
+        "last": last,
+        "email": email,
+        "phone": phone,
+        "address": address,
+        "birth": birth_iso,
+        "hire": hire_iso,
+        "termination": termination_iso,
+        "active": termination_iso is None,
+        "department_id": dept_id,
+        "position_id": pos_id,
+        "manager": manager,
+        "emergency_contacts": ec,
+        "notes": notes,
+        "created_at": created_at
+    }
+
+def employee_row(emp):
+    """employee row (plain values, formatted by the table writer) for an employee dict.
+    emergency_contacts is passed as JSON text so every field can hit the literal cache."""
+    return [
+        emp["employee_id"], emp["first"], emp["last"], emp["email"], emp["phone"], emp["address"],
+        emp["birth"], emp["hire"], emp["termination"], emp["active"], emp["department_id"], emp["position_id"],
+        emp["manager"], json.dumps(emp["emergency_contacts"]), emp["notes"], emp["created_at"]
+    ]
+
+def payroll_rows_for(employee_id, hire, first_id, rng=random):
+    """Payroll rows for one employee hired on hire (ISO date): at least one, pay_date >=
+    hire_date, IDs from first_id. rng is the random module or a per-table stream
+    (child_streams())."""
+    rows = []
+    for pid in range(first_id, first_id + rng.randint(*PAYROLL_PER_EMP_RANGE)):
+        pay_date = rand_date_between(hire, DATE_MAX.isoformat(), rng)
+        if not hire_before_pay(hire, pay_date):
+            pay_date = hire
+        amt = round(rng.uniform(*PAYROLL_AMOUNT_RANGE), 2)
+        notes = rng.choice(NOTES)
+        created_at = rand_datetime_minute(rng)
+        rows.append([pid, employee_id, amt, pay_date, notes, created_at])
+    return rows
+
+def license_rows_for(employee_id, hire, first_id, rng=random):
+    """License rows for one employee, issued on/after hire and expiring by DATE_MAX."""
+    rows = []
+    for lid in range(first_id, first_id + rng.randint(*LICENSE_PER_EMP_RANGE)):
+        lname = rng.choice(LICENSE_NAMES)
+        issued = rand_date_between(hire, DATE_MAX.isoformat(), rng)
+        issued_dt = datetime.date.fromisoformat(issued)
+        expiry_dt = issued_dt + datetime.timedelta(days=rng.randint(365, 365*5))
+        if expiry_dt > DATE_MAX:
+            expiry_dt = DATE_MAX
+        notes = rng.choice(NOTES)
+        created_at = rand_datetime_minute(rng)
+        rows.append([lid, employee_id, lname, issued, expiry_dt.isoformat(), notes, created_at])
+    return rows
+
+def shift_rows_for(employee_id, first_id, rng=random):
+    """On-call rows for one employee (day_of_week 1..7, start_time/end_time HH:MM)."""
+    rows = []
+    for sid in range(first_id, first_id + rng.randint(ONCALL_SHIFTS_MIN, ONCALL_SHIFTS_MAX)):
+        dow = rng.randint(1, 7)  # 1=Mon .. 7=Sun
+        start = rand_time(6, 20, rng=rng)
+        sh_h = int(start.split(":")[0]); sh_m = int(start.split(":")[1])
+        duration = rng.randint(2, 8)
+        end_h = min(23, sh_h + duration)
+        end = f"{end_h:02d}:{sh_m:02d}"
+        esc = rng.randint(1, 5)
+        created_at = rand_datetime_minute(rng)
+        rows.append([sid, employee_id, dow, start, end, esc, created_at])
+    return rows
+
+# set_sequences.sql: (sequence, table, id column)
+SEQUENCES = [
+    ('department_department_id_seq', 'department', 'department_id'),
+    ('position_position_id_seq', 'position', 'position_id'),
+    ('employee_employee_id_seq', 'employee', 'employee_id'),
+    ('payroll_payroll_id_seq', 'payroll', 'payroll_id'),
+    ('employee_license_license_id_seq', 'employee_license', 'license_id'),
+    ('oncall_shift_shift_id_seq', 'oncall_shift', 'shift_id'),
+]
+def literal_strings():
+    """Strings that recur across rows, pre-encoded once per run by the table writers:
+    the static vocabulary, every ISO date in DATE_MIN..DATE_MAX and the quarter-hour
+    HH:MM times of on-call shifts."""
+    strings = FIRST_NAMES + LAST_NAMES + LICENSE_NAMES + NOTES + [""]
+    strings += [s for row in DEPARTMENTS + POSITIONS for s in row if isinstance(s, str)]
+    strings += [(DATE_MIN + datetime.timedelta(days=d)).isoformat() for d in range((DATE_MAX - DATE_MIN).days + 1)]
+    strings += [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 15, 30, 45)]
+    return strings
+
+INIT_SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personnel_init.sql")
+# FK/date/partial indexes and sargable functions, applied after the load (--performance-profile)
+PERFORMANCE_PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "performance_profile.sql")
+# Trigger-maintained payroll / headcount summary tables, pre-filled by the generator (--rollups)
+ROLLUPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rollups.sql")
+
+COLS_DEPT = ["department_id", "name", "description", "created_at"]
+COLS_POS = ["position_id", "title", "department_id", "description", "created_at"]
+# Employee table and its children, in FK load order: key -> (table, columns, file label)
+COLS_EMP = ["employee_id","first_name","last_name","email","phone","address","birth_date","hire_date","termination_date","active","department_id","position_id","manager_id","emergency_contacts","notes","created_at"]
+COLS_PAY = ["payroll_id","employee_id","amount","pay_date","notes","created_at"]
+COLS_LIC = ["license_id","employee_id","license_name","issued_date","expiry_date","notes","created_at"]
+COLS_SHIFT = ["shift_id","employee_id","day_of_week","start_time","end_time","escalation_order","created_at"]
+EMPLOYEE_TABLES = {
+    "employee": ("employee", COLS_EMP, "employees"),
+    "payroll": ("payroll", COLS_PAY, "payroll"),
+    "employee_license": ("employee_license", COLS_LIC, "employee_license"),
+    "oncall_shift": ("oncall_shift", COLS_SHIFT, "oncall_shift"),
+}
+# Rollup tables of rollups.sql (--rollups), same layout. payroll_monthly_employee is
+# written by the shards next to payroll; the other two from the merged Rollups.
+COLS_PAY_MONTH_EMP = ["month","employee_id","department_id","payments_count","total_paid"]
+COLS_PAY_MONTH_DEPT = ["month","department_id","payments_count","total_paid"]
+COLS_HEADCOUNT = ["department_id","active_employees"]
+ROLLUP_TABLES = {
+    "payroll_monthly_employee": ("payroll_monthly_employee", COLS_PAY_MONTH_EMP, "payroll_monthly_employee"),
+    "payroll_monthly_department": ("payroll_monthly_department", COLS_PAY_MONTH_DEPT, "payroll_monthly_department"),
+    "department_headcount": ("department_headcount", COLS_HEADCOUNT, "department_headcount"),
+}
+SHARD_ROLLUP = "payroll_monthly_employee"
+# Delta change sets: staging table -> (columns, column DDL, statement applying it).
+# Staging tables are temporary and loaded like any table file, so UPDATEs work the
+# same way for sql, copy and csv output.
+DELTA_UPDATES = {
+    "employee_termination": (
+        ["employee_id", "termination_date"],
+        "employee_id INT PRIMARY KEY, termination_date DATE NOT NULL",
+        "UPDATE employee e SET termination_date = d.termination_date, active = false\n"
+        "FROM employee_termination d WHERE e.employee_id = d.employee_id;"),
+    "license_renewal": (
+        ["license_id", "issued_date", "expiry_date"],
+        "license_id INT PRIMARY KEY, issued_date DATE NOT NULL, expiry_date DATE NOT NULL",
+        "UPDATE employee_license l SET issued_date = d.issued_date, expiry_date = d.expiry_date\n"
+        "FROM license_renewal d WHERE l.license_id = d.license_id;"),
+}
+# Most child rows a single employee can get; shard k's child IDs start at
+# 1 + (first employee index of shard k) * this, so shards never share an ID.
+CHILD_IDS_PER_EMP = {
+    "payroll": PAYROLL_PER_EMP_RANGE[1],
+    "employee_license": LICENSE_PER_EMP_RANGE[1],
+    "oncall_shift": ONCALL_SHIFTS_MAX,
+}
+
+SNAPSHOT_FILE = "employee_snapshot.zip"   # employee facts for --tables, in the output directory
+SNAPSHOT_PART = "employee_snapshot.part-%03d."   # per-shard spool file prefix while a run writes it
+
+def record_licenses(facts, rows, holders):
+    """Add license rows to a GeneratorState; holders maps employee_id -> generation index."""
+    for r in rows:
+        facts.add_license(r[0], holders[r[1]], LICENSE_INDEX[r[2]], r[4])
+
+def child_streams(base_seed, shard):
+    """One random.Random per child table of a shard, seeded from the run seed, the shard
+    and the table name only. A child table's rows then depend on nothing but the
+    employee facts and its own settings, so regenerate_tables() can rebuild it alone."""
+    return {table: random.Random(f"{base_seed}:{shard}:{table}") for table in CHILD_IDS_PER_EMP}
+
+def vector_backend(streams, seed=None):
+    """VectorBackend whose child tables draw from generators seeded off the streams."""
+    return VectorBackend(seed, DATE_MIN, DATE_MAX, TERMINATION_RATE, PAYROLL_PER_EMP_RANGE,
+                         PAYROLL_AMOUNT_RANGE, LICENSE_PER_EMP_RANGE, (ONCALL_SHIFTS_MIN, ONCALL_SHIFTS_MAX),
+                         NOTES, LICENSE_NAMES, table_seeds={t: rng.getrandbits(64) for t, rng in streams.items()})
+
+def pick_license_holders(rng, count, remaining, needed):
+    """Selection sampling (Knuth's algorithm S) over the next `count` of `remaining`
+    employees: offsets of those getting licenses (an index array into the batch's
+    EmployeeStore), and how many are still needed. Picks an exact-size random subset on
+    the fly without holding the population."""
+    chosen = array("i")
+    for offset in range(count):
+        if rng.random() * (remaining - offset) < needed:
+            needed -= 1
+            chosen.append(offset)
+    return chosen, needed
+
+def generate_children(store, chosen, writers, next_ids, streams, vec, metrics, rollups=None):
+    """Write one batch's payroll, license (employees at the chosen offsets only) and
+    on-call rows to whichever of those tables are in writers, each from its own stream.
+    store is the batch's EmployeeStore; only its employee_id, hire_day and
+    department_id columns are read. next_ids is advanced in place; returns the license
+    rows. With rollups (a Rollups) the batch's payroll rows are also aggregated and its
+    payroll_monthly_employee rows written."""
+    lic_rows = []
+    if vec:
+        emp_ids, hire_days = vec.column(store.employee_id), vec.column(store.hire_day)
+        if "payroll" in writers:
+            metrics.start("payroll")
+            rows = vec.payroll_rows(emp_ids, hire_days, next_ids["payroll"])
+            next_ids["payroll"] += len(rows)
+            writers["payroll"].write_rows(rows)
+            if rollups is not None:
+                write_payroll_rollup(rollups, rows, store, writers, metrics)
+        if "employee_license" in writers:
+            metrics.start("employee_license")
+            holders = vec.column(chosen)
+            lic_rows = vec.license_rows(emp_ids[holders], hire_days[holders], next_ids["employee_license"])
+            next_ids["employee_license"] += len(lic_rows)
+            writers["employee_license"].write_rows(lic_rows)
+        if "oncall_shift" in writers:
+            metrics.start("oncall_shift")
+            rows = vec.shift_rows(emp_ids, next_ids["oncall_shift"])
+            next_ids["oncall_shift"] += len(rows)
+            writers["oncall_shift"].write_rows(rows)
+        return lic_rows
+
+    emp_ids = store.employee_id
+    # Payroll: every employee has at least one payroll row
+    if "payroll" in writers:
+        metrics.start("payroll")
+        writer, rng, pid = writers["payroll"], streams["payroll"], next_ids["payroll"]
+        pay_rows = []
+        for i, eid in enumerate(emp_ids):
+            rows = payroll_rows_for(eid, store.hire(i), pid, rng)
+            pid += len(rows)
+            writer.write_rows(rows)
+            if rollups is not None:
+                pay_rows.extend(rows)
+        next_ids["payroll"] = pid
+        if rollups is not None:
+            write_payroll_rollup(rollups, pay_rows, store, writers, metrics)
+
+    # Employee licenses (chosen subset)
+    if "employee_license" in writers:
+        metrics.start("employee_license")
+        writer, rng, lid = writers["employee_license"], streams["employee_license"], next_ids["employee_license"]
+        for offset in chosen:
+            rows = license_rows_for(emp_ids[offset], store.hire(offset), lid, rng)
+            lid += len(rows)
+            writer.write_rows(rows)
+            lic_rows.extend(rows)
+        next_ids["employee_license"] = lid
+
+    # Oncall shifts
+    if "oncall_shift" in writers:
+        metrics.start("oncall_shift")
+        writer, rng, sid = writers["oncall_shift"], streams["oncall_shift"], next_ids["oncall_shift"]
+        for eid in emp_ids:
+            rows = shift_rows_for(eid, sid, rng)
+            sid += len(rows)
+            writer.write_rows(rows)
+        next_ids["oncall_shift"] = sid
+    return lic_rows
+
+def write_payroll_rollup(rollups, rows, store, writers, metrics):
+    """Aggregate a batch's payroll rows into rollups and write its payroll_monthly_employee rows."""
+    metrics.start(SHARD_ROLLUP)
+    departments = dict(zip(store.employee_id, store.department_id))
+    writers[SHARD_ROLLUP].write_rows(rollups.add_payroll(rows, departments))
+
+def generate_shard(spec, org_tree=None):
+    """Generate employees spec['start'] <= idx < spec['end'] and their payroll, license
+    and on-call rows into spec['paths']. Runs inside a worker process with --workers;
+    spec only holds plain values so it can be pickled. With spec['dsn'] the rows are
+    COPYed into the database batch by batch instead. Returns (row counts, org stats,
+    load stats or None, metrics dict, GeneratorState facts if spec['state'] else None,
+    the shard's snapshot layout [start, end, license holders, batch size],
+    Rollups if spec['rollups'] else None);
+    with spec['snapshot'] (a path prefix) the EmployeeSnapshot arrays are spooled to
+    files batch by batch (EmployeeSnapshot.spool) instead of being kept in memory;
+    with spec['rollups'] the shard also writes spec['paths']['payroll_monthly_employee'].
+    Payroll, license and on-call rows come from per-table streams (child_streams())
+    rather than the shard's RNG.
+    With spec['profile_dir'] the shard runs under cProfile and its stats are dumped there."""
+    if spec["profile_dir"]:
+        path = os.path.join(spec["profile_dir"], "profile-shard-%03d.pstats" % spec["shard"])
+        return run_profiled(path, _generate_shard, spec, org_tree)
+    return _generate_shard(spec, org_tree)
+
+def _generate_shard(spec, org_tree):
+    metrics = Metrics()
+    metrics.start("setup")
+    if spec["seed"] is not None:
+        random.seed(spec["seed"])
+    shard, workers = spec["shard"], spec["workers"]
+    start, end = spec["start"], spec["end"]
+    total = end - start
+    id_space = EmployeeIdSpace(keys=spec["id_keys"])
+    if org_tree is None:
+        org_tree = OrgTreeBuilder(**spec["org_config"])
+    unique = UniquenessEngine()
+    unique.mark_suffixed("email", stride=workers, offset=shard)
+    loader = None
+    if spec["dsn"]:
+        loader = DbLoader(spec["dsn"])
+        cache = literal_cache("copy", literal_strings())
+        writers = {key: loader.table_writer(table, cols, parent=(key == "employee"), cache=cache)
+                   for key, (table, cols, label) in EMPLOYEE_TABLES.items()}
+    else:
+        writer_cls = WRITERS[spec["format"]]
+        cache = literal_cache(writer_cls, literal_strings())
+        tables = dict(EMPLOYEE_TABLES)
+        if spec["rollups"]:
+            tables[SHARD_ROLLUP] = ROLLUP_TABLES[SHARD_ROLLUP]
+        writers = {key: writer_cls(spec["paths"][key], table, cols, label, wrap=spec["wrap"], chunk=CHUNK_SIZE,
+                                   cache=cache, compress=spec["compress"])
+                   for key, (table, cols, label) in tables.items()}
+    for key, writer in writers.items():
+        metrics.track(key, writer)
+    emp_writer = writers["employee"]
+
+    next_ids = {key: 1 + start * per_emp for key, per_emp in CHILD_IDS_PER_EMP.items()}
+    child_writers = {key: writers[key] for key in CHILD_IDS_PER_EMP}
+    rollups = None
+    if spec["rollups"]:
+        rollups = Rollups()
+        child_writers[SHARD_ROLLUP] = writers[SHARD_ROLLUP]
+    streams = child_streams(spec["base_seed"], shard)
+    # Licenses go to an exact-size random subset of employees (pick_license_holders)
+    lic_needed = spec["licenses"]
+    batch_size = max(1, spec["batch_size"] if spec["stream"] or loader else total)
+    facts = GeneratorState() if spec["state"] else None
+    layout = [start, end, lic_needed, batch_size]
+    snapshot = EmployeeSnapshot() if spec["snapshot"] else None
+    vec = vector_backend(streams, random.getrandbits(64)) if spec["backend"] == "numpy" else None
+    reporter = None
+    if spec["progress"]:
+        reporter = ProgressReporter(metrics, spec["progress"], "[shard %d] " % shard if workers > 1 else "")
+        reporter.start()
+    for batch_start in range(start, end, batch_size):
+        batch_end = min(end, batch_start + batch_size)
+        metrics.start("employee")
+        dates = vec.employee_dates(batch_end - batch_start)[1] if vec else None
+        # Each employee row is written right away; only the store's columns outlive it
+        store = EmployeeStore(DATE_MIN)
+        rows = []
+        for idx in range(batch_start, batch_end):
+            emp = make_employee(idx, id_space, unique, org_tree, dates[idx - batch_start] if dates is not None else None)
+            rows.append(employee_row(emp))
+            if len(rows) >= CHUNK_SIZE:
+                emp_writer.write_rows(rows)
+                rows = []
+            store.add(emp)
+            if facts is not None:
+                facts.add_employee(emp["employee_id"], emp["hire"], emp["termination"], emp["department_id"])
+            if snapshot is not None:
+                snapshot.add(emp["employee_id"], emp["hire"], emp["department_id"])
+        emp_writer.write_rows(rows)
+        dates = rows = emp = None  # nothing but the store is kept while the children are generated
+        if snapshot is not None:
+            snapshot.spool(spec["snapshot"])
+        if rollups is not None:
+            rollups.add_employees(store)
+
+        metrics.start("employee_license")
+        chosen, lic_needed = pick_license_holders(streams["employee_license"], len(store), end - batch_start, lic_needed)
+        lic_rows = generate_children(store, chosen, child_writers, next_ids, streams, vec, metrics, rollups)
+        if facts is not None:
+            record_licenses(facts, lic_rows, {store.employee_id[offset]: batch_start + offset for offset in chosen})
+
+        if loader:
+            metrics.start("load")
+            loader.end_batch()
+
+    for key, writer in writers.items():
+        metrics.start(key)
+        writer.close()
+    load_stats = None
+    if loader:
+        metrics.start("load")
+        load_stats = loader.close()
+    metrics.stop()
+    if reporter:
+        reporter.stop()
+    if facts is not None:
+        facts.info = {"next_ids": next_ids, "email_next": unique.suffix_values("email"), "org_tree": org_tree.state()}
+    return ({key: w.count for key, w in writers.items()}, org_tree.stats(), load_stats, metrics.to_dict(), facts,
+            layout, rollups)
+
+def write_sequences_file(out_dir):
+    """Write set_sequences.sql (setval for every SERIAL column) to out_dir; returns its path."""
+    seq_file = os.path.join(out_dir, "set_sequences.sql")
+    with open(seq_file, "w", encoding="utf-8") as f:
+        f.write("-- Set sequences to the current max values (use if your DDL used SERIAL for ids)\n\n")
+        for seq_name, table, col in SEQUENCES:
+            f.write("SELECT setval('%s', (SELECT COALESCE(MAX(%s),0) FROM %s), true);\n" % (seq_name, col, table))
+    return seq_file
+
+def save_run_state(path, shard_facts, id_keys, num_employees):
+    """Merge the shards' GeneratorState facts (in shard order) and save them with the
+    counters of the whole run. New employees of a later delta join shard 0's org trees."""
+    state = GeneratorState()
+    for facts in shard_facts:
+        state.extend(facts)
+    state.info = {
+        "id_keys": list(id_keys),
+        "next_index": num_employees,
+        "next_ids": {key: max(f.info["next_ids"][key] for f in shard_facts) for key in CHILD_IDS_PER_EMP},
+        "email_next": SuffixCounterIndex.merge_next_values([f.info["email_next"] for f in shard_facts]),
+        "org_tree": shard_facts[0].info["org_tree"],
+        "rng_state": random.getstate(),
+        "as_of": None,
+    }
+    state.save(path)
+    return state
+
+def save_snapshot(path, prefixes, layouts, info):
+    """Zip the shards' spooled EmployeeSnapshot arrays (in shard order) with the run
+    layout: info plus [start, end, license holders, batch size] per shard."""
+    EmployeeSnapshot.save_spooled(path, dict(info, shards=layouts), prefixes)
+    return path
+
+def write_rollup_table(out_dir, key, rows, writer_cls, compress, metrics):
+    """Write one rollup table file (a standalone file, like department); returns the closed writer."""
+    table, cols, label = ROLLUP_TABLES[key]
+    metrics.start(key)
+    writer = writer_cls(os.path.join(out_dir, key + writer_cls.ext + file_suffix(compress)), table, cols, label,
+                        chunk=CHUNK_SIZE, compress=compress)
+    writer.write_rows(rows)
+    writer.close()
+    metrics.track(key, writer)
+    return writer
+
+def regenerate_tables(out_dir, tables, progress=0):
+    """Rewrite the given child tables ("payroll", "employee_license", "oncall_shift") of
+    the run in out_dir from its employee snapshot, with the current payroll / license /
+    on-call settings. The employee phase is skipped and every other file is left as it
+    is; load.sql still applies. Child IDs restart at each shard's base, so changing a
+    *_RANGE keeps them disjoint, and the same settings give the same rows as the full
+    run. If the run wrote rollups, regenerating payroll rewrites the payroll rollup
+    files too (department_headcount does not depend on payroll). Returns (paths,
+    counts); timings go to regenerate_metrics.json."""
+    snapshot = EmployeeSnapshot.load(os.path.join(out_dir, SNAPSHOT_FILE))
+    info = snapshot.info
+    rollups = Rollups() if info.get("rollups") and "payroll" in tables else None
+    shard_tables = {key: EMPLOYEE_TABLES[key] for key in tables}
+    if rollups is not None:
+        shard_tables[SHARD_ROLLUP] = ROLLUP_TABLES[SHARD_ROLLUP]
+    metrics = Metrics()
+    reporter = None
+    if progress:
+        reporter = ProgressReporter(metrics, progress)
+        reporter.start()
+    metrics.start("setup")
+    writer_cls = WRITERS[info["format"]]
+    ext = writer_cls.ext + file_suffix(info["compress"])
+    cache = literal_cache(writer_cls, literal_strings())
+    shards = info["shards"]
+    merge = len(shards) > 1 and not info["keep_parts"]
+    paths = {key: [] for key in shard_tables}
+    counts, sizes = dict.fromkeys(shard_tables, 0), dict.fromkeys(shard_tables, 0)
+    for shard, (start, end, lic_needed, batch_size) in enumerate(shards):
+        streams = child_streams(info["seed"], shard)
+        vec = vector_backend(streams) if info["backend"] == "numpy" else None
+        writers = {}
+        for key, (table, cols, label) in shard_tables.items():
+            path = os.path.join(out_dir, (key + ext) if len(shards) == 1 else f"{key}.part-{shard:03d}{ext}")
+            writers[key] = writer_cls(path, table, cols, label, wrap=not merge, chunk=CHUNK_SIZE, cache=cache,
+                                      compress=info["compress"])
+            metrics.track(key, writers[key])
+            paths[key].append(path)
+        next_ids = {key: 1 + start * per_emp for key, per_emp in CHILD_IDS_PER_EMP.items()}
+        for batch_start in range(start, end, batch_size):
+            batch_end = min(end, batch_start + batch_size)
+            metrics.start("snapshot")
+            store = EmployeeStore.from_snapshot(snapshot, batch_start, batch_end, DATE_MIN)
+            chosen = array("i")
+            if "employee_license" in writers:
+                metrics.start("employee_license")
+                chosen, lic_needed = pick_license_holders(streams["employee_license"], len(store),
+                                                          end - batch_start, lic_needed)
+            generate_children(store, chosen, writers, next_ids, streams, vec, metrics, rollups)
+        for key, writer in writers.items():
+            metrics.start(key)
+            writer.close()
+            counts[key] += writer.count
+            sizes[key] += writer.bytes
+    if merge:
+        metrics.start("merge")
+        for key, (table, cols, label) in shard_tables.items():
+            merged = os.path.join(out_dir, key + ext)
+            merge_parts(merged, paths[key], writer_cls.file_header(table, cols, label), writer_cls.file_footer(),
+                        info["compress"])
+            paths[key] = [merged]
+    if rollups is not None:
+        key = "payroll_monthly_department"
+        writer = write_rollup_table(out_dir, key, rollups.department_rows(), writer_cls, info["compress"], metrics)
+        paths[key], counts[key], sizes[key] = [writer.path], writer.count, writer.bytes
+    metrics.stop()
+    if reporter:
+        reporter.stop()
+    paths = {key: p[0] if len(p) == 1 else p for key, p in paths.items()}
+    metrics_file = os.path.join(out_dir, "regenerate_metrics.json")
+    with open(metrics_file, "w", encoding="utf-8") as f:
+        json.dump(dict(metrics.to_dict(), tables={key: {"rows": counts[key], "bytes": sizes[key]} for key in counts}),
+                  f, indent=2)
+    paths['metrics'] = metrics_file
+    return paths, counts
+
+def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT, write_sequences=True,
+                   stream=False, batch_size=STREAM_BATCH_SIZE, org_tree=None, workers=1, seed=None, keep_parts=False, fmt="sql", dsn=None, init_schema=False,
+                   backend="python", compress=None, progress=0, profile=False, state_file=None,
+                   performance_profile=False, rollups=False):
+    """Generate all SQL files with explicit IDs in out_dir. Returns dict of file paths.
+
+    With stream=True employees are generated batch_size at a time and each batch's
+    employee, payroll, license and on-call rows are written before the next batch is
+    built, so peak memory stays flat as num_employees grows. Otherwise the whole
+    population is one batch (all employees first, then each child table).
+
+    org_tree is an OrgTreeBuilder deciding manager_id (default: per-department trees
+    with DEFAULT_SPAN / DEFAULT_MAX_DEPTH); its shape statistics are written to
+    org_tree_stats.json.
+
+    workers > 1 splits the employees into that many contiguous shards, each generated
+    in its own process with its own RNG (seeded from seed and the shard number) and
+    its own employee/payroll/license/shift ID ranges; each shard builds separate org
+    hierarchies. Shard part-files are merged into the usual per-table files unless
+    keep_parts is set, in which case each part is a standalone BEGIN/COMMIT file and
+    paths[table] lists them in load order. The same seed and worker count always give
+    identical output.
+
+    fmt selects the table file format: "sql" (chunked INSERTs), "copy" (COPY text) or
+    "csv" (COPY CSV). A psql load script, load.sql, is written for every format; for
+    copy/csv it suspends foreign keys and user triggers during the load and validates
+    them afterwards.
 
-def generate_files(num_employees=DEFAULT_NUM_EMPLOYEES, out_dir=OUT_DIR_DEFAULT, write_sequences=True):
-    """Generate all SQL files with explicit IDs in out_dir. Returns dict of file paths."""
+    With dsn the rows are streamed into that PostgreSQL database with COPY (see
+    db_loader.py) instead of being written to table files; init_schema first runs
+    personnel_init.sql there. Sequences are then set directly and per-table rows/sec
+    are written to load_stats.json.
+
+    backend="numpy" draws each batch's dates, timestamps, amounts and child-row values
+    as NumPy columns (vectorized.py) under the same constraints as the per-row Python
+    path.
+
+    compress ("gzip", "xz" or "bz2") compresses every table file while it is written
+    (suffix .gz/.xz/.bz2) on a background thread; the load script then decompresses
+    them on the fly (load.sh instead of load.sql for the sql format).
+
+    Run metrics go to metrics.json (see metrics.py): wall time per phase (department,
+    position, each employee table, merge, sequences, ...), rows, bytes and rows/sec per
+    table, peak RSS and RSS samples. With workers > 1 the per-table times are summed
+    over the shards and "generate" is the wall time of the parallel part. progress > 0
+    prints a progress line every that many seconds (per shard); profile dumps cProfile
+    stats of each shard's generation loop into out_dir.
+
+    state_file saves a GeneratorState (state.py) after the run: the facts and counters
+    generate_delta() needs to extend this dataset later. File runs also leave
+    employee_snapshot.zip, from which regenerate_tables() rebuilds single child tables.
+
+    performance_profile adds performance_profile.sql (FK, date and partial indexes,
+    index-friendly fn_monthly_pay / fn_department_headcount) after the load: copied
+    to out_dir and run at the end of load.sql, or executed directly with dsn.
+
+    rollups adds the summary tables of rollups.sql (monthly payroll per employee and
+    department, active headcount per department; kept current by triggers). Their rows
+    are aggregated while payroll is generated and written as table files that load.sql
+    loads right after running rollups.sql, so no full scan is needed. With dsn,
+    rollups.sql is run after the load and rollup_rebuild() fills the tables with one
+    scan of payroll and employee."""
     os.makedirs(out_dir, exist_ok=True)
     paths = {}
+    metrics = Metrics()
+    if seed is not None:
+        random.seed(seed)
+
+    loader = None
+    if dsn:
+        metrics.start("connect")
+        loader = DbLoader(dsn, pool_size=1)
+        if init_schema:
+            loader.execute_file(INIT_SCHEMA_FILE)
 
     # Department
-    dept_file = os.path.join(out_dir, "department.sql")
-    cols_dept = ["department_id", "name", "description", "created_at"]
-    dept_rows = []
-    for idx, (name, desc) in enumerate(DEPARTMENTS, start=1):
-        dept_rows.append([str(idx), sql_escape(name), sql_escape(desc), sql_escape(rand_datetime_minute())])
-    with open(dept_file, "w", encoding="utf-8") as f:
-        f.write("-- departments\nBEGIN;\n\n")
-    write_inserts_chunked(dept_file, "department", cols_dept, dept_rows)
-    with open(dept_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['department'] = dept_file
+    metrics.start("department")
+    writer_cls = WRITERS[fmt]
+    ext = writer_cls.ext + file_suffix(compress)
+    dept_rows = [[idx, name, desc, rand_datetime_minute()] for idx, (name, desc) in enumerate(DEPARTMENTS, start=1)]
+    dept_file = os.path.join(out_dir, "department" + ext)
+    if loader:
+        loader.copy_rows("department", COLS_DEPT, dept_rows)
+    else:
+        dept_writer = writer_cls(dept_file, "department", COLS_DEPT, "departments", chunk=CHUNK_SIZE, compress=compress)
+        dept_writer.write_rows(dept_rows)
+        dept_writer.close()
+        metrics.track("department", dept_writer)
+        paths['department'] = dept_file
 
     # Position
-    pos_file = os.path.join(out_dir, "position.sql")
-    cols_pos = ["position_id", "title", "department_id", "description", "created_at"]
-    pos_rows = []
-    for idx, (title, dept_idx, desc) in enumerate(POSITIONS, start=1):
-        pos_rows.append([str(idx), sql_escape(title), str(dept_idx), sql_escape(desc), sql_escape(rand_datetime_minute())])
-    with open(pos_file, "w", encoding="utf-8") as f:
-        f.write("-- positions\nBEGIN;\n\n")
-    write_inserts_chunked(pos_file, "position", cols_pos, pos_rows)
-    with open(pos_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['position'] = pos_file
-
-    # Employees (we will keep hires in memory for payroll)
-    emp_file = os.path.join(out_dir, "employee.sql")
-    # include address after phone
-    cols_emp = ["employee_id","first_name","last_name","email","phone","address","birth_date","hire_date","termination_date","active","department_id","position_id","manager_id","emergency_contacts","notes","created_at"]
-    eids = generate_unique_eids(num_employees)
-    used_emails = set()
-    employees = []  # list of dicts for later use
-    emp_rows = []
-    for idx in range(num_employees):
-        eid = eids[idx]
-        first = random.choice(FIRST_NAMES)
-        last = random.choice(LAST_NAMES)
-        base = f"{first.lower()}.{last.lower()}"
-        domain = random.choice(EMAIL_DOMAINS)
-        email = f"{base}@{domain}"
-        suffix = 1
-        while email in used_emails:
-            email = f"{base}{suffix}@{domain}"
-            suffix += 1
-        used_emails.add(email)
-        phone = f"+1{random.randint(2000000000, 9999999999)}"[:15]
-        address = generate_address()
-        hire_iso = rand_date()
-        hire_date_obj = datetime.date.fromisoformat(hire_iso)
-        birth_latest = hire_date_obj - datetime.timedelta(days=18*365 + 4)    # approx adjust for leap years
-        birth_earliest = hire_date_obj - datetime.timedelta(days=65*365 + 16)
-        if birth_earliest > birth_latest:
-            birth_date_obj = hire_date_obj - datetime.timedelta(days=30*365)
+    metrics.start("position")
+    pos_rows = [[idx, title, dept_idx, desc, rand_datetime_minute()] for idx, (title, dept_idx, desc) in enumerate(POSITIONS, start=1)]
+    pos_file = os.path.join(out_dir, "position" + ext)
+    if loader:
+        loader.copy_rows("position", COLS_POS, pos_rows)
+    else:
+        pos_writer = writer_cls(pos_file, "position", COLS_POS, "positions", chunk=CHUNK_SIZE, compress=compress)
+        pos_writer.write_rows(pos_rows)
+        pos_writer.close()
+        metrics.track("position", pos_writer)
+        paths['position'] = pos_file
+
+    # Employees and their child tables, one shard (and within it one batch) at a time.
+    # Files are still loaded department -> position -> employee -> children.
+    metrics.start("generate")
+    workers = max(1, min(workers, num_employees)) if num_employees else 1
+    id_keys = EmployeeIdSpace().keys
+    if org_tree is None:
+        org_tree = OrgTreeBuilder()
+    lic_total = min(num_employees, max(10, int(num_employees * LICENSE_RATIO)))
+    base_seed = seed if seed is not None else random.randrange(2**63)
+    shard_tables = dict(EMPLOYEE_TABLES)
+    if rollups and not dsn:
+        shard_tables[SHARD_ROLLUP] = ROLLUP_TABLES[SHARD_ROLLUP]
+    specs = []
+    for shard in range(workers):
+        start = num_employees * shard // workers
+        end = num_employees * (shard + 1) // workers
+        if workers == 1:
+            shard_paths = {key: os.path.join(out_dir, key + ext) for key in shard_tables}
         else:
-            span = (birth_latest - birth_earliest).days
-            birth_date_obj = birth_earliest + datetime.timedelta(days=random.randint(0, max(0, span)))
-        birth_iso = birth_date_obj.isoformat()
-        termination_iso = None
-        active = True
-        if random.random() < 0.02:
-            # small chance of termination; ensure after hire
-            term_iso = rand_date_between(hire_iso, DATE_MAX.isoformat())
-            if not hire_before_termination(hire_iso, term_iso):
-                # fallback to hire + 30 days
-                term_iso = (hire_date_obj + datetime.timedelta(days=30)).isoformat()
-            termination_iso = term_iso
-            active = False
-        dept_id = random.randint(1, len(DEPARTMENTS))
-        valid_positions = [i+1 for i,(title,dept_idx,desc) in enumerate(POSITIONS) if dept_idx == dept_id]
-        pos_id = random.choice(valid_positions) if valid_positions else random.randint(1, len(POSITIONS))
-        manager = None if idx < 100 or random.random() < 0.05 else random.choice(eids[:idx])
-        ec = {"contacts":[{"name": random.choice(FIRST_NAMES) + " " + random.choice(LAST_NAMES), "phone": f"+1{random.randint(2000000000, 9999999999)}"}]}
-        notes = random.choice(NOTES) if random.random() < 0.35 else ""
-        created_at = rand_datetime_minute()
-        # enforce birth constraint; fallback to 30 years before hire if violated
-        if not birth_within_age_range(hire_iso, birth_iso):
-            birth_iso = (hire_date_obj - datetime.timedelta(days=30*365)).isoformat()
-        emp = {
-            "employee_id": eid,
-            "first": first,
-            "last": last,
-            "email": email,
-            "phone": phone,
-            "address": address,
-            "birth": birth_iso,
-            "hire": hire_iso,
-            "termination": termination_iso,
-            "active": active,
-            "department_id": dept_id,
-            "position_id": pos_id,
-            "manager": manager,
-            "emergency_contacts": ec,
-            "notes": notes,
-            "created_at": created_at
-        }
-        employees.append(emp)
-        emp_row = [
-            str(eid), sql_escape(first), sql_escape(last), sql_escape(email), sql_escape(phone), sql_escape(address),
-            sql_escape(birth_iso), sql_escape(hire_iso),
-            sql_escape(termination_iso) if termination_iso else "NULL",
-            "true" if active else "false", str(dept_id), str(pos_id),
-            str(manager) if manager else "NULL",
-            sql_escape(json.dumps(ec)), sql_escape(notes), sql_escape(created_at)
-        ]
-        emp_rows.append(emp_row)
-
-    with open(emp_file, "w", encoding="utf-8") as f:
-        f.write("-- employees\nBEGIN;\n\n")
-    write_inserts_chunked(emp_file, "employee", cols_emp, emp_rows)
-    with open(emp_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['employee'] = emp_file
-
-    # Payroll: ensure every employee has at least one payroll row; pay_date >= hire_date
-    payroll_file = os.path.join(out_dir, "payroll.sql")
-    cols_pay = ["payroll_id","employee_id","amount","pay_date","notes","created_at"]
-    pay_rows = []
-    pid = 1
-    for emp in employees:
-        num = random.randint(*PAYROLL_PER_EMP_RANGE)
-        for _ in range(num):
-            pay_date = rand_date_between(emp["hire"], DATE_MAX.isoformat())
-            if not hire_before_pay(emp["hire"], pay_date):
-                pay_date = emp["hire"]
-            amt = round(random.uniform(800, 15000), 2)
-            notes = random.choice(NOTES)
-            created_at = rand_datetime_minute()
-            pay_rows.append([str(pid), str(emp["employee_id"]), f"{amt:.2f}", sql_escape(pay_date), sql_escape(notes), sql_escape(created_at)])
-            pid += 1
-    with open(payroll_file, "w", encoding="utf-8") as f:
-        f.write("-- payroll\nBEGIN;\n\n")
-    write_inserts_chunked(payroll_file, "payroll", cols_pay, pay_rows)
-    with open(payroll_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['payroll'] = payroll_file
-
-    # Employee licenses (subset of employees)
-    lic_file = os.path.join(out_dir, "employee_license.sql")
-    cols_lic = ["license_id","employee_id","license_name","issued_date","expiry_date","notes","created_at"]
-    lic_rows = []
-    lid = 1
-    num_license_emps = max(10, int(num_employees * LICENSE_RATIO))
-    sample_emps = random.sample(employees, num_license_emps)
-    for emp in sample_emps:
-        for _ in range(random.randint(*LICENSE_PER_EMP_RANGE)):
-            lname = random.choice(LICENSE_NAMES)
-            issued = rand_date_between(emp["hire"], DATE_MAX.isoformat())
-            issued_dt = datetime.date.fromisoformat(issued)
-            expiry_dt = issued_dt + datetime.timedelta(days=random.randint(365, 365*5))
-            if expiry_dt > DATE_MAX:
-                expiry_dt = DATE_MAX
-            notes = random.choice(NOTES)
-            created_at = rand_datetime_minute()
-            lic_rows.append([str(lid), str(emp["employee_id"]), sql_escape(lname), sql_escape(issued), sql_escape(expiry_dt.isoformat()), sql_escape(notes), sql_escape(created_at)])
-            lid += 1
-    with open(lic_file, "w", encoding="utf-8") as f:
-        f.write("-- employee_license\nBEGIN;\n\n")
-    write_inserts_chunked(lic_file, "employee_license", cols_lic, lic_rows)
-    with open(lic_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['employee_license'] = lic_file
-
-    # Oncall shifts (day_of_week 1..7, start_time/end_time HH:MM, no contact_method)
-    shift_file = os.path.join(out_dir, "oncall_shift.sql")
-    cols_shift = ["shift_id","employee_id","day_of_week","start_time","end_time","escalation_order","created_at"]
-    shift_rows = []
-    sid = 1
-    for emp in employees:
-        num_shifts = random.randint(ONCALL_SHIFTS_MIN, ONCALL_SHIFTS_MAX)
-        for _ in range(num_shifts):
-            dow = random.randint(1, 7)  # 1=Mon .. 7=Sun
-            start = rand_time(6, 20)
-            sh_h = int(start.split(":")[0]); sh_m = int(start.split(":")[1])
-            duration = random.randint(2, 8)
-            end_h = min(23, sh_h + duration)
-            end = f"{end_h:02d}:{sh_m:02d}"
-            esc = random.randint(1, 5)
-            created_at = rand_datetime_minute()
-            shift_rows.append([str(sid), str(emp["employee_id"]), str(dow), sql_escape(start), sql_escape(end), str(esc), sql_escape(created_at)])
-            sid += 1
-    with open(shift_file, "w", encoding="utf-8") as f:
-        f.write("-- oncall_shift\nBEGIN;\n\n")
-    write_inserts_chunked(shift_file, "oncall_shift", cols_shift, shift_rows)
-    with open(shift_file, "a", encoding="utf-8") as f:
-        f.write("COMMIT;\n")
-    paths['oncall_shift'] = shift_file
-
-    # Optionally write setval statements for sequences if the user used SERIAL DDL.
+            shard_paths = {key: os.path.join(out_dir, f"{key}.part-{shard:03d}{ext}") for key in shard_tables}
+        specs.append({
+            "shard": shard, "workers": workers, "start": start, "end": end,
+            # proportional share of the license holders, summing exactly to lic_total
+            "licenses": lic_total * end // num_employees - lic_total * start // num_employees if num_employees else 0,
+            "paths": shard_paths, "wrap": workers == 1 or keep_parts,
+            "seed": None if workers == 1 else f"{base_seed}:{shard}",
+            "id_keys": id_keys, "org_config": org_tree.config(),
+            "stream": stream, "batch_size": batch_size, "format": fmt, "dsn": dsn, "backend": backend,
+            "compress": compress, "progress": progress, "profile_dir": out_dir if profile else None,
+            "state": bool(state_file), "base_seed": base_seed,
+            "snapshot": None if dsn else os.path.join(out_dir, SNAPSHOT_PART % shard),
+            "rollups": rollups and not dsn,
+        })
+    if workers == 1:
+        results = [generate_shard(specs[0], org_tree)]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(generate_shard, specs)
+    if profile:
+        paths['profiles'] = [os.path.join(out_dir, "profile-shard-%03d.pstats" % k) for k in range(workers)]
+
+    if not loader:
+        metrics.start("merge")
+        for key, (table, cols, label) in shard_tables.items():
+            if workers == 1:
+                paths[key] = specs[0]["paths"][key]
+            elif keep_parts:
+                paths[key] = [spec["paths"][key] for spec in specs]
+            else:
+                paths[key] = os.path.join(out_dir, key + ext)
+                merge_parts(paths[key], [spec["paths"][key] for spec in specs],
+                            writer_cls.file_header(table, cols, label), writer_cls.file_footer(), compress)
+    table_counts = {key: sum(res[0][key] for res in results) for key in EMPLOYEE_TABLES}
+
+    if state_file:
+        save_run_state(state_file, [res[4] for res in results], id_keys, num_employees)
+        paths['state'] = state_file
+    if not loader:
+        metrics.start("snapshot")
+        paths['snapshot'] = save_snapshot(os.path.join(out_dir, SNAPSHOT_FILE), [spec["snapshot"] for spec in specs],
+                                          [res[5] for res in results],
+                                          {"seed": base_seed, "format": fmt, "compress": compress, "backend": backend,
+                                           "keep_parts": keep_parts, "rollups": rollups})
+
+    # Org-chart shape, for sizing manager-chain queries against the generated data
+    metrics.start("org_stats")
+    org_stats_file = os.path.join(out_dir, "org_tree_stats.json")
+    with open(org_stats_file, "w", encoding="utf-8") as f:
+        json.dump(combine_stats([res[1] for res in results]), f, indent=2)
+    paths['org_tree_stats'] = org_stats_file
+
+    if loader:
+        # Sequences are set directly; per-table load rates go to load_stats.json
+        metrics.start("sequences")
+        if write_sequences:
+            loader.set_sequences(SEQUENCES)
+        if performance_profile:
+            metrics.start("performance_profile")
+            loader.execute_file(PERFORMANCE_PROFILE_FILE)
+        if rollups:
+            metrics.start("rollups")
+            loader.execute_file(ROLLUPS_FILE)
+            loader.execute("SELECT rollup_rebuild();")
+        metrics.start("load")
+        load_stats = combine_load_stats([loader.close()] + [res[2] for res in results])
+        load_stats_file = os.path.join(out_dir, "load_stats.json")
+        with open(load_stats_file, "w", encoding="utf-8") as f:
+            json.dump(load_stats, f, indent=2)
+        paths['load_stats'] = load_stats_file
+    else:
+        # Optionally write setval statements for sequences if the user used SERIAL DDL.
+        metrics.start("sequences")
+        seq_file = None
+        if write_sequences:
+            seq_file = paths['sequences'] = write_sequences_file(out_dir)
+
+        profile_file = None
+        if performance_profile:
+            profile_file = paths['performance_profile'] = os.path.join(out_dir, os.path.basename(PERFORMANCE_PROFILE_FILE))
+            shutil.copyfile(PERFORMANCE_PROFILE_FILE, profile_file)
+
+        # Rollup tables: payroll_monthly_employee came from the shards, the small ones from their merged totals
+        rollup_load = None
+        if rollups:
+            shard_rollups = Rollups()
+            for res in results:
+                shard_rollups.merge(res[6])
+            paths['payroll_monthly_department'] = write_rollup_table(
+                out_dir, "payroll_monthly_department", shard_rollups.department_rows(), writer_cls, compress, metrics).path
+            paths['department_headcount'] = write_rollup_table(
+                out_dir, "department_headcount", shard_rollups.headcount_rows(), writer_cls, compress, metrics).path
+            rollups_file = paths['rollups'] = os.path.join(out_dir, os.path.basename(ROLLUPS_FILE))
+            shutil.copyfile(ROLLUPS_FILE, rollups_file)
+            rollup_load = (rollups_file, [(table, cols, paths[key] if isinstance(paths[key], list) else [paths[key]])
+                                          for key, (table, cols, label) in ROLLUP_TABLES.items()])
+
+        # psql script (load.sh for compressed INSERT files) loading everything above in FK order
+        metrics.start("load_script")
+        load_tables = [("department", COLS_DEPT, [dept_file]), ("position", COLS_POS, [pos_file])]
+        for key, (table, cols, label) in EMPLOYEE_TABLES.items():
+            load_tables.append((table, cols, paths[key] if isinstance(paths[key], list) else [paths[key]]))
+        paths['load_script'] = write_load_script(out_dir, load_tables, fmt, seq_file, compress, profile_file,
+                                                 rollup_load)
+    metrics.stop()
+
+    # return produced paths and counts summary
+    counts = {'departments': len(dept_rows), 'positions': len(pos_rows), 'employees': table_counts['employee'],
+              'payroll': table_counts['payroll'], 'licenses': table_counts['employee_license'], 'shifts': table_counts['oncall_shift']}
+
+    # Phase timings, per-table throughput and memory, for benchmark.py and regression tracking
+    metrics_file = os.path.join(out_dir, "metrics.json")
+    with open(metrics_file, "w", encoding="utf-8") as f:
+        json.dump(dict(combine_metrics(metrics.to_dict(), [res[3] for res in results]), workers=workers), f, indent=2)
+    paths['metrics'] = metrics_file
+    return paths, counts
+
+# --------------------------- Delta generation ---------------------------
+
+def rand_datetime_on(day_iso):
+    """Random minute-precision timestamp on the given day."""
+    return "%s %02d:%02d" % (day_iso, random.randint(0, 23), random.randint(0, 59))
+
+def generate_delta(state_file, out_dir, fmt="sql", as_of=None, new_hires=DELTA_NEW_HIRES,
+                   terminations=DELTA_TERMINATIONS, renewals=DELTA_RENEWALS, write_sequences=True):
+    """Write one day's changes to a dataset saved with generate_files(state_file=...)
+    and update the state file. Returns (paths, counts).
+
+    The delta, dated as_of (default today), holds:
+    - new_hires new employees hired on as_of, with on-call shifts and (LICENSE_RATIO of
+      them) licenses; IDs continue the saved permutation and ID counters, emails and
+      phones stay unique against everything generated before, managers come from the
+      saved org trees;
+    - terminations of randomly chosen active employees (termination_date after hire);
+    - a payroll cycle: one payroll row per active employee, paid on as_of (or the hire
+      date if that is later);
+    - renewals of licenses of active employees expiring within RENEWAL_WINDOW_DAYS.
+    Inserts go straight into the tables; terminations and renewals go into temporary
+    staging tables applied with UPDATE ... FROM, all in one transaction (load.sql)."""
+    os.makedirs(out_dir, exist_ok=True)
+    state = GeneratorState.load(state_file)
+    info = state.info
+    version, internal, gauss = info["rng_state"]
+    random.setstate((version, tuple(internal), gauss))
+    as_of = as_of or datetime.date.today().isoformat()
+    as_of_day = day(as_of)
+
+    id_space = EmployeeIdSpace(keys=info["id_keys"])
+    org_tree = OrgTreeBuilder.from_state(info["org_tree"])
+    unique = UniquenessEngine()
+    unique.mark_suffixed("email", resume=info["email_next"])
+
+    writer_cls = WRITERS[fmt]
+    cache = literal_cache(writer_cls, literal_strings())
+    # load.sql runs everything in one transaction, so INSERT files get no BEGIN/COMMIT;
+    # CSV files keep their header line like every other CSV file
+    wrap = fmt == "csv"
+    paths, writers = {}, {}
+    for key, (table, cols, label) in EMPLOYEE_TABLES.items():
+        paths[key] = os.path.join(out_dir, key + writer_cls.ext)
+        writers[key] = writer_cls(paths[key], table, cols, label, wrap=wrap, chunk=CHUNK_SIZE, cache=cache)
+    for key, (cols, ddl, apply_sql) in DELTA_UPDATES.items():
+        paths[key] = os.path.join(out_dir, key + writer_cls.ext)
+        writers[key] = writer_cls(paths[key], key, cols, key, wrap=wrap, chunk=CHUNK_SIZE, cache=cache)
+    ids = info["next_ids"]
+    pid, lid, sid = ids["payroll"], ids["employee_license"], ids["oncall_shift"]
+
+    # New hires (terminations below only pick employees from earlier runs)
+    first_new = info["next_index"]
+    store = EmployeeStore(DATE_MIN)
+    rows = []
+    for idx in range(first_new, first_new + new_hires):
+        hire, birth, _, _ = employee_dates(as_of, termination_rate=0)
+        emp = make_employee(idx, id_space, unique, org_tree, dates=(hire, birth, None, rand_datetime_on(as_of)))
+        rows.append(employee_row(emp))
+        store.add(emp)
+        state.add_employee(emp["employee_id"], hire, None, emp["department_id"])
+    writers["employee"].write_rows(rows)
+    for offset, eid in enumerate(store.employee_id):
+        if random.random() < LICENSE_RATIO:
+            rows = license_rows_for(eid, store.hire(offset), lid)
+            lid += len(rows)
+            writers["employee_license"].write_rows(rows)
+            record_licenses(state, rows, {eid: first_new + offset})
+        rows = shift_rows_for(eid, sid)
+        sid += len(rows)
+        writers["oncall_shift"].write_rows(rows)
+
+    # Terminations of active employees from earlier runs
+    term_days = state.termination_day
+    active = [idx for idx in range(first_new) if not term_days[idx]]
+    terminated = random.sample(active, min(terminations, len(active)))
+    rows = []
+    for idx in sorted(terminated):
+        term_day = max(as_of_day, state.hire_day[idx] + 1)  # hire_date < termination_date
+        term_days[idx] = term_day
+        rows.append([state.employee_id[idx], iso(term_day)])
+    writers["employee_termination"].write_rows(rows)
+
+    # Payroll cycle for every active employee
+    pay_iso = {}
+    rows = []
+    for idx in range(len(state)):
+        if term_days[idx]:
+            continue
+        pay_day = max(as_of_day, state.hire_day[idx])
+        pay_date = pay_iso.get(pay_day) or pay_iso.setdefault(pay_day, iso(pay_day))
+        rows.append([pid, state.employee_id[idx], round(random.uniform(*PAYROLL_AMOUNT_RANGE), 2), pay_date,
+                     random.choice(NOTES), rand_datetime_on(as_of)])
+        pid += 1
+        if len(rows) >= STREAM_BATCH_SIZE:
+            writers["payroll"].write_rows(rows)
+            rows = []
+    writers["payroll"].write_rows(rows)
+
+    # License renewals: issued on as_of (not before hire), valid another 1-5 years
+    due = [i for i in range(len(state.license_id))
+           if state.license_expiry[i] <= as_of_day + RENEWAL_WINDOW_DAYS
+           and not term_days[state.license_employee[i]]]
+    rows = []
+    for i in sorted(random.sample(due, min(renewals, len(due)))):
+        issued_day = max(as_of_day, state.hire_day[state.license_employee[i]])
+        expiry_day = issued_day + random.randint(365, 365*5)
+        state.license_expiry[i] = expiry_day
+        rows.append([state.license_id[i], iso(issued_day), iso(expiry_day)])
+    writers["license_renewal"].write_rows(rows)
+
+    for writer in writers.values():
+        writer.close()
+    counts = {key: w.count for key, w in writers.items()}
+
     seq_file = None
     if write_sequences:
-        seq_file = os.path.join(out_dir, "set_sequences.sql")
-        with open(seq_file, "w", encoding="utf-8") as f:
-            f.write("-- Set sequences to the current max values (use if your DDL used SERIAL for ids)\n\n")
-            # helper to write a setval for a sequence name and table/column
-            def write_seq(seq_name, table, col):
-                f.write("SELECT setval('%s', (SELECT COALESCE(MAX(%s),0) FROM %s), true);\n" % (seq_name, col, table))
-            write_seq('department_department_id_seq', 'department', 'department_id')
-            write_seq('position_position_id_seq', 'position', 'position_id')
-            write_seq('employee_employee_id_seq', 'employee', 'employee_id')
-            write_seq('payroll_payroll_id_seq', 'payroll', 'payroll_id')
-            write_seq('employee_license_license_id_seq', 'employee_license', 'license_id')
-            write_seq('oncall_shift_shift_id_seq', 'oncall_shift', 'shift_id')
-        paths['sequences'] = seq_file
+        seq_file = paths['sequences'] = write_sequences_file(out_dir)
+    inserts = [(table, cols, paths[key]) for key, (table, cols, label) in EMPLOYEE_TABLES.items()]
+    updates = [(key, cols, paths[key], ddl, apply_sql) for key, (cols, ddl, apply_sql) in DELTA_UPDATES.items()]
+    paths['load_script'] = write_delta_load_script(out_dir, inserts, updates, fmt, as_of, seq_file)
 
-    # return produced paths and counts summary
-    counts = {'departments': len(dept_rows), 'positions': len(pos_rows), 'employees': len(emp_rows),
-              'payroll': len(pay_rows), 'licenses': len(lic_rows), 'shifts': len(shift_rows)}
+    info["next_index"] = first_new + new_hires
+    info["next_ids"] = {"payroll": pid, "employee_license": lid, "oncall_shift": sid}
+    info["email_next"] = unique.suffix_values("email")
+    info["org_tree"] = org_tree.state()
+    info["rng_state"] = random.getstate()
+    info["as_of"] = as_of
+    state.save(state_file)
+    paths['state'] = state_file
     return paths, counts
 
 # --------------------------- CLI entrypoint ---------------------------
@@ -460,17 +1295,121 @@ def parse_args():
     p.add_argument('--employees', '-n', type=int, default=DEFAULT_NUM_EMPLOYEES, help='Number of employees to generate (default %(default)s).')
     p.add_argument('--outdir', '-o', default=OUT_DIR_DEFAULT, help='Output directory for SQL files.')
     p.add_argument('--no-sequences', action='store_true', help='Do not write the set_sequences.sql file.')
-    return p.parse_args()
+    p.add_argument('--stream', action='store_true', help='Generate and write employees in batches with bounded memory.')
+    p.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE, help='Employees per batch with --stream (default %(default)s).')
+    p.add_argument('--span', type=int, default=DEFAULT_SPAN, help='Target direct reports per manager (default %(default)s).')
+    p.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH, help='Org levels per hierarchy, 0 = unbounded (default %(default)s).')
+    p.add_argument('--org-roots', type=int, default=DEFAULT_ROOTS, help='Top-level employees (no manager) per hierarchy (default %(default)s).')
+    p.add_argument('--flat-org', action='store_true', help='One company-wide hierarchy instead of one per department.')
+    p.add_argument('--workers', '-j', type=int, default=1, help='Generate employees in N parallel shard processes (default %(default)s).')
+    p.add_argument('--seed', type=int, default=None, help='Random seed; the same seed and --workers give identical output.')
+    p.add_argument('--keep-parts', action='store_true', help='With --workers, keep per-shard part-files instead of merging them.')
+    p.add_argument('--dsn', default=None, help='Load straight into this PostgreSQL database (COPY FROM STDIN) instead of writing table files.')
+    p.add_argument('--init-schema', action='store_true', help='With --dsn, run personnel_init.sql (drops and recreates the tables) first.')
+    p.add_argument('--backend', choices=BACKENDS, default='python', help='Value generation backend; numpy draws whole columns per batch (default %(default)s).')
+    p.add_argument('--format', dest='fmt', choices=FORMATS, default='sql', help='Table file format: INSERT statements, COPY text or CSV (default %(default)s).')
+    p.add_argument('--progress', type=float, default=PROGRESS_INTERVAL, help='Seconds between live progress lines, 0 = off (default %(default)s).')
+    p.add_argument('--profile', action='store_true', help='Dump cProfile stats of each shard to profile-shard-NNN.pstats/.txt in the output directory.')
+    p.add_argument('--compress', choices=COMPRESSIONS, default=None, help='Compress table files while writing them (stdlib codecs, background thread).')
+    p.add_argument('--performance-profile', action='store_true', help='Create FK/date/partial indexes and index-friendly functions after the load (performance_profile.sql).')
+    p.add_argument('--rollups', action='store_true', help='Create the trigger-maintained payroll/headcount summary tables (rollups.sql) and load their pre-computed rows.')
+    p.add_argument('--state', default=None, help='Generator state file: written after a full run, read and updated by --delta.')
+    p.add_argument('--delta', action='store_true', help='Write one day of changes (hires, terminations, payroll, renewals) to the dataset saved in --state.')
+    p.add_argument('--as-of', default=None, help='With --delta, the day the changes happen (YYYY-MM-DD, default today).')
+    p.add_argument('--new-hires', type=int, default=DELTA_NEW_HIRES, help='With --delta, employees hired (default %(default)s).')
+    p.add_argument('--terminations', type=int, default=DELTA_TERMINATIONS, help='With --delta, active employees terminated (default %(default)s).')
+    p.add_argument('--renewals', type=int, default=DELTA_RENEWALS, help='With --delta, expiring licenses renewed (default %(default)s).')
+    p.add_argument('--tables', default=None, help='Comma-separated child tables (%s) to regenerate in --outdir from its employee snapshot; nothing else is rewritten.' % ",".join(CHILD_IDS_PER_EMP))
+    args = p.parse_args()
+    if args.span < 1:
+        p.error('--span must be at least 1')
+    if args.max_depth < 0:
+        p.error('--max-depth must be 0 (unbounded) or more')
+    if args.org_roots < 1:
+        p.error('--org-roots must be at least 1')
+    if args.compress and args.dsn:
+        p.error('--compress applies to table files and cannot be combined with --dsn')
+    if args.tables is not None:
+        args.tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+        unknown = [t for t in args.tables if t not in CHILD_IDS_PER_EMP]
+        if unknown or not args.tables:
+            p.error('--tables takes a comma-separated subset of %s' % ",".join(CHILD_IDS_PER_EMP))
+        if args.delta or args.dsn:
+            p.error('--tables regenerates table files of a finished run; it cannot be combined with --delta or --dsn')
+    if args.delta:
+        if not args.state:
+            p.error('--delta needs --state (the state file written by a full run)')
+        if args.dsn or args.compress:
+            p.error('--delta writes plain table files; it cannot be combined with --dsn or --compress')
+        if args.as_of:
+            try:
+                datetime.date.fromisoformat(args.as_of)
+            except ValueError:
+                p.error('--as-of must be a YYYY-MM-DD date')
+    return args
+
+def regenerate_main(args):
+    print('Regenerating %s in %s from %s' % (", ".join(args.tables), args.outdir, SNAPSHOT_FILE))
+    paths, counts = regenerate_tables(args.outdir, args.tables, progress=args.progress)
+    print('Files written:')
+    for k,v in paths.items():
+        print(' - %s: %s' % (k, v))
+    print('Row counts: %s' % json.dumps(counts, indent=2))
+    with open(paths['metrics'], encoding="utf-8") as f:
+        run = json.load(f)
+    print('Done in %.2fs.' % run['wall_seconds'])
+
+def delta_main(args):
+    print('Delta starting from %s, outdir=%s' % (args.state, args.outdir))
+    paths, counts = generate_delta(args.state, args.outdir, fmt=args.fmt, as_of=args.as_of, new_hires=args.new_hires,
+                                   terminations=args.terminations, renewals=args.renewals,
+                                   write_sequences=(not args.no_sequences))
+    print('Files written:')
+    for k,v in paths.items():
+        print(' - %s: %s' % (k, v))
+    print('Row counts: %s' % json.dumps(counts, indent=2))
+    print('Done. Apply to PostgreSQL with: cd %s && psql -v ON_ERROR_STOP=1 -d <database> -f load.sql' % args.outdir)
 
 def main():
     args = parse_args()
+    if args.tables:
+        return regenerate_main(args)
+    if args.delta:
+        return delta_main(args)
     print('Generator starting with employees=%d, outdir=%s' % (args.employees, args.outdir))
-    paths, counts = generate_files(num_employees=args.employees, out_dir=args.outdir, write_sequences=(not args.no_sequences))
+    org_tree = OrgTreeBuilder(span=args.span, max_depth=(args.max_depth or None),
+                              per_department=(not args.flat_org), roots=args.org_roots)
+    paths, counts = generate_files(num_employees=args.employees, out_dir=args.outdir, write_sequences=(not args.no_sequences),
+                                   stream=args.stream, batch_size=args.batch_size, org_tree=org_tree,
+                                   workers=args.workers, seed=args.seed,
+                                   keep_parts=args.keep_parts, fmt=args.fmt, dsn=args.dsn, init_schema=args.init_schema,
+                                   backend=args.backend, compress=args.compress, progress=args.progress,
+                                   profile=args.profile, state_file=args.state,
+                                   performance_profile=args.performance_profile, rollups=args.rollups)
     print('Files written:')
     for k,v in paths.items():
         print(' - %s: %s' % (k, v))
     print('Row counts: %s' % json.dumps(counts, indent=2))
-    print('Done. You can import the SQL files into PostgreSQL.')
+    with open(paths['org_tree_stats'], encoding="utf-8") as f:
+        stats = json.load(f)
+    print('Org tree: %d hierarchies, depth %d, fan-out avg %.2f / max %d' % (stats['groups'], stats['depth'], stats['fanout_avg'], stats['fanout_max']))
+    with open(paths['metrics'], encoding="utf-8") as f:
+        run = json.load(f)
+    print('Run: %.2fs wall, peak RSS %s, %.1f MiB written' % (run['wall_seconds'], '%.1f MiB' % (run['peak_rss_bytes'] / 2**20) if run['peak_rss_bytes'] else 'n/a', run['bytes_written'] / 2**20))
+    for phase, sec in sorted(run['phases'].items(), key=lambda kv: -kv[1]):
+        table = run['tables'].get(phase)
+        print(' - %-16s %8.2fs wall %8.2fs CPU%s' % (phase, sec, run['phase_cpu_seconds'][phase],
+                                                    '  %s rows/s' % table['rows_per_sec'] if table else ''))
+    if args.dsn:
+        with open(paths['load_stats'], encoding="utf-8") as f:
+            load_stats = json.load(f)
+        for table, st in load_stats['tables'].items():
+            print(' - %-16s %10d rows  %8.2fs COPY  %s rows/s' % (table, st['rows'], st['copy_seconds'], st['rows_per_sec']))
+        print('Done. Loaded into PostgreSQL in %.2fs.' % load_stats['wall_seconds'])
+    elif paths['load_script'].endswith('.sh'):
+        print('Done. Load into PostgreSQL with: cd %s && sh load.sh -d <database>' % args.outdir)
+    else:
+        print('Done. Load into PostgreSQL with: cd %s && psql -v ON_ERROR_STOP=1 -d <database> -f load.sql' % args.outdir)
 
 if __name__ == '__main__':
     main()
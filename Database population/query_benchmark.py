@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# query_benchmark.py
+# Query workload benchmark: latency of the reporting queries, views and functions of
+# this project on generated datasets of growing size, checked against stored baselines.
+#
+# The workload is read from the project's own SQL files, so it follows them as they
+# change:
+# - Queries.sql, "Stage 3 query" and stage_3_new_query: every statement, named
+#   <source>.qNN in file order. psql variables (\prompt ... dept, :'dept', :"x", :x)
+#   are substituted like psql does, from DEFAULT_VARS / --var name=value. UPDATE and
+#   DELETE statements run inside a transaction that is rolled back, so every run sees
+#   the same data;
+# - function: the CREATE FUNCTION statements are set up once per database; each
+#   section's check query (f1: ... SELECT fn_full_name(:emp)) is a workload query.
+#   Generated employee IDs are scattered over 9 digits, so :emp (unless given with
+#   --var) is picked from each loaded database: the lowest ID paid in September of
+#   :year, the month the f3 check asks fn_monthly_pay for. It is printed and saved to
+#   results.json per scale;
+# - view: the views are created once; each one is queried as SELECT * FROM <view>.
+#
+# For every scale factor (employee count) a fresh database is created, loaded with
+# personnel_generator.py --dsn --init-schema (COPY, no psql needed) and ANALYZEd.
+# Every query is then run --warmup times untimed and --runs times timed (client wall
+# time including fetching all rows) for p50/p95, and once more as
+# EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON); the plan is written to
+# <output>/plans/<scale>/<query>.json and its execution time and shared buffer
+# hits/reads go into the results. A query hitting --timeout is recorded as such and
+# skipped at larger scales.
+#
+# Without --dsn a throwaway cluster is created with initdb in a temporary directory,
+# started on a Unix socket only and removed afterwards (needs initdb and pg_ctl on
+# PATH). With --dsn (a server you own) one database per scale is created and dropped.
+#
+# --profile-compare measures every scale twice: as loaded, then again after
+# performance_profile.sql (indexes, sargable functions) is applied, and reports the
+# before/after p50 per query; the "after" results go to results.json as profile_runs.
+#
+# Baselines work like benchmark.py: --save-baseline stores p50/p95 per scale and
+# query; later runs with the same config exit with status 1 when a query's p95 grows
+# beyond --tolerance. The report also names, per query, the first scale at which its
+# p95 exceeds --slow-ms, i.e. which query breaks first as headcount grows.
+#
+# Usage:
+#     python3 query_benchmark.py [--scales 10000,100000,1000000] [--dsn DSN] [--runs N] [--warmup N]
+#                                [--var name=value ...] [--only PATTERN] [--timeout SECONDS]
+#                                [--baseline PATH] [--save-baseline] [--tolerance 0.5] [--slow-ms MS]
+#                                [--output DIR] [--keep-databases] [--profile-compare]
+#
+# Requires psycopg (v3) or psycopg2, and PostgreSQL server binaries when no --dsn is given.
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+
+from benchmark import load_baseline
+
+try:
+    import psycopg
+except ImportError:  # optional dependency
+    psycopg = None
+try:
+    import psycopg2
+    import psycopg2.extensions
+except ImportError:  # optional dependency
+    psycopg2 = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+GENERATOR = os.path.join(SCRIPT_DIR, "personnel_generator.py")
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, "query_baseline.json")
+DEFAULT_OUTPUT = os.path.join(os.getcwd(), "query_bench_results")
+RUNS = 10
+WARMUP = 2
+TOLERANCE = 0.5        # a query's p95 may be this much slower than its baseline
+SLOW_MS = 1000.0       # p95 above this counts as "broken" at that scale
+TIMEOUT = 300          # seconds per statement
+BENCH_SEED = 20205
+DB_PREFIX = "personnel_qbench_"
+
+# (name, file) of plain workload files: every statement is a query
+QUERY_SOURCES = [
+    ("queries", os.path.join(PROJECT_DIR, "Queries.sql")),
+    ("stage3", os.path.join(PROJECT_DIR, "Stage 3 query")),
+    ("stage3_fn", os.path.join(PROJECT_DIR, "stage_3_new_query")),
+]
+PROFILE_FILE = os.path.join(SCRIPT_DIR, "performance_profile.sql")
+FUNCTION_FILE = os.path.join(PROJECT_DIR, "function")
+VIEW_FILE = os.path.join(PROJECT_DIR, "view")
+
+# Values for the psql variables the workload prompts for (\prompt); --var overrides
+DEFAULT_VARS = {
+    "dept": "Finance",
+    "start": "2025-01-01",
+    "end": "2025-12-31",
+    "n": "10",
+    "days_ahead": "60",
+    "year": "2025",
+    "dow": "3",
+    "max": "999999999",
+}
+
+EMPLOYEE_PICK_SQL = """
+SELECT COALESCE(
+  (SELECT MIN(employee_id) FROM payroll
+   WHERE pay_date >= make_date(%(year)s, 9, 1) AND pay_date < make_date(%(year)s, 10, 1)),
+  (SELECT MIN(employee_id) FROM employee))
+"""
+
+# --------------------------- Workload ---------------------------
+
+_LABEL = re.compile(r"^\s*([A-Za-z]\d+):\s*$")
+
+def split_sql(text):
+    """Split a psql script into (statement, section label) pairs. Knows quotes, double
+    quotes, -- and /* */ comments and $tag$ bodies; psql meta-command lines (\\prompt,
+    ...) are dropped and bare 'f3:' / 'v2:' lines start a new section label."""
+    statements, buf, label = [], [], None
+    i, n = 0, len(text)
+    at_line_start = True
+    while i < n:
+        if at_line_start:
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+            line = text[i:end]
+            if not "".join(buf).strip():
+                if line.lstrip().startswith("\\"):
+                    i = end + 1
+                    continue
+                m = _LABEL.match(line)
+                if m:
+                    label = m.group(1)
+                    i = end + 1
+                    continue
+        c = text[i]
+        at_line_start = c == "\n"
+        if c in "'\"":
+            j = i + 1
+            while j < n:
+                if text[j] == c:
+                    if j + 1 < n and text[j + 1] == c:  # doubled quote
+                        j += 2
+                        continue
+                    break
+                j += 1
+            buf.append(text[i:j + 1])
+            i = j + 1
+        elif text.startswith("--", i):
+            j = text.find("\n", i)
+            j = n if j < 0 else j
+            i = j  # the newline itself is kept
+        elif text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+        elif c == "$" and re.match(r"\$\w*\$", text[i:]):
+            tag = re.match(r"\$\w*\$", text[i:]).group(0)
+            j = text.find(tag, i + len(tag))
+            j = n if j < 0 else j + len(tag)
+            buf.append(text[i:j])
+            i = j
+        elif c == ";":
+            stmt = "".join(buf).strip()
+            if stmt:
+                statements.append((stmt, label))
+            buf = []
+            i += 1
+        else:
+            buf.append(c)
+            i += 1
+    stmt = "".join(buf).strip()
+    if stmt:
+        statements.append((stmt, label))
+    return statements
+
+def quote_literal(value):
+    return "'%s'" % str(value).replace("'", "''")
+
+def quote_ident(value):
+    return '"%s"' % str(value).replace('"', '""')
+
+_VARIABLE = re.compile(r"""(?<![:\w]):(?:'(\w+)'|"(\w+)"|(\w+))""")
+
+def substitute(sql, variables):
+    """psql-style variable interpolation: :'v' literal, :"v" identifier, :v verbatim.
+    Casts (::int) are left alone; an unknown variable raises KeyError."""
+    def repl(m):
+        lit, ident, raw = m.groups()
+        if lit:
+            return quote_literal(variables[lit])
+        if ident:
+            return quote_ident(variables[ident])
+        return str(variables[raw])
+    return _VARIABLE.sub(repl, sql)
+
+def is_dml(sql):
+    return sql.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE")
+
+def load_workload():
+    """(setup statements, [(name, sql)]) from the project's SQL files; the queries still
+    hold their psql variables (see bind())."""
+    queries = []
+    for source, path in QUERY_SOURCES:
+        with open(path, encoding="utf-8") as f:
+            for k, (stmt, label) in enumerate(split_sql(f.read()), start=1):
+                queries.append(("%s.q%02d" % (source, k), stmt))
+    setup = []
+    with open(FUNCTION_FILE, encoding="utf-8") as f:
+        for stmt, label in split_sql(f.read()):
+            if stmt.upper().startswith(("CREATE", "DROP")):
+                setup.append(stmt)
+            else:
+                queries.append(("function.%s" % label, stmt))
+    with open(VIEW_FILE, encoding="utf-8") as f:
+        for stmt, label in split_sql(f.read()):
+            setup.append(stmt)
+            m = re.match(r"CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+(\w+)", stmt, re.I)
+            if m:
+                queries.append(("view.%s" % m.group(1), "SELECT * FROM %s" % m.group(1)))
+    return setup, queries
+
+def bind(queries, variables):
+    """queries with their psql variables filled in."""
+    return [(name, substitute(sql, variables)) for name, sql in queries]
+
+# --------------------------- Database ---------------------------
+
+def connect(dsn, autocommit=False):
+    if psycopg is not None:
+        conn = psycopg.connect(dsn)
+    elif psycopg2 is not None:
+        conn = psycopg2.connect(dsn)
+    else:
+        raise RuntimeError("query_benchmark.py needs the psycopg (or psycopg2) package: pip install psycopg")
+    conn.autocommit = autocommit
+    return conn
+
+def run_statements(dsn, statements):
+    """Run statements one by one in autocommit mode (CREATE DATABASE, VACUUM, DDL)."""
+    conn = connect(dsn, autocommit=True)
+    try:
+        cur = conn.cursor()
+        for stmt in statements:
+            cur.execute(stmt)
+    finally:
+        conn.close()
+
+def with_dbname(dsn, dbname):
+    """dsn (key=value or URI) pointing at another database."""
+    if psycopg is not None:
+        return psycopg.conninfo.make_conninfo(dsn, dbname=dbname)
+    return psycopg2.extensions.make_dsn(dsn, dbname=dbname)
+
+class ThrowawayCluster:
+    """A PostgreSQL cluster in a temporary directory, reachable on a Unix socket only."""
+
+    def __init__(self):
+        for tool in ("initdb", "pg_ctl"):
+            if shutil.which(tool) is None:
+                raise RuntimeError("%s not found on PATH; install the PostgreSQL server or pass --dsn" % tool)
+        self.dir = tempfile.mkdtemp(prefix="personnel_pg_")
+        self.data = os.path.join(self.dir, "data")
+        with socket.socket() as s:  # a free port number for the socket file name
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.dsn = "host=%s port=%d user=postgres dbname=postgres" % (self.dir, self.port)
+
+    def start(self):
+        subprocess.run(["initdb", "-D", self.data, "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+                       check=True, stdout=subprocess.DEVNULL)
+        options = "-k %s -p %d -c listen_addresses=''" % (self.dir, self.port)
+        subprocess.run(["pg_ctl", "-D", self.data, "-o", options, "-l", os.path.join(self.dir, "server.log"),
+                        "-w", "start"], check=True, stdout=subprocess.DEVNULL)
+
+    def stop(self):
+        subprocess.run(["pg_ctl", "-D", self.data, "-m", "fast", "-w", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def pick_employee(dsn, variables):
+    """:emp for a loaded database (see the header): the lowest employee ID paid in
+    September of :year, else the lowest employee ID."""
+    conn = connect(dsn)
+    try:
+        cur = conn.cursor()
+        cur.execute(EMPLOYEE_PICK_SQL, {"year": int(variables["year"])})
+        emp = cur.fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+    return emp
+
+def create_database(admin_dsn, num_employees, setup):
+    """Fresh database loaded with num_employees generated employees; returns its DSN."""
+    dbname = "%s%d" % (DB_PREFIX, num_employees)
+    run_statements(admin_dsn, ["DROP DATABASE IF EXISTS %s" % dbname, "CREATE DATABASE %s" % dbname])
+    dsn = with_dbname(admin_dsn, dbname)
+    with tempfile.TemporaryDirectory(prefix="personnel_qbench_") as out_dir:
+        cmd = [sys.executable, GENERATOR, "-n", str(num_employees), "-o", out_dir, "--seed", str(BENCH_SEED),
+               "--dsn", dsn, "--init-schema", "--progress", "0"]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError("loading %d employees failed:\n%s" % (num_employees, proc.stderr.decode("utf-8", "replace")))
+    run_statements(dsn, setup + ["VACUUM ANALYZE"])
+    return dsn
+
+# --------------------------- Measuring ---------------------------
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+def timed_run(conn, sql):
+    """Wall seconds to run sql and fetch all rows; DML is rolled back."""
+    cur = conn.cursor()
+    started = time.perf_counter()
+    cur.execute(sql)
+    if cur.description is not None:
+        cur.fetchall()
+    elapsed = time.perf_counter() - started
+    conn.rollback()
+    return elapsed
+
+def explain(conn, sql):
+    """EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) of sql (rolled back); returns the plan."""
+    cur = conn.cursor()
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql)
+    plan = cur.fetchone()[0]
+    conn.rollback()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+def measure(dsn, name, sql, runs, warmup, timeout, plan_path):
+    """Result dict for one query on one database."""
+    conn = connect(dsn)
+    try:
+        cur = conn.cursor()
+        cur.execute("SET statement_timeout = %d" % int(timeout * 1000))
+        conn.commit()
+        try:
+            for _ in range(warmup):
+                timed_run(conn, sql)
+            times = [timed_run(conn, sql) for _ in range(max(1, runs))]
+            plan = explain(conn, sql)
+        except Exception as exc:  # timeout or a broken query: record it, keep going
+            conn.rollback()
+            return {"query": name, "error": str(exc).strip().splitlines()[0]}
+    finally:
+        conn.close()
+    os.makedirs(os.path.dirname(plan_path), exist_ok=True)
+    with open(plan_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=2)
+    top = plan[0]
+    node = top["Plan"]
+    return {
+        "query": name, "dml": is_dml(sql), "runs": len(times),
+        "p50_ms": round(percentile(times, 50) * 1000, 3),
+        "p95_ms": round(percentile(times, 95) * 1000, 3),
+        "execution_ms": top.get("Execution Time"), "planning_ms": top.get("Planning Time"),
+        "rows": node.get("Actual Rows"), "top_node": node.get("Node Type"),
+        "shared_hit_blocks": node.get("Shared Hit Blocks"), "shared_read_blocks": node.get("Shared Read Blocks"),
+    }
+
+# --------------------------- Baselines ---------------------------
+
+def save_baseline(path, config, results):
+    """Write results (scale -> query -> result) as the baseline, keeping other scales."""
+    baseline = load_baseline(path)
+    if baseline is None or baseline.get("config") != config:
+        baseline = {"config": config, "runs": {}}
+    baseline["runs"].update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+def compare(results, baseline, tolerance):
+    """Regression messages for queries whose p95 exceeds the baseline by more than tolerance."""
+    failures = []
+    for scale, queries in results.items():
+        base_queries = baseline["runs"].get(scale, {})
+        for name, res in queries.items():
+            base = base_queries.get(name)
+            if base is None or "p95_ms" not in base:
+                continue
+            if "error" in res:
+                failures.append("%s employees, %s: %s (baseline p95 %.1f ms)" % (scale, name, res["error"], base["p95_ms"]))
+                continue
+            limit = base["p95_ms"] * (1 + tolerance)
+            if res["p95_ms"] > limit:
+                failures.append("%s employees, %s: p95 %.1f ms, baseline %.1f ms (limit %.1f ms)"
+                                % (scale, name, res["p95_ms"], base["p95_ms"], limit))
+    return failures
+
+def first_slow_scales(results, slow_ms):
+    """query -> first scale whose p95 exceeds slow_ms (or that failed), smallest scale first."""
+    first = {}
+    for scale in sorted(results, key=int):
+        for name, res in results[scale].items():
+            if name not in first and ("error" in res or res["p95_ms"] > slow_ms):
+                first[name] = int(scale)
+    return first
+
+# --------------------------- CLI entrypoint ---------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark the project queries, views and functions on generated data.')
+    p.add_argument('--scales', default=",".join(map(str, DEFAULT_SCALES)), help='Comma-separated employee counts (default %(default)s).')
+    p.add_argument('--dsn', default=None, help='Server to create the benchmark databases on (default: a throwaway initdb cluster).')
+    p.add_argument('--runs', type=int, default=RUNS, help='Timed runs per query (default %(default)s).')
+    p.add_argument('--warmup', type=int, default=WARMUP, help='Untimed runs per query first (default %(default)s).')
+    p.add_argument('--var', action='append', default=[], metavar='NAME=VALUE', help='psql variable for the workload (repeatable).')
+    p.add_argument('--only', default=None, help='Only run queries whose name matches this regular expression.')
+    p.add_argument('--timeout', type=float, default=TIMEOUT, help='statement_timeout in seconds (default %(default)s).')
+    p.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file (default %(default)s).')
+    p.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline instead of comparing against it.')
+    p.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed p95 increase over the baseline (default %(default)s).')
+    p.add_argument('--slow-ms', type=float, default=SLOW_MS, help='p95 at which a query counts as broken (default %(default)s).')
+    p.add_argument('--output', default=DEFAULT_OUTPUT, help='Directory for results.json and plans (default %(default)s).')
+    p.add_argument('--keep-databases', action='store_true', help='With --dsn, keep the benchmark databases.')
+    p.add_argument('--profile-compare', action='store_true', help='Measure again after applying performance_profile.sql and report before/after.')
+    args = p.parse_args()
+    try:
+        args.variables = dict(DEFAULT_VARS, **dict(v.split("=", 1) for v in args.var))
+    except ValueError:
+        p.error('--var takes NAME=VALUE')
+    return args
+
+def measure_all(dsn, queries, args, plan_dir, skip):
+    """Measure every query on one database, printing a line each; queries in skip (and
+    those failing now, which are added to it) are not run."""
+    print('%-28s %10s %10s %10s %12s %10s' % ('query', 'p50 ms', 'p95 ms', 'exec ms', 'shared hit', 'read'))
+    results = {}
+    for name, sql in queries:
+        if name in skip:
+            results[name] = {"query": name, "error": "skipped: failed at a smaller scale"}
+            continue
+        res = results[name] = measure(dsn, name, sql, args.runs, args.warmup, args.timeout,
+                                      os.path.join(plan_dir, name + ".json"))
+        if "error" in res:
+            skip.add(name)
+            print('%-28s %s' % (name, res["error"]))
+        else:
+            print('%-28s %10.1f %10.1f %10.1f %12s %10s' % (name, res["p50_ms"], res["p95_ms"], res["execution_ms"] or 0,
+                                                         res["shared_hit_blocks"], res["shared_read_blocks"]))
+    return results
+
+def print_profile_comparison(before, after):
+    print('%-28s %12s %12s %9s' % ('query', 'before p50', 'after p50', 'speedup'))
+    for name, res in before.items():
+        new = after.get(name, {})
+        if "p50_ms" in res and "p50_ms" in new:
+            print('%-28s %10.1fms %10.1fms %8.1fx' % (name, res["p50_ms"], new["p50_ms"],
+                                                     res["p50_ms"] / new["p50_ms"] if new["p50_ms"] else float("inf")))
+
+def main():
+    args = parse_args()
+    scales = [int(n) for n in args.scales.split(",") if n.strip()]
+    setup, queries = load_workload()
+    if args.only:
+        queries = [(name, sql) for name, sql in queries if re.search(args.only, name)]
+    config = {"queries": [name for name, sql in queries], "variables": args.variables, "runs": args.runs,
+              "seed": BENCH_SEED}
+    cluster = None
+    admin_dsn = args.dsn
+    if admin_dsn is None:
+        cluster = ThrowawayCluster()
+        cluster.start()
+        admin_dsn = cluster.dsn
+    results, profile_results, employees = {}, {}, {}
+    try:
+        timed_out, profile_timed_out = set(), set()
+        for n in scales:
+            print('Loading %d employees...' % n, flush=True)
+            t0 = time.perf_counter()
+            dsn = create_database(admin_dsn, n, setup)
+            print('Loaded in %.1fs' % (time.perf_counter() - t0))
+            variables = dict(args.variables)
+            if "emp" not in variables:
+                variables["emp"] = employees[str(n)] = pick_employee(dsn, variables)
+                print('Employee for the function checks (:emp): %d' % variables["emp"])
+            bound = bind(queries, variables)
+            results[str(n)] = measure_all(dsn, bound, args, os.path.join(args.output, "plans", str(n)), timed_out)
+            if args.profile_compare:
+                print('Applying %s...' % os.path.basename(PROFILE_FILE), flush=True)
+                t0 = time.perf_counter()
+                with open(PROFILE_FILE, encoding="utf-8") as f:
+                    run_statements(dsn, [stmt for stmt, label in split_sql(f.read())])
+                print('Applied in %.1fs' % (time.perf_counter() - t0))
+                profile_results[str(n)] = measure_all(dsn, bound, args, os.path.join(args.output, "plans", "%d+profile" % n),
+                                                      profile_timed_out)
+                print_profile_comparison(results[str(n)], profile_results[str(n)])
+            if args.dsn and not args.keep_databases:
+                run_statements(admin_dsn, ["DROP DATABASE IF EXISTS %s%d" % (DB_PREFIX, n)])
+    finally:
+        if cluster:
+            cluster.stop()
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "results.json"), "w", encoding="utf-8") as f:
+        json.dump({"config": config, "employees": employees or None, "runs": results,
+                   "profile_runs": profile_results or None}, f, indent=2)
+    first = first_slow_scales(results, args.slow_ms)
+    if first:
+        print('First scale with p95 above %.0f ms (or failing):' % args.slow_ms)
+        for name, scale in sorted(first.items(), key=lambda kv: kv[1]):
+            print(' - %-28s %d employees' % (name, scale))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, config, results)
+        print('Baseline saved to %s' % args.baseline)
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print('No baseline at %s; run with --save-baseline to create one.' % args.baseline)
+        return 0
+    if baseline.get("config") != config:
+        print('Baseline %s was recorded with another workload or settings; not comparing.' % args.baseline)
+        return 0
+    failures = compare(results, baseline, args.tolerance)
+    for msg in failures:
+        print('REGRESSION: ' + msg)
+    if not failures:
+        print('All queries within tolerance of %s.' % args.baseline)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
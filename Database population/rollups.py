@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# rollups.py
+# Rollup rows for rollups.sql, built while personnel_generator.py generates the data
+# (--rollups), so the summary tables are loaded directly instead of being rebuilt with
+# a full scan of payroll and employee.
+#
+# - payroll_monthly_employee: every payroll row of an employee is generated in the same
+#   batch, so a batch's (month, employee) totals are final once its payroll rows are
+#   written; they are returned per batch and streamed to their table file.
+# - payroll_monthly_department and department_headcount: a few hundred rows per run,
+#   accumulated per shard and merged at the end.
+#
+# Amounts are summed in integer cents, so totals match NUMERIC sums in PostgreSQL
+# exactly. department_id 0 stands for "no department", as in rollups.sql.
+
+
+class Rollups:
+    """Monthly payroll and active-headcount aggregates for one shard."""
+
+    def __init__(self):
+        self.department_months = {}   # (month, department_id) -> [payments, cents]
+        self.headcount = {}           # department_id -> active employees
+
+    def add_employees(self, store):
+        """Count the active employees of an EmployeeStore batch."""
+        headcount = self.headcount
+        for active, dept in zip(store.active, store.department_id):
+            if active:
+                headcount[dept] = headcount.get(dept, 0) + 1
+
+    def add_payroll(self, rows, departments):
+        """Aggregate payroll rows [payroll_id, employee_id, amount, pay_date, ...] of
+        one batch; departments maps employee_id -> department_id. Returns the batch's
+        payroll_monthly_employee rows."""
+        employee_months = {}
+        for r in rows:
+            key = (r[3][:8] + "01", r[1])
+            acc = employee_months.get(key)
+            if acc is None:
+                acc = employee_months[key] = [0, 0]
+            acc[0] += 1
+            acc[1] += round(r[2] * 100)
+        out = []
+        department_months = self.department_months
+        for (month, eid), (count, cents) in employee_months.items():
+            dept = departments[eid] or 0
+            out.append([month, eid, dept, count, cents / 100])
+            acc = department_months.get((month, dept))
+            if acc is None:
+                acc = department_months[(month, dept)] = [0, 0]
+            acc[0] += count
+            acc[1] += cents
+        return out
+
+    def merge(self, other):
+        """Add another shard's department totals and headcounts."""
+        for key, (count, cents) in other.department_months.items():
+            acc = self.department_months.setdefault(key, [0, 0])
+            acc[0] += count
+            acc[1] += cents
+        for dept, n in other.headcount.items():
+            self.headcount[dept] = self.headcount.get(dept, 0) + n
+
+    def department_rows(self):
+        """payroll_monthly_department rows, by month and department."""
+        return [[month, dept, count, cents / 100]
+                for (month, dept), (count, cents) in sorted(self.department_months.items())]
+
+    def headcount_rows(self):
+        """department_headcount rows, by department."""
+        return [[dept, n] for dept, n in sorted(self.headcount.items())]
@@ -0,0 +1,194 @@
+-- rollups.sql
+-- Summary tables for dashboards, kept in sync with payroll and employee by triggers:
+-- - payroll_monthly_employee:   payments and total paid per month and employee
+--                               (with the employee's current department);
+-- - payroll_monthly_department: the same per month and department;
+-- - department_headcount:       active employees per department.
+-- department_id 0 stands for employees without a department.
+--
+-- Run it after the bulk load, then fill the tables: personnel_generator.py --rollups
+-- writes their rows during generation and load.sql loads them right after this file,
+-- so no full scan is needed. For a database loaded any other way run
+-- SELECT rollup_rebuild(); once. Payroll rows without a pay_date are not counted.
+--
+-- Dashboard queries read a few hundred rows instead of aggregating payroll, e.g.
+-- Queries.sql monthly totals:
+--   SELECT month, SUM(payments_count) AS payments_count, SUM(total_paid) AS total_paid
+--   FROM payroll_monthly_department GROUP BY month ORDER BY month DESC;
+
+CREATE TABLE IF NOT EXISTS payroll_monthly_employee (
+  month DATE NOT NULL,
+  employee_id INT NOT NULL,
+  department_id INT NOT NULL,
+  payments_count BIGINT NOT NULL,
+  total_paid NUMERIC(18,2) NOT NULL,
+  PRIMARY KEY (month, employee_id)
+);
+CREATE INDEX IF NOT EXISTS idx_payroll_monthly_employee_employee ON payroll_monthly_employee (employee_id);
+
+CREATE TABLE IF NOT EXISTS payroll_monthly_department (
+  month DATE NOT NULL,
+  department_id INT NOT NULL,
+  payments_count BIGINT NOT NULL,
+  total_paid NUMERIC(18,2) NOT NULL,
+  PRIMARY KEY (month, department_id)
+);
+
+CREATE TABLE IF NOT EXISTS department_headcount (
+  department_id INT PRIMARY KEY,
+  active_employees BIGINT NOT NULL
+);
+
+-- ---------- Payroll ----------
+-- Adds (delta = 1) or removes (delta = -1) one payment of amount in month for an
+-- employee. The department comes from the employee's rollup row when there is one,
+-- so removals work even while the employee row itself is being deleted.
+CREATE OR REPLACE FUNCTION rollup_payroll_change(p_month DATE, p_employee INT, delta INT, amount NUMERIC)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+  dept INT;
+BEGIN
+  IF delta > 0 THEN
+    SELECT COALESCE(department_id, 0) INTO dept FROM employee WHERE employee_id = p_employee;
+    INSERT INTO payroll_monthly_employee AS r (month, employee_id, department_id, payments_count, total_paid)
+    VALUES (p_month, p_employee, COALESCE(dept, 0), 1, amount)
+    ON CONFLICT (month, employee_id) DO UPDATE
+      SET payments_count = r.payments_count + 1, total_paid = r.total_paid + EXCLUDED.total_paid
+    RETURNING r.department_id INTO dept;
+    INSERT INTO payroll_monthly_department AS d (month, department_id, payments_count, total_paid)
+    VALUES (p_month, dept, 1, amount)
+    ON CONFLICT (month, department_id) DO UPDATE
+      SET payments_count = d.payments_count + 1, total_paid = d.total_paid + EXCLUDED.total_paid;
+  ELSE
+    UPDATE payroll_monthly_employee
+    SET payments_count = payments_count - 1, total_paid = total_paid - amount
+    WHERE month = p_month AND employee_id = p_employee
+    RETURNING department_id INTO dept;
+    IF dept IS NULL THEN
+      RETURN;
+    END IF;
+    DELETE FROM payroll_monthly_employee WHERE month = p_month AND employee_id = p_employee AND payments_count <= 0;
+    UPDATE payroll_monthly_department
+    SET payments_count = payments_count - 1, total_paid = total_paid - amount
+    WHERE month = p_month AND department_id = dept;
+    DELETE FROM payroll_monthly_department WHERE month = p_month AND department_id = dept AND payments_count <= 0;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_rollup_payroll()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.pay_date IS NOT NULL THEN
+    PERFORM rollup_payroll_change(date_trunc('month', OLD.pay_date)::date, OLD.employee_id, -1, COALESCE(OLD.amount, 0));
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.pay_date IS NOT NULL THEN
+    PERFORM rollup_payroll_change(date_trunc('month', NEW.pay_date)::date, NEW.employee_id, 1, COALESCE(NEW.amount, 0));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_rollup_payroll_truncate()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  TRUNCATE payroll_monthly_employee, payroll_monthly_department;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup ON payroll;
+CREATE TRIGGER trg_payroll_rollup
+AFTER INSERT OR UPDATE OF employee_id, amount, pay_date OR DELETE ON payroll
+FOR EACH ROW EXECUTE FUNCTION trg_rollup_payroll();
+
+DROP TRIGGER IF EXISTS trg_payroll_rollup_truncate ON payroll;
+CREATE TRIGGER trg_payroll_rollup_truncate
+AFTER TRUNCATE ON payroll
+FOR EACH STATEMENT EXECUTE FUNCTION trg_rollup_payroll_truncate();
+
+-- ---------- Employee ----------
+-- Keeps department_headcount current and moves an employee's payroll months to the
+-- new department when department_id changes.
+CREATE OR REPLACE FUNCTION trg_rollup_employee()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+  old_dept INT;
+  new_dept INT;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.active THEN
+    UPDATE department_headcount SET active_employees = active_employees - 1
+    WHERE department_id = COALESCE(OLD.department_id, 0);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.active THEN
+    INSERT INTO department_headcount AS h (department_id, active_employees)
+    VALUES (COALESCE(NEW.department_id, 0), 1)
+    ON CONFLICT (department_id) DO UPDATE SET active_employees = h.active_employees + 1;
+  END IF;
+  IF TG_OP = 'UPDATE' THEN
+    old_dept := COALESCE(OLD.department_id, 0);
+    new_dept := COALESCE(NEW.department_id, 0);
+    IF old_dept <> new_dept THEN
+      UPDATE payroll_monthly_department d
+      SET payments_count = d.payments_count - e.payments_count, total_paid = d.total_paid - e.total_paid
+      FROM payroll_monthly_employee e
+      WHERE e.employee_id = NEW.employee_id AND d.month = e.month AND d.department_id = old_dept;
+      DELETE FROM payroll_monthly_department WHERE department_id = old_dept AND payments_count <= 0;
+      INSERT INTO payroll_monthly_department AS d (month, department_id, payments_count, total_paid)
+      SELECT month, new_dept, payments_count, total_paid FROM payroll_monthly_employee WHERE employee_id = NEW.employee_id
+      ON CONFLICT (month, department_id) DO UPDATE
+        SET payments_count = d.payments_count + EXCLUDED.payments_count, total_paid = d.total_paid + EXCLUDED.total_paid;
+      UPDATE payroll_monthly_employee SET department_id = new_dept WHERE employee_id = NEW.employee_id;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_rollup_employee_truncate()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  TRUNCATE department_headcount;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_employee_rollup ON employee;
+CREATE TRIGGER trg_employee_rollup
+AFTER INSERT OR UPDATE OF active, department_id OR DELETE ON employee
+FOR EACH ROW EXECUTE FUNCTION trg_rollup_employee();
+
+DROP TRIGGER IF EXISTS trg_employee_rollup_truncate ON employee;
+CREATE TRIGGER trg_employee_rollup_truncate
+AFTER TRUNCATE ON employee
+FOR EACH STATEMENT EXECUTE FUNCTION trg_rollup_employee_truncate();
+
+-- ---------- Rebuild and readers ----------
+-- Full rebuild from payroll and employee (one scan each)
+CREATE OR REPLACE FUNCTION rollup_rebuild()
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+  TRUNCATE payroll_monthly_employee, payroll_monthly_department, department_headcount;
+  INSERT INTO payroll_monthly_employee (month, employee_id, department_id, payments_count, total_paid)
+  SELECT date_trunc('month', p.pay_date)::date, p.employee_id, COALESCE(e.department_id, 0),
+         COUNT(*), COALESCE(SUM(p.amount), 0)
+  FROM payroll p JOIN employee e ON e.employee_id = p.employee_id
+  WHERE p.pay_date IS NOT NULL
+  GROUP BY 1, 2, 3;
+  INSERT INTO payroll_monthly_department (month, department_id, payments_count, total_paid)
+  SELECT month, department_id, SUM(payments_count), SUM(total_paid)
+  FROM payroll_monthly_employee
+  GROUP BY 1, 2;
+  INSERT INTO department_headcount (department_id, active_employees)
+  SELECT COALESCE(department_id, 0), COUNT(*) FROM employee WHERE active GROUP BY 1;
+END;
+$$;
+
+-- Same signature and result as the COUNT(*) version in `function`, read from the rollup.
+-- It replaces the performance_profile.sql version too, which steps aside once
+-- department_headcount exists (load.sql runs the profile first, then this file).
+CREATE OR REPLACE FUNCTION fn_department_headcount(dept_id INT)
+RETURNS INT LANGUAGE sql STABLE AS $$
+  SELECT COALESCE((SELECT active_employees FROM department_headcount
+                    WHERE department_id = dept_id AND dept_id <> 0), 0)::int;
+$$;
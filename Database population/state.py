@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# state.py
+# Generator state saved after a run (--state) so later runs can extend the same
+# dataset instead of regenerating it (personnel_generator.py --delta).
+#
+# The state file is a zip archive (stdlib only) holding:
+# - state.json: employee ID permutation keys, next employee index, next payroll /
+#   license / shift IDs, per name@domain email suffix counters, the org-tree builder
+#   state, the RNG state and the as-of date of the last delta;
+# - one binary array per employee fact, indexed by generation index: employee_id,
+#   hire and termination day (date ordinals, 0 = not terminated) and department_id;
+# - one binary array per license fact: license_id, holder's employee index, license
+#   name index and expiry day.
+#
+# About 32 bytes per employee plus 16 per license before compression, so a
+# million-employee dataset loads in well under a second.
+#
+# EmployeeSnapshot is the smaller file every file-writing run leaves in its output
+# directory (employee_snapshot.zip): employee_id, hire day and department_id per
+# employee (18 bytes) plus the run layout, enough to regenerate payroll, license or
+# on-call rows without the employee phase (personnel_generator.py --tables). Runs
+# spool it to raw per-array files batch by batch (ArrayState.spool) and zip those at the
+# end (save_spooled), so the snapshot never has to be held in memory whole.
+
+import os
+import json
+import shutil
+import zipfile
+import datetime
+from array import array
+
+
+# array name -> typecode
+EMPLOYEE_ARRAYS = {"employee_id": "q", "hire_day": "l", "termination_day": "l", "department_id": "h"}
+LICENSE_ARRAYS = {"license_id": "q", "license_employee": "q", "license_name": "h", "license_expiry": "l"}
+SNAPSHOT_ARRAYS = {"employee_id": "q", "hire_day": "l", "department_id": "h"}
+
+
+def day(iso):
+    """Date ordinal of an ISO date string."""
+    return datetime.date.fromisoformat(iso).toordinal()
+
+def iso(ordinal):
+    """ISO date string of a date ordinal."""
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+class ArrayState:
+    """Named typed arrays plus a JSON info dict, saved together as one zip file.
+    Subclasses list their arrays (name -> typecode) in ARRAYS and bump VERSION when
+    the layout or meaning of a saved file changes."""
+
+    ARRAYS = {}
+    VERSION = 1
+
+    def __init__(self, info=None):
+        self.info = dict(info or {})
+        for name, code in self.ARRAYS.items():
+            setattr(self, name, array(code))
+
+    def __len__(self):
+        return len(self.employee_id)
+
+    def extend(self, other):
+        """Append another (later) shard's facts."""
+        for name in self.ARRAYS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def save(self, path):
+        """Write the state file (atomically replacing an older one)."""
+        tmp = path + ".tmp"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("state.json", json.dumps(dict(self.info, version=self.VERSION)))
+            for name in self.ARRAYS:
+                zf.writestr(name + ".bin", getattr(self, name).tobytes())
+        os.replace(tmp, path)
+
+    def spool(self, prefix):
+        """Append the arrays to raw files prefix + name + '.bin' and empty them."""
+        for name, code in self.ARRAYS.items():
+            with open(prefix + name + ".bin", "ab") as f:
+                getattr(self, name).tofile(f)
+            setattr(self, name, array(code))
+
+    @classmethod
+    def save_spooled(cls, path, info, prefixes):
+        """Write a state file from the spool files of prefixes (concatenated in order,
+        without loading them) and remove the spool files."""
+        tmp = path + ".tmp"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("state.json", json.dumps(dict(info, version=cls.VERSION)))
+            for name in cls.ARRAYS:
+                with zf.open(name + ".bin", "w", force_zip64=True) as out:
+                    for prefix in prefixes:
+                        if os.path.exists(prefix + name + ".bin"):   # nothing spooled: no rows
+                            with open(prefix + name + ".bin", "rb") as f:
+                                shutil.copyfileobj(f, out)
+        os.replace(tmp, path)
+        for prefix in prefixes:
+            for name in cls.ARRAYS:
+                if os.path.exists(prefix + name + ".bin"):
+                    os.remove(prefix + name + ".bin")
+
+    @classmethod
+    def load(cls, path):
+        with zipfile.ZipFile(path) as zf:
+            info = json.loads(zf.read("state.json"))
+            if info.get("version") != cls.VERSION:
+                raise ValueError("%s: unsupported state version %r" % (path, info.get("version")))
+            state = cls(info)
+            for name in cls.ARRAYS:
+                getattr(state, name).frombytes(zf.read(name + ".bin"))
+        return state
+
+
+class GeneratorState(ArrayState):
+    """Employee and license facts plus the counters needed to continue generation.
+    Shards collect their own GeneratorState; extend() appends them in shard order."""
+
+    ARRAYS = dict(EMPLOYEE_ARRAYS, **LICENSE_ARRAYS)
+    VERSION = 2     # 2: phones derived from the employee index, no longer saved
+
+    def add_employee(self, employee_id, hire, termination, department_id):
+        """Record one employee (ISO dates, termination may be None)."""
+        self.employee_id.append(employee_id)
+        self.hire_day.append(day(hire))
+        self.termination_day.append(day(termination) if termination else 0)
+        self.department_id.append(department_id)
+
+    def add_license(self, license_id, employee_index, name_index, expiry):
+        self.license_id.append(license_id)
+        self.license_employee.append(employee_index)
+        self.license_name.append(name_index)
+        self.license_expiry.append(day(expiry))
+
+
+class EmployeeSnapshot(ArrayState):
+    """Employee facts the child tables are generated from, in generation-index order."""
+
+    ARRAYS = SNAPSHOT_ARRAYS
+
+    def add(self, employee_id, hire, department_id):
+        self.employee_id.append(employee_id)
+        self.hire_day.append(day(hire))
+        self.department_id.append(department_id)
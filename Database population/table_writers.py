@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# table_writers.py
+# Per-table output writers used by personnel_generator.py, plus the generated load script.
+#
+# Rows are lists of plain Python values (None, bool, int, float amounts, str, dict for
+# JSONB); each writer formats them for its output format:
+# - "sql"  : chunked INSERT ... VALUES statements wrapped in BEGIN/COMMIT (.sql)
+# - "copy" : PostgreSQL COPY text format, tab separated, \N for NULL (.copy)
+# - "csv"  : COPY CSV format with a header line; strings always quoted so that an empty
+#            string ("") and NULL (empty, unquoted) stay distinct (.csv)
+#
+# Writers emit bytes through one buffered handle per table. Field bytes for strings that
+# recur across rows (vocabulary lists, ISO dates, HH:MM times) come from a LiteralCache
+# filled once per run, so those fields cost one dict lookup instead of escaping,
+# formatting and encoding.
+#
+# With compress ("gzip", "xz" or "bz2", stdlib codecs only) each table file is
+# compressed as it is written: the writer hands 1 MiB chunks over a bounded queue to a
+# background thread running the compressor (zlib, lzma and bz2 release the GIL), so
+# generation only waits when compression falls QUEUE_CHUNKS behind.
+#
+# write_load_script() writes load.sql, a psql script that loads the files in FK order.
+# For copy/csv it drops the foreign keys and disables user triggers (e.g. the payroll
+# pay_date trigger from Constraints.sql) during the load, then re-adds the keys (one
+# set-based check each) and re-checks the trigger's rule, all in one transaction.
+# Compressed copy/csv files are read with \copy ... FROM PROGRAM '<decompressor>';
+# compressed INSERT files cannot be \i'd, so load.sh pipes them into psql instead.
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import queue
+import shutil
+import threading
+import zlib
+
+FORMATS = ("sql", "copy", "csv")
+CHUNK_SIZE = 1000  # rows per INSERT statement chunk
+BUFFER_SIZE = 1 << 20  # bytes buffered per table file handle
+QUEUE_CHUNKS = 8       # BUFFER_SIZE chunks queued per compressed file before write() blocks
+
+# name -> (file suffix, one-shot compress, streaming compressor factory, decompress command)
+CODECS = {
+    "gzip": (".gz", lambda data: gzip.compress(data, compresslevel=6), lambda: zlib.compressobj(6, zlib.DEFLATED, 31), "gzip -dc"),
+    "xz": (".xz", lzma.compress, lzma.LZMACompressor, "xz -dc"),
+    "bz2": (".bz2", bz2.compress, bz2.BZ2Compressor, "bzip2 -dc"),
+}
+COMPRESSIONS = tuple(CODECS)
+
+# --------------------------- Value formatting ---------------------------
+
+def sql_literal(val):
+    """SQL literal for a generated value."""
+    if val is None:
+        return "NULL"
+    if val is True:
+        return "true"
+    if val is False:
+        return "false"
+    if isinstance(val, int):
+        return str(val)
+    if isinstance(val, float):
+        return f"{val:.2f}"
+    if isinstance(val, (dict, list)):
+        val = json.dumps(val)
+    return "'" + str(val).replace("'", "''") + "'"
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def copy_field(val):
+    """COPY text-format field for a generated value."""
+    if val is None:
+        return "\\N"
+    if val is True:
+        return "t"
+    if val is False:
+        return "f"
+    if isinstance(val, int):
+        return str(val)
+    if isinstance(val, float):
+        return f"{val:.2f}"
+    if isinstance(val, (dict, list)):
+        val = json.dumps(val)
+    return str(val).translate(_COPY_ESCAPES)
+
+def csv_field(val):
+    """COPY CSV field for a generated value (NULL is an empty unquoted field)."""
+    if val is None:
+        return ""
+    if val is True:
+        return "t"
+    if val is False:
+        return "f"
+    if isinstance(val, int):
+        return str(val)
+    if isinstance(val, float):
+        return f"{val:.2f}"
+    if isinstance(val, (dict, list)):
+        val = json.dumps(val)
+    return '"' + str(val).replace('"', '""') + '"'
+
+# --------------------------- Literal cache ---------------------------
+
+class LiteralCache:
+    """Pre-encoded field bytes for one output format. Strings added up front are
+    escaped and encoded once; other values are formatted on every call. Only strings
+    (and None) are keys: numbers would collide with bools (True == 1)."""
+
+    def __init__(self, field, strings=()):
+        self.field = field
+        self._bytes = {None: field(None).encode("utf-8")}
+        self.add(strings)
+
+    def add(self, strings):
+        for s in strings:
+            self._bytes[s] = self.field(s).encode("utf-8")
+
+    def encode(self, val):
+        """Field bytes for one value."""
+        if val.__class__ is str or val is None:
+            cached = self._bytes.get(val)
+            if cached is not None:
+                return cached
+        return self.field(val).encode("utf-8")
+
+    def encode_row(self, row, sep):
+        """Row of plain values as sep-joined field bytes."""
+        get, field = self._bytes.get, self.field
+        try:
+            return sep.join([get(v) or field(v).encode("utf-8") for v in row])
+        except TypeError:  # unhashable value (dict/list for JSONB)
+            return sep.join(map(self.encode, row))
+
+# --------------------------- Output handles ---------------------------
+
+class CompressedOutput:
+    """Binary write-only file compressed on a background thread. write() collects
+    data into BUFFER_SIZE chunks and queues them; the queue is bounded, so memory
+    stays at about QUEUE_CHUNKS chunks however far the compressor falls behind."""
+
+    def __init__(self, path, codec):
+        self._raw = open(path, "wb")
+        self._compressor = CODECS[codec][2]()
+        self._queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self._pending = []
+        self._pending_size = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="compress:" + os.path.basename(path), daemon=True)
+        self._thread.start()
+
+    def write(self, data):
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= BUFFER_SIZE:
+            self._hand_off()
+
+    def _hand_off(self):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(b"".join(self._pending))
+        self._pending = []
+        self._pending_size = 0
+
+    def _run(self):
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                self._raw.write(self._compressor.compress(chunk))
+            self._raw.write(self._compressor.flush())
+        except Exception as exc:
+            self._error = exc
+            while self._queue.get() is not None:  # keep draining so write() never blocks
+                pass
+        finally:
+            self._raw.close()
+
+    def close(self):
+        """Queue the rest, wait for the compressor to finish and close the file."""
+        if self._pending:
+            self._hand_off()
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+def open_output(path, compress=None):
+    """Binary output handle for a table file, compressed with the given codec or plain."""
+    if compress:
+        return CompressedOutput(path, compress)
+    return open(path, "wb", buffering=BUFFER_SIZE)
+
+def file_suffix(compress=None):
+    """File name suffix added by a codec ('' for plain files)."""
+    return CODECS[compress][0] if compress else ""
+
+# --------------------------- Writers ---------------------------
+
+class TableWriter:
+    """Writes one table file through a single handle kept open for the whole run.
+    With wrap=False the file header/footer are left out (shard part-files that are
+    merged later by merge_parts). chunk only matters for formats that batch rows.
+    cache is a LiteralCache for this format, shared by the writers of a run; compress
+    names a CODECS entry (path should carry its suffix)."""
+
+    ext = ""
+    field = None
+
+    def __init__(self, path, table, cols, label, wrap=True, chunk=CHUNK_SIZE, cache=None, compress=None):
+        self.path = path
+        self.table = table
+        self.cols = cols
+        self.chunk = chunk
+        self.count = 0
+        self.bytes = 0     # bytes written, before compression
+        self.wrap = wrap
+        self.cache = cache or literal_cache(type(self))
+        self._f = open_output(path, compress)
+        if wrap:
+            self._emit(self.file_header(table, cols, label).encode("utf-8"))
+
+    @staticmethod
+    def file_header(table, cols, label):
+        return ""
+
+    @staticmethod
+    def file_footer():
+        return ""
+
+    def write_rows(self, rows):
+        """Write rows of plain values."""
+        self.count += len(rows)
+        self._write(rows)
+
+    def _write(self, rows):
+        raise NotImplementedError
+
+    def _emit(self, data):
+        self.bytes += len(data)
+        self._f.write(data)
+
+    def _flush(self):
+        pass
+
+    def close(self):
+        """Flush buffered rows, write the footer and close the file."""
+        self._flush()
+        if self.wrap:
+            self._emit(self.file_footer().encode("utf-8"))
+        self._f.close()
+
+
+class SqlTableWriter(TableWriter):
+    """INSERT statements of CHUNK_SIZE rows inside BEGIN/COMMIT. Rows are buffered only
+    until a full chunk can be written, so memory is bounded by the chunk size."""
+
+    ext = ".sql"
+    field = staticmethod(sql_literal)
+
+    def __init__(self, path, table, cols, label, wrap=True, chunk=CHUNK_SIZE, cache=None, compress=None):
+        super().__init__(path, table, cols, label, wrap, chunk, cache, compress)
+        self._insert = f"INSERT INTO {table} ({', '.join(cols)}) VALUES\n".encode("utf-8")
+        self._pending = []
+
+    @staticmethod
+    def file_header(table, cols, label):
+        return f"-- {label}\nBEGIN;\n\n"
+
+    @staticmethod
+    def file_footer():
+        return "COMMIT;\n"
+
+    def _write(self, rows):
+        self._pending.extend(rows)
+        while len(self._pending) >= self.chunk:
+            self._write_chunk(self._pending[:self.chunk])
+            del self._pending[:self.chunk]
+
+    def _write_chunk(self, rows):
+        encode = self.cache.encode_row
+        self._emit(self._insert + b"(" + b"),\n(".join([encode(r, b", ") for r in rows]) + b");\n\n")
+
+    def _flush(self):
+        if self._pending:
+            self._write_chunk(self._pending)
+            self._pending = []
+
+
+class CopyTableWriter(TableWriter):
+    """COPY text format: one tab-separated line per row."""
+
+    ext = ".copy"
+    field = staticmethod(copy_field)
+
+    def _write(self, rows):
+        encode = self.cache.encode_row
+        self._emit(b"".join([encode(r, b"\t") + b"\n" for r in rows]))
+
+
+class CsvTableWriter(TableWriter):
+    """COPY CSV format with a header line."""
+
+    ext = ".csv"
+    field = staticmethod(csv_field)
+
+    @staticmethod
+    def file_header(table, cols, label):
+        return ",".join(cols) + "\n"
+
+    def _write(self, rows):
+        encode = self.cache.encode_row
+        self._emit(b"".join([encode(r, b",") + b"\n" for r in rows]))
+
+
+WRITERS = {"sql": SqlTableWriter, "copy": CopyTableWriter, "csv": CsvTableWriter}
+
+def literal_cache(fmt, strings=()):
+    """LiteralCache for a format name (or writer class) pre-filled with strings."""
+    writer_cls = WRITERS.get(fmt, fmt)
+    return LiteralCache(writer_cls.field, strings)
+
+def merge_parts(path, part_paths, header, footer, compress=None):
+    """Concatenate unwrapped part-files into one file with the given header/footer and
+    remove the parts. Compressed parts are concatenated as they are (gzip, xz and bzip2
+    all decompress concatenated streams); header and footer become streams of their own."""
+    encode = CODECS[compress][1] if compress else (lambda data: data)
+    with open(path, "wb") as out:
+        if header:
+            out.write(encode(header.encode("utf-8")))
+        for part in part_paths:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            os.remove(part)
+        if footer:
+            out.write(encode(footer.encode("utf-8")))
+
+# --------------------------- Load script ---------------------------
+
+# Foreign keys of personnel_init.sql: (table, constraint, definition)
+FOREIGN_KEYS = [
+    ("position", "position_department_id_fkey", "FOREIGN KEY (department_id) REFERENCES department(department_id) ON DELETE SET NULL"),
+    ("employee", "employee_department_id_fkey", "FOREIGN KEY (department_id) REFERENCES department(department_id)"),
+    ("employee", "employee_position_id_fkey", "FOREIGN KEY (position_id) REFERENCES position(position_id)"),
+    ("employee", "employee_manager_id_fkey", "FOREIGN KEY (manager_id) REFERENCES employee(employee_id)"),
+    ("payroll", "payroll_employee_id_fkey", "FOREIGN KEY (employee_id) REFERENCES employee(employee_id) ON DELETE CASCADE"),
+    ("employee_license", "employee_license_employee_id_fkey", "FOREIGN KEY (employee_id) REFERENCES employee(employee_id) ON DELETE CASCADE"),
+    ("oncall_shift", "oncall_shift_employee_id_fkey", "FOREIGN KEY (employee_id) REFERENCES employee(employee_id) ON DELETE CASCADE"),
+]
+# Tables whose user triggers are disabled during a COPY/CSV load
+TRIGGER_TABLES = ["employee", "payroll", "employee_license", "oncall_shift"]
+
+# Re-check of trg_payroll_pay_date_before_ins_upd's rule after the load
+PAY_DATE_CHECK = """DO $$
+DECLARE
+  bad BIGINT;
+BEGIN
+  SELECT COUNT(*) INTO bad
+  FROM payroll p JOIN employee e ON e.employee_id = p.employee_id
+  WHERE p.pay_date < e.hire_date;
+  IF bad > 0 THEN
+    RAISE EXCEPTION '% payroll rows have pay_date before the employee hire_date', bad;
+  END IF;
+END;
+$$;
+"""
+
+def write_load_script(out_dir, tables, fmt, sequences_file=None, compress=None, profile_file=None,
+                      rollups=None):
+    """Write load.sql to out_dir. tables is a list of (table, cols, [file paths]) in FK
+    order. Returns the script path; run it from out_dir with psql. profile_file (e.g.
+    performance_profile.sql, in out_dir) is run once the data and sequences are in.
+    rollups is (rollups.sql path, [(table, cols, [file paths])]): the script creating
+    the rollup tables and their triggers runs after that, then the pre-computed rollup
+    rows are loaded into the (emptied) tables. Both scripts define
+    fn_department_headcount; with both, rollups.sql runs last and its version (reading
+    department_headcount) is the one kept, and performance_profile.sql leaves the
+    function alone wherever that table already exists.
+
+    Compressed INSERT files get load.sh instead, which pipes them through the
+    decompressor into a single psql session."""
+    if fmt == "sql" and compress:
+        return _write_pipe_script(out_dir, tables, compress, sequences_file, profile_file, rollups)
+    path = os.path.join(out_dir, "load.sql")
+    lines = ["-- Load the generated personnel data (%s format) in FK order." % fmt,
+             "-- Run from this directory:  psql -v ON_ERROR_STOP=1 -d <database> -f load.sql",
+             "\\set ON_ERROR_STOP on", ""]
+    if fmt == "sql":
+        lines += _load_lines(tables, fmt, compress)
+    else:
+        lines += ["BEGIN;", "",
+                  "-- Drop foreign keys and user triggers for the bulk load; they are restored below.",
+                  "-- Re-adding a foreign key checks the whole table in one pass instead of per row."]
+        lines += ["ALTER TABLE %s DROP CONSTRAINT IF EXISTS %s;" % (t, name) for t, name, _ in FOREIGN_KEYS]
+        lines += ["ALTER TABLE %s DISABLE TRIGGER USER;" % t for t in TRIGGER_TABLES]
+        lines.append("")
+        lines += _load_lines(tables, fmt, compress)
+        lines.append("")
+        lines += ["ALTER TABLE %s ENABLE TRIGGER USER;" % t for t in TRIGGER_TABLES]
+        lines += ["ALTER TABLE %s ADD CONSTRAINT %s %s;" % fk for fk in FOREIGN_KEYS]
+        lines += ["", PAY_DATE_CHECK, "COMMIT;"]
+    if sequences_file:
+        lines += ["", "\\i '%s'" % os.path.basename(sequences_file)]
+    if profile_file:
+        lines += ["", "\\i '%s'" % os.path.basename(profile_file)]
+    if rollups:
+        rollups_file, rollup_tables = rollups
+        lines.append("")
+        if profile_file:
+            lines.append("-- Replaces the profile's fn_department_headcount with the rollup version.")
+        lines += ["\\i '%s'" % os.path.basename(rollups_file),
+                  "TRUNCATE %s;" % ", ".join(table for table, cols, files in rollup_tables)]
+        lines += _load_lines(rollup_tables, fmt, compress)
+    lines += ["", "ANALYZE;", ""]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+def _load_lines(tables, fmt, compress=None):
+    """psql lines loading (table, cols, [file paths]) in order: \\i for INSERT files,
+    \\copy (FROM PROGRAM for compressed files) for copy/csv."""
+    if fmt == "sql":
+        return ["\\i '%s'" % os.path.basename(p) for table, cols, files in tables for p in files]
+    options = "FORMAT text" if fmt == "copy" else "FORMAT csv, HEADER true"
+    lines = []
+    for table, cols, files in tables:
+        for p in files:
+            source = "'%s'" % os.path.basename(p)
+            if compress and p.endswith(file_suffix(compress)):
+                source = "PROGRAM '%s %s'" % (CODECS[compress][3], os.path.basename(p))
+            lines.append("\\copy %s (%s) FROM %s WITH (%s)" % (table, ", ".join(cols), source, options))
+    return lines
+
+def _write_pipe_script(out_dir, tables, compress, sequences_file=None, profile_file=None, rollups=None):
+    """load.sh for compressed INSERT files: decompress them in FK order into one psql."""
+    path = os.path.join(out_dir, "load.sh")
+    decompress = CODECS[compress][3]
+    lines = ["#!/bin/sh",
+             "# Load the generated personnel data (sql format, %s-compressed) in FK order." % compress,
+             "# Run from this directory:  sh load.sh -d <database>   (arguments are passed to psql)",
+             "set -e", "{"]
+
+    def cat(p):
+        return "  %s '%s'" % (decompress if p.endswith(file_suffix(compress)) else "cat", os.path.basename(p))
+
+    for table, cols, files in tables:
+        lines += [cat(p) for p in files]
+    if sequences_file:
+        lines.append("  cat '%s'" % os.path.basename(sequences_file))
+    if profile_file:
+        lines.append("  cat '%s'" % os.path.basename(profile_file))
+    if rollups:
+        rollups_file, rollup_tables = rollups
+        lines.append("  cat '%s'" % os.path.basename(rollups_file))
+        lines.append("  echo 'TRUNCATE %s;'" % ", ".join(table for table, cols, files in rollup_tables))
+        for table, cols, files in rollup_tables:
+            lines += [cat(p) for p in files]
+    lines += ["  echo 'ANALYZE;'", '} | psql -v ON_ERROR_STOP=1 "$@"', ""]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+def write_delta_load_script(out_dir, inserts, updates, fmt, as_of, sequences_file=None):
+    """Write load.sql for a delta (see personnel_generator.generate_delta). inserts is a
+    list of (table, cols, path) loaded straight into the tables in FK order; updates a
+    list of (staging table, cols, path, column DDL, apply statement). Everything runs in
+    one transaction with constraints and triggers in place."""
+    path = os.path.join(out_dir, "load.sql")
+    lines = ["-- Apply the generated personnel delta for %s (%s format)." % (as_of, fmt),
+             "-- Run from this directory:  psql -v ON_ERROR_STOP=1 -d <database> -f load.sql",
+             "\\set ON_ERROR_STOP on", "", "BEGIN;", ""]
+    lines += ["CREATE TEMP TABLE %s (%s) ON COMMIT DROP;" % (table, ddl) for table, cols, p, ddl, apply_sql in updates]
+    lines.append("")
+    options = "FORMAT text" if fmt == "copy" else "FORMAT csv, HEADER true"
+    for table, cols, p in inserts + [u[:3] for u in updates]:
+        if fmt == "sql":
+            lines.append("\\i '%s'" % os.path.basename(p))
+        else:
+            lines.append("\\copy %s (%s) FROM '%s' WITH (%s)" % (table, ", ".join(cols), os.path.basename(p), options))
+    lines.append("")
+    lines += [apply_sql for table, cols, p, ddl, apply_sql in updates]
+    lines += ["", "COMMIT;"]
+    if sequences_file:
+        lines += ["", "\\i '%s'" % os.path.basename(sequences_file)]
+    lines += ["", "ANALYZE employee, payroll, employee_license, oncall_shift;", ""]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# uniqueness.py
+# Uniqueness engine for generated columns marked UNIQUE, one pluggable index per column.
+#
+# Two kinds of unique columns:
+# - Suffixed columns (employee.email): a value is built from a base plus an optional
+#   numeric suffix. SuffixCounterIndex keeps the next free suffix per base, so each new
+#   value costs one dict lookup instead of re-probing suffixes 1, 2, 3, ... against a
+#   set of every value seen so far. Memory grows with the number of distinct bases,
+#   not rows.
+# - Drawn columns: random values that are redrawn until unseen. Membership is tracked
+#   by one of three interchangeable indexes (anything with add(value) -> bool will do):
+#     * "set"   - ExactSetIndex, the values themselves (exact, largest)
+#     * "hash"  - HashedSetIndex, 64-bit digests of the values (tiny chance of a spurious
+#                 "seen", which only costs a redraw)
+#     * "bloom" - BloomIndex, a fixed-size bit array sized for the expected row count
+#                 (~1.8 bytes/value at 0.1% false positives; again a false positive only
+#                 costs a redraw, so uniqueness is never violated)
+#   Every index still grows with the number of values drawn. employee.phone is
+#   therefore not a drawn column: phones come from a keyed bijection of the generation
+#   index (EmployeeIdSpace.phone in personnel_generator.py), which needs no index at
+#   all. No generated column is drawn at the moment; the indexes are kept for UNIQUE
+#   columns that cannot be derived that way.
+#
+# Digests use blake2b rather than hash() so runs are reproducible across processes.
+#
+# For continuing a dataset in a later run (--delta), next_values() exports each
+# suffixed column's counters and mark_suffixed(..., resume=...) restores them; drawn
+# columns are re-seeded with the values already in use via UniquenessEngine.add_drawn().
+
+import hashlib
+import math
+
+BACKENDS = ("set", "hash", "bloom")
+BLOOM_FP_RATE = 0.001
+MAX_DRAW_ATTEMPTS = 1000
+
+
+def _digest64(value):
+    """Deterministic 64-bit digest of a value's string form."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SuffixCounterIndex:
+    """Next free numeric suffix per base. The first value for a base has no suffix,
+    later ones get 1, 2, 3, ... Bases must not end in a digit, otherwise base 'a1'
+    and base 'a' with suffix 1 would collide.
+
+    With stride/offset the n-th use of a base gets suffix n*stride + offset, so
+    independent generator shards (offset = shard number, stride = shard count) never
+    hand out the same value."""
+
+    def __init__(self, stride=1, offset=0):
+        self.stride = stride
+        self.offset = offset
+        self._next = {}
+
+    def next_suffix(self, key):
+        """Return the suffix to use for key ('' for suffix 0, else the number)."""
+        n = self._next.get(key, 0)
+        self._next[key] = n + 1
+        value = n * self.stride + self.offset
+        return str(value) if value else ""
+
+    def __len__(self):
+        return len(self._next)
+
+    def next_values(self):
+        """Lowest suffix value per key that this index will not hand out again
+        (every value it gave out for the key is below it)."""
+        return {key: n * self.stride + self.offset for key, n in self._next.items()}
+
+    @staticmethod
+    def merge_next_values(values_list):
+        """Combine next_values() of several indexes (e.g. shards sharing a column)."""
+        merged = {}
+        for values in values_list:
+            for key, v in values.items():
+                if v > merged.get(key, 0):
+                    merged[key] = v
+        return merged
+
+
+class ExactSetIndex:
+    """Exact membership: stores every value."""
+
+    def __init__(self, capacity=0):
+        self._seen = set()
+
+    def add(self, value):
+        """Record value; return False if it was already present."""
+        if value in self._seen:
+            return False
+        self._seen.add(value)
+        return True
+
+
+class HashedSetIndex:
+    """Stores 64-bit digests instead of the values themselves."""
+
+    def __init__(self, capacity=0):
+        self._seen = set()
+
+    def add(self, value):
+        """Record value; return False if its digest was already present."""
+        h = _digest64(value)
+        if h in self._seen:
+            return False
+        self._seen.add(h)
+        return True
+
+
+class BloomIndex:
+    """Fixed-size Bloom filter. No false negatives, so a value it accepts is unique."""
+
+    def __init__(self, capacity, fp_rate=BLOOM_FP_RATE):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, value):
+        """Record value; return False if it (probably) was already present."""
+        # double hashing: probe i is h1 + i*h2 (Kirsch-Mitzenmacher)
+        h = _digest64(value)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        bits = self._bits
+        present = True
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % self.num_bits
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return not present
+
+
+INDEX_TYPES = {"set": ExactSetIndex, "hash": HashedSetIndex, "bloom": BloomIndex}
+
+
+class UniquenessEngine:
+    """Holds one index per column marked unique. backend ("set", "hash" or "bloom")
+    picks the index of drawn columns; capacity is the expected number of values per
+    drawn column (sizes the Bloom filter)."""
+
+    def __init__(self, backend="hash", capacity=0):
+        if backend not in INDEX_TYPES:
+            raise ValueError("unknown uniqueness backend %r (choose from %s)" % (backend, ", ".join(BACKENDS)))
+        self.backend = backend
+        self.capacity = capacity
+        self._drawn = {}
+        self._suffixed = {}
+
+    def mark_drawn(self, column):
+        """Mark a column whose values are random draws (e.g. phone)."""
+        self._drawn[column] = INDEX_TYPES[self.backend](self.capacity)
+
+    def mark_suffixed(self, column, stride=1, offset=0, resume=None):
+        """Mark a column whose values are base + numeric suffix (e.g. email). resume is
+        a next_values() mapping of an earlier run; suffixes continue above it (stride 1)."""
+        index = self._suffixed[column] = SuffixCounterIndex(stride, offset)
+        if resume:
+            if stride != 1 or offset != 0:
+                raise ValueError("resume needs stride=1 and offset=0")
+            index._next.update(resume)
+
+    def add_drawn(self, column, values):
+        """Record values of a drawn column already in use (earlier runs)."""
+        index = self._drawn[column]
+        for value in values:
+            index.add(value)
+
+    def suffix_values(self, column):
+        """next_values() of a suffixed column."""
+        return self._suffixed[column].next_values()
+
+    def draw(self, column, make):
+        """Call make() until it returns a value not yet used in column."""
+        index = self._drawn[column]
+        for _ in range(MAX_DRAW_ATTEMPTS):
+            value = make()
+            if index.add(value):
+                return value
+        raise RuntimeError("could not draw a unique %s after %d attempts" % (column, MAX_DRAW_ATTEMPTS))
+
+    def next_suffix(self, column, key):
+        """Next free suffix for key in a suffixed column ('' first, then '1', '2', ...)."""
+        return self._suffixed[column].next_suffix(key)
@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+# validate_files.py
+# Pre-load validator for the table files written by personnel_generator.py (sql, copy
+# or csv, optionally compressed). Checks every rule of Stage 2 Constraints/Constraints.sql
+# plus primary and foreign keys in one streaming pass over the files, and reports each
+# violation as file:line before anything touches the database, instead of a failed
+# load.sql transaction minutes into a multi-GB file.
+#
+# Rules, named after the constraint PostgreSQL would report:
+# - primary keys of department, position, employee, payroll, employee_license and
+#   oncall_shift (<table>_pkey);
+# - position: uq_position_title;
+# - employee: hire_date NOT NULL, chk_hire_before_termination, chk_birth_age (whole
+#   years between birth and hire, as date_part('year', age(hire, birth))),
+#   chk_email_nonempty, uq_employee_email, uq_employee_phone;
+# - payroll: employee_id / amount / pay_date NOT NULL, chk_payroll_amount_nonneg,
+#   amount within NUMERIC(12,2), pay_date >= the employee's hire_date
+#   (trg_payroll_pay_date_before_ins_upd);
+# - oncall_shift: day_of_week / start_time / end_time / escalation_order NOT NULL,
+#   chk_shift_day_range, chk_shift_order, chk_escalation_positive;
+# - foreign keys (<table>_<column>_fkey): position and employee -> department,
+#   employee -> position, employee -> manager, payroll / license / shift -> employee;
+# - every checked value must parse as its column type (INT, NUMERIC, DATE, TIME).
+# Delta directories (--delta) also get their staging files checked: terminated
+# employees must exist with hire_date < termination_date, renewed licenses must exist.
+#
+# Memory grows with the employee count only. Files are read line by line; department,
+# position, payroll, license and shift IDs go into growable bitmaps (IdBitmap, one bit
+# per ID value); employees are kept as parallel typed arrays (ID, hire day, manager,
+# email and phone digests, file and line: about 40 bytes each). After the employee
+# files those arrays are sorted once: adjacent equal values are the PK, email and phone
+# duplicates, and the sorted ID array with its hire days becomes the index that every
+# employee foreign key and the pay_date rule binary-search. Email and phone are
+# compared as 64-bit blake2b digests, so a reported duplicate could in principle be a
+# digest collision (odds about n^2 / 2^65, i.e. 3e-8 at a million employees).
+# ISO dates and times are parsed once per distinct string rather than per row.
+#
+# Several directories are validated as one dataset, in order, e.g. a full run and the
+# deltas applied on top of it:  validate_files.py out/ delta-1/ delta-2/
+#
+# Usage:
+#     python3 validate_files.py [DIR ...] [--max-errors N]
+#
+# Exits with status 1 if anything is violated. Standard library only; NumPy, when
+# installed, speeds up the employee sort.
+
+import os
+import re
+import sys
+import bz2
+import csv
+import gzip
+import lzma
+import time
+import bisect
+import hashlib
+import argparse
+import datetime
+from array import array
+from collections import Counter
+
+from personnel_generator import COLS_DEPT, COLS_POS, EMPLOYEE_TABLES, DELTA_UPDATES, OUT_DIR_DEFAULT
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+MAX_ERRORS = 20                # violations printed per rule (all are counted)
+BITMAP_MAX_ID = 1 << 28        # IDs at or above this go to IdBitmap's fallback set
+PARSE_CACHE_SIZE = 1 << 17     # distinct date/time strings remembered
+NUMERIC_12_2_MAX = 10 ** 10    # NUMERIC(12,2) holds |amount| < 10^10
+NO_MANAGER = -1 << 63
+
+# Table files in load order; copy files have no header, so their columns come from here
+TABLE_COLUMNS = {"department": COLS_DEPT, "position": COLS_POS}
+TABLE_COLUMNS.update((key, cols) for key, (table, cols, label) in EMPLOYEE_TABLES.items())
+TABLE_COLUMNS.update((key, cols) for key, (cols, ddl, apply_sql) in DELTA_UPDATES.items())
+# Tables whose primary keys go into an IdBitmap (employee IDs are sparse: EmployeeIndex)
+BITMAP_TABLES = ("department", "position", "payroll", "employee_license", "oncall_shift")
+FILE_NAME = re.compile(r"^(?P<table>[a-z_]+?)(?:\.part-\d+)?\.(?P<fmt>sql|copy|csv)(?P<compress>\.gz|\.xz|\.bz2)?$")
+OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+# ---------- Reading ----------
+
+INSERT_HEAD = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*(.*)$", re.IGNORECASE | re.DOTALL)
+SQL_VALUE = re.compile(r"\s*(?:'((?:[^']|'')*)'|([^,()'\s][^,()']*?))\s*([,)])")
+COPY_ESCAPE = re.compile(r"\\(.)")
+COPY_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", "v": "\v"}
+
+def table_files(dirs):
+    """{table: [(path, format)]} for the known table files in dirs, in directory order
+    and then by name (part-files sort in shard order)."""
+    files = {table: [] for table in TABLE_COLUMNS}
+    for d in dirs:
+        for name in sorted(os.listdir(d)):
+            m = FILE_NAME.match(name)
+            if m and m.group("table") in files:
+                files[m.group("table")].append((os.path.join(d, name), m.group("fmt")))
+    return files
+
+def open_text(path):
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, "rt", encoding="utf-8", newline="")
+
+def sql_rows(f, path, report):
+    """Rows of an INSERT file as (line number, columns, values); values are strings
+    (quotes removed) or None for NULL. One row per line as SqlTableWriter writes them;
+    a quoted value may span lines."""
+    cols = None
+    pending, start = "", 0
+    for line_no, line in enumerate(f, 1):
+        if pending:
+            pending += line
+            if pending.count("'") % 2:
+                continue
+            line, line_no, pending = pending, start, ""
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--") or stripped.upper() in ("BEGIN;", "COMMIT;"):
+            continue
+        m = INSERT_HEAD.match(stripped)
+        if m:
+            cols = [c.strip() for c in m.group(2).split(",")]
+            stripped = m.group(3).strip()
+            if not stripped:
+                continue
+        if stripped.count("'") % 2:
+            pending, start = line, line_no
+            continue
+        values = _sql_values(stripped)
+        if values is None or cols is None:
+            report.add(path, line_no, "syntax", "cannot parse %r" % stripped[:80])
+            continue
+        yield line_no, cols, values
+    if pending:
+        report.add(path, start, "syntax", "unterminated string literal")
+
+def _sql_values(text):
+    """Values of one '(v, v, ...)' row (trailing ',' or ';' allowed), or None."""
+    if not text.startswith("("):
+        return None
+    values, pos = [], 1
+    while True:
+        m = SQL_VALUE.match(text, pos)
+        if not m:
+            return None
+        quoted, bare, sep = m.groups()
+        if quoted is not None:
+            values.append(quoted.replace("''", "'"))
+        else:
+            values.append(None if bare.upper() == "NULL" else bare)
+        pos = m.end()
+        if sep == ")":
+            return values if text[pos:].strip() in ("", ",", ";") else None
+
+def copy_rows(f, cols):
+    """Rows of a COPY text file as (line number, columns, values)."""
+    for line_no, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line == "\\.":
+            break
+        values = line.split("\t")
+        for i, v in enumerate(values):
+            if v == "\\N":
+                values[i] = None
+            elif "\\" in v:
+                values[i] = COPY_ESCAPE.sub(lambda m: COPY_ESCAPES.get(m.group(1), m.group(1)), v)
+        yield line_no, cols, values
+
+def csv_rows(f):
+    """Rows of a CSV file with a header line as (line number, columns, values). Empty
+    fields are NULL; a quoted empty string only matters for email, where both fail."""
+    reader = csv.reader(f)
+    cols = next(reader, None)
+    last = reader.line_num
+    for values in reader:
+        yield last + 1, cols, [v if v != "" else None for v in values]
+        last = reader.line_num
+
+def read_rows(path, fmt, table, report):
+    f = open_text(path)
+    if fmt == "sql":
+        rows = sql_rows(f, path, report)
+    elif fmt == "copy":
+        rows = copy_rows(f, TABLE_COLUMNS[table])
+    else:
+        rows = csv_rows(f)
+    try:
+        yield from rows
+    finally:
+        f.close()
+
+# ---------- Values ----------
+
+class ValueParser:
+    """Date and time parsing with a cache: the same few thousand ISO strings recur on
+    millions of rows. Returns None for an unparsable value."""
+
+    def __init__(self):
+        self.dates = {}
+        self.times = {}
+
+    def date(self, text):
+        d = self.dates.get(text)
+        if d is None:
+            try:
+                d = datetime.date.fromisoformat(text.strip())
+            except ValueError:
+                return None
+            if len(self.dates) < PARSE_CACHE_SIZE:
+                self.dates[text] = d
+        return d
+
+    def time(self, text):
+        t = self.times.get(text)
+        if t is None:
+            try:
+                t = datetime.time.fromisoformat(text.strip())
+            except ValueError:
+                return None
+            if len(self.times) < PARSE_CACHE_SIZE:
+                self.times[text] = t
+        return t
+
+def digest64(text):
+    """64-bit digest of a unique-column value (never 0, which marks NULL)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+def age_years(hire, birth):
+    """Whole years from birth to hire (PostgreSQL date_part('year', age(hire, birth)))."""
+    return hire.year - birth.year - ((hire.month, hire.day) < (birth.month, birth.day))
+
+# ---------- Indexes ----------
+
+class IdBitmap:
+    """Set of integer IDs as a growable bit array, one bit per ID value: a few hundred
+    KB for millions of dense generated IDs. Negative or huge IDs use a plain set."""
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.other = set()
+
+    def add(self, value):
+        """Record value; return False if it was already present."""
+        if not 0 <= value < BITMAP_MAX_ID:
+            if value in self.other:
+                return False
+            self.other.add(value)
+            return True
+        byte, mask = value >> 3, 1 << (value & 7)
+        bits = self.bits
+        if byte >= len(bits):
+            bits.extend(bytes(max(byte + 1 - len(bits), len(bits))))
+        if bits[byte] & mask:
+            return False
+        bits[byte] |= mask
+        return True
+
+    def __contains__(self, value):
+        if not 0 <= value < BITMAP_MAX_ID:
+            return value in self.other
+        byte = value >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (value & 7)))
+
+
+def argsort(values):
+    """Positions of a typed array in ascending value order (stable)."""
+    if not values:
+        return []
+    if np is not None:
+        return np.argsort(np.frombuffer(values, dtype=values.typecode), kind="stable").tolist()
+    return sorted(range(len(values)), key=values.__getitem__)
+
+
+class EmployeeIndex:
+    """Employee facts collected as parallel arrays while the employee files are read;
+    finish() reports duplicate IDs / emails / phones and unknown managers, then keeps
+    only the sorted ID array and hire days (date ordinals, 0 = NULL) for lookups."""
+
+    def __init__(self):
+        self.paths = []
+        self.employee_id = array("q")
+        self.hire_day = array("i")
+        self.manager_id = array("q")
+        self.email = array("Q")
+        self.phone = array("Q")
+        self.file = array("H")
+        self.line = array("I")
+        self.ids = None
+
+    def add(self, file, line, employee_id, hire_day, manager_id, email, phone):
+        self.employee_id.append(employee_id)
+        self.hire_day.append(hire_day)
+        self.manager_id.append(NO_MANAGER if manager_id is None else manager_id)
+        self.email.append(email)
+        self.phone.append(phone)
+        self.file.append(file)
+        self.line.append(line)
+
+    def _where(self, pos):
+        return self.paths[self.file[pos]], self.line[pos]
+
+    def _duplicates(self, values, report, rule, what):
+        order = argsort(values)
+        for prev, pos in zip(order, order[1:]):
+            if values[pos] and values[pos] == values[prev]:
+                report.add(*self._where(pos), rule, "duplicate %s (first at %s:%d)" % (what, *self._where(prev)))
+
+    def finish(self, report):
+        order = argsort(self.employee_id)
+        self.ids = array("q", [self.employee_id[pos] for pos in order])
+        self.hires = array("i", [self.hire_day[pos] for pos in order])
+        for k in range(1, len(order)):
+            if self.ids[k] == self.ids[k - 1]:
+                report.add(*self._where(order[k]), "employee_pkey", "duplicate employee_id %d (first at %s:%d)"
+                           % (self.ids[k], *self._where(order[k - 1])))
+        self._duplicates(self.email, report, "uq_employee_email", "email")
+        self._duplicates(self.phone, report, "uq_employee_phone", "phone")
+        for pos, manager in enumerate(self.manager_id):
+            if manager != NO_MANAGER and manager not in self:
+                report.add(*self._where(pos), "employee_manager_id_fkey", "manager_id %d is not an employee" % manager)
+        self.employee_id = self.hire_day = self.manager_id = self.email = self.phone = self.file = self.line = None
+
+    def hire_of(self, employee_id):
+        """Hire day of an employee (0 = no hire_date), or None if there is no such employee."""
+        i = bisect.bisect_left(self.ids, employee_id)
+        if i < len(self.ids) and self.ids[i] == employee_id:
+            return self.hires[i]
+        return None
+
+    def __contains__(self, employee_id):
+        return self.hire_of(employee_id) is not None
+
+# ---------- Checks ----------
+
+class Report:
+    """Counts violations per rule and prints the first max_errors of each."""
+
+    def __init__(self, max_errors=MAX_ERRORS, out=sys.stdout):
+        self.max_errors = max_errors
+        self.out = out
+        self.counts = Counter()
+
+    def add(self, path, line, rule, message):
+        self.counts[rule] += 1
+        if self.counts[rule] <= self.max_errors:
+            print("%s:%d: %s: %s" % (path, line, rule, message), file=self.out)
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+class Validator:
+    """Checks one dataset's tables in load order. Rows reach the check_<table> methods
+    in TABLE_COLUMNS order (columns a file leaves out are None); path and line of the
+    current row are kept on the instance for the report."""
+
+    def __init__(self, report):
+        self.report = report
+        self.values = ValueParser()
+        self.keys = {table: IdBitmap() for table in BITMAP_TABLES}
+        self.titles = set()
+        self.employees = EmployeeIndex()
+        self.rows = Counter()
+        self.path = None
+        self.line = 0
+
+    def validate(self, files):
+        """Check the {table: [(path, format)]} files; returns {table: seconds}."""
+        seconds = {}
+        for table, table_paths in files.items():
+            started = time.perf_counter()
+            check = getattr(self, "check_" + table)
+            columns = TABLE_COLUMNS[table]
+            for path, fmt in table_paths:
+                if table == "employee":
+                    self.employees.paths.append(path)
+                self.path = path
+                cols = reorder = None
+                for line, row_cols, values in read_rows(path, fmt, table, self.report):
+                    self.line = line
+                    if row_cols is not cols:
+                        cols = row_cols
+                        reorder = None if cols == columns else [cols.index(c) if c in cols else None for c in columns]
+                    if len(values) != len(cols):
+                        self.error("syntax", "%d values for %d columns" % (len(values), len(cols)))
+                        continue
+                    if reorder is not None:
+                        values = [None if i is None else values[i] for i in reorder]
+                    self.rows[table] += 1
+                    check(values)
+            if table == "employee":
+                self.employees.finish(self.report)
+            if table_paths:
+                seconds[table] = time.perf_counter() - started
+        return seconds
+
+    def error(self, rule, message):
+        self.report.add(self.path, self.line, rule, message)
+
+    # Value helpers: each reports its own violation and returns None for an unusable value
+
+    def _not_null(self, table, col):
+        self.error("not_null", 'null value in column "%s" of "%s"' % (col, table))
+
+    def _int(self, table, col, text, not_null=False):
+        if text is None:
+            if not_null:
+                self._not_null(table, col)
+            return None
+        try:
+            return int(text)
+        except ValueError:
+            self.error("invalid_value", "%s.%s: %r is not an integer" % (table, col, text))
+            return None
+
+    def _date(self, table, col, text, not_null=False):
+        if text is None:
+            if not_null:
+                self._not_null(table, col)
+            return None
+        value = self.values.date(text)
+        if value is None:
+            self.error("invalid_value", "%s.%s: %r is not a date" % (table, col, text))
+        return value
+
+    def _time(self, table, col, text):
+        if text is None:
+            self._not_null(table, col)
+            return None
+        value = self.values.time(text)
+        if value is None:
+            self.error("invalid_value", "%s.%s: %r is not a time" % (table, col, text))
+        return value
+
+    def _primary_key(self, table, col, text):
+        value = self._int(table, col, text, not_null=True)
+        if value is not None and not self.keys[table].add(value):
+            self.error(table + "_pkey", "duplicate %s %d" % (col, value))
+
+    def _reference(self, table, col, text, parent, not_null=False):
+        """Check a foreign key; for employee references returns the hire day (0 = no
+        hire_date), otherwise the ID. None if NULL, invalid or missing."""
+        value = self._int(table, col, text, not_null)
+        if value is None:
+            return None
+        if parent == "employee":
+            hire = self.employees.hire_of(value)
+            if hire is None:
+                self.error("%s_%s_fkey" % (table, col), "%s %d is not an employee" % (col, value))
+            return hire
+        if value not in self.keys[parent]:
+            self.error("%s_%s_fkey" % (table, col), "%s %d is not in %s" % (col, value, parent))
+            return None
+        return value
+
+    # Tables
+
+    def check_department(self, v):
+        self._primary_key("department", "department_id", v[0])
+
+    def check_position(self, v):
+        position_id, title, department_id = v[:3]
+        self._primary_key("position", "position_id", position_id)
+        if title is not None:
+            if title in self.titles:
+                self.error("uq_position_title", "duplicate title %r" % title)
+            self.titles.add(title)
+        self._reference("position", "department_id", department_id, "department")
+
+    def check_employee(self, v):
+        table = "employee"
+        (employee_id, first, last, email, phone, address, birth, hire, termination, active, department_id,
+         position_id, manager_id) = v[:13]
+        eid = self._int(table, "employee_id", employee_id, not_null=True)
+        hire = self._date(table, "hire_date", hire, not_null=True)
+        termination = self._date(table, "termination_date", termination)
+        birth = self._date(table, "birth_date", birth)
+        if hire is not None:
+            if termination is not None and not hire < termination:
+                self.error("chk_hire_before_termination", "termination_date %s is not after hire_date %s"
+                           % (termination, hire))
+            if birth is not None and not 18 <= age_years(hire, birth) <= 65:
+                self.error("chk_birth_age", "%d years old at hire (birth %s, hire %s)"
+                           % (age_years(hire, birth), birth, hire))
+        if email is None or email.strip(" ") == "":
+            self.error("chk_email_nonempty", "email is empty")
+            email = None
+        self._reference(table, "department_id", department_id, "department")
+        self._reference(table, "position_id", position_id, "position")
+        manager = self._int(table, "manager_id", manager_id)
+        if eid is not None:
+            self.employees.add(len(self.employees.paths) - 1, self.line, eid, hire.toordinal() if hire else 0, manager,
+                               digest64(email) if email is not None else 0, digest64(phone) if phone is not None else 0)
+
+    def check_payroll(self, v):
+        table = "payroll"
+        payroll_id, employee_id, amount, pay = v[:4]
+        self._primary_key(table, "payroll_id", payroll_id)
+        hire = self._reference(table, "employee_id", employee_id, "employee", not_null=True)
+        if amount is None:
+            self._not_null(table, "amount")
+        else:
+            try:
+                value = float(amount)
+            except ValueError:
+                self.error("invalid_value", "payroll.amount: %r is not a number" % amount)
+            else:
+                if value < 0:
+                    self.error("chk_payroll_amount_nonneg", "amount %s is negative" % amount)
+                if abs(round(value, 2)) >= NUMERIC_12_2_MAX:
+                    self.error("numeric_overflow", "amount %s does not fit NUMERIC(12,2)" % amount)
+        pay = self._date(table, "pay_date", pay, not_null=True)
+        if pay is not None and hire is not None:
+            if not hire:
+                self.error("trg_payroll_pay_date_before_ins_upd", "employee %s has no hire_date" % employee_id)
+            elif pay.toordinal() < hire:
+                self.error("trg_payroll_pay_date_before_ins_upd", "pay_date %s is before hire_date %s"
+                           % (pay, datetime.date.fromordinal(hire)))
+
+    def check_employee_license(self, v):
+        table = "employee_license"
+        license_id, employee_id, name, issued, expiry = v[:5]
+        self._primary_key(table, "license_id", license_id)
+        self._reference(table, "employee_id", employee_id, "employee")
+        self._date(table, "issued_date", issued)
+        self._date(table, "expiry_date", expiry)
+
+    def check_oncall_shift(self, v):
+        table = "oncall_shift"
+        shift_id, employee_id, dow, start, end, order = v[:6]
+        self._primary_key(table, "shift_id", shift_id)
+        self._reference(table, "employee_id", employee_id, "employee")
+        dow = self._int(table, "day_of_week", dow, not_null=True)
+        if dow is not None and not 1 <= dow <= 7:
+            self.error("chk_shift_day_range", "day_of_week %d is not in 1..7" % dow)
+        start = self._time(table, "start_time", start)
+        end = self._time(table, "end_time", end)
+        if start is not None and end is not None and not start < end:
+            self.error("chk_shift_order", "start_time %s is not before end_time %s" % (start, end))
+        order = self._int(table, "escalation_order", order, not_null=True)
+        if order is not None and order <= 0:
+            self.error("chk_escalation_positive", "escalation_order %d is not positive" % order)
+
+    def check_employee_termination(self, v):
+        table = "employee_termination"
+        employee_id, termination = v
+        hire = self._reference(table, "employee_id", employee_id, "employee")
+        termination = self._date(table, "termination_date", termination, not_null=True)
+        if hire and termination is not None and not hire < termination.toordinal():
+            self.error("chk_hire_before_termination", "termination_date %s is not after hire_date %s"
+                       % (termination, datetime.date.fromordinal(hire)))
+
+    def check_license_renewal(self, v):
+        table = "license_renewal"
+        license_id, issued, expiry = v
+        self._reference(table, "license_id", license_id, "employee_license")
+        self._date(table, "issued_date", issued, not_null=True)
+        self._date(table, "expiry_date", expiry, not_null=True)
+
+# ---------- CLI ----------
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Validate generated table files against the personnel constraints before loading them.')
+    p.add_argument('dirs', nargs='*', default=[OUT_DIR_DEFAULT], help='Output directories, validated together in order (default %s).' % OUT_DIR_DEFAULT)
+    p.add_argument('--max-errors', type=int, default=MAX_ERRORS, help='Violations printed per rule; all are counted (default %(default)s).')
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    report = Report(args.max_errors)
+    files = table_files(args.dirs)
+    started = time.perf_counter()
+    validator = Validator(report)
+    seconds = validator.validate(files)
+    wall = time.perf_counter() - started
+    print('Checked %d files in %.2fs:' % (sum(len(f) for f in files.values()), wall))
+    for table, sec in seconds.items():
+        print(' - %-20s %10d rows  %7.2fs' % (table, validator.rows[table], sec))
+    if not report.total():
+        print('No violations.')
+        return 0
+    print('%d violations:' % report.total())
+    for rule, n in report.counts.most_common():
+        print(' - %-36s %d' % (rule, n))
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
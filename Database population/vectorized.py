@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# vectorized.py
+# Optional NumPy backend for personnel_generator.py (--backend numpy).
+#
+# The pure-Python path draws every date, timestamp and amount one value at a time
+# (datetime arithmetic, fromisoformat, strftime, random.uniform). This backend draws
+# whole columns for a batch of employees at once:
+# - dates are integer day offsets from DATE_MIN and timestamps integer minute offsets
+#   from DT_MIN, drawn with a numpy Generator;
+# - constraints are applied to the arrays (birth 18-65 years before hire via a
+#   vectorized age check, termination after hire, pay/issue dates >= hire, expiry
+#   clipped to DATE_MAX, shift start < end);
+# - offsets are turned into strings through lookup tables built once (one ISO string
+#   per day, one HH:MM string per minute of the day).
+#
+# Names, emails, phones, departments and managers stay on the Python path (they
+# depend on the uniqueness and org-tree state, which is sequential).
+#
+# Employee dates come from one generator; payroll, license and on-call rows each come
+# from their own (table_seeds), so a child table can be regenerated on its own from
+# the employee snapshot (personnel_generator.regenerate_tables).
+
+import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+BIRTH_MIN_DAYS = 18*365 + 4     # same approximations as the Python path
+BIRTH_MAX_DAYS = 65*365 + 16
+BIRTH_FALLBACK_DAYS = 30*365
+TERMINATION_FALLBACK_DAYS = 30
+MINUTE_CHOICES = (0, 15, 30, 45)
+
+
+class VectorBackend:
+    """Column-at-a-time generation of dates, timestamps and amounts for one shard."""
+
+    def __init__(self, seed, date_min, date_max, termination_rate, payroll_range, amount_range,
+                 license_range, shifts_range, notes, license_names, table_seeds=None):
+        if np is None:
+            raise RuntimeError("--backend numpy needs the numpy package: pip install numpy")
+        self.rng = np.random.default_rng(seed)
+        self.streams = {table: np.random.default_rng(s) for table, s in (table_seeds or {}).items()}
+        self.date_min = date_min
+        self.days = (date_max - date_min).days              # offset of DATE_MAX
+        self.minutes = self.days * 1440 + 23 * 60 + 59      # offset of DT_MAX
+        self.termination_rate = termination_rate
+        self.payroll_range = payroll_range
+        self.amount_range = amount_range
+        self.license_range = license_range
+        self.shifts_range = shifts_range
+        self.notes = np.array(notes, dtype=object)
+        self.license_names = np.array(license_names, dtype=object)
+
+        # Day lookup tables cover the oldest possible birth date to the latest
+        # termination fallback; index = offset - self._lo.
+        self._lo = -(BIRTH_MAX_DAYS + 1)
+        hi = self.days + TERMINATION_FALLBACK_DAYS
+        dates = [date_min + datetime.timedelta(days=off) for off in range(self._lo, hi + 1)]
+        self._day_str = np.array([d.isoformat() for d in dates], dtype=object)
+        self._year = np.array([d.year for d in dates], dtype=np.int32)
+        self._month_day = np.array([d.month * 100 + d.day for d in dates], dtype=np.int32)
+        self._hm_str = np.array(["%02d:%02d" % divmod(m, 60) for m in range(1440)], dtype=object)
+
+    def _dates(self, offsets):
+        return self._day_str[offsets - self._lo]
+
+    def _stream(self, table):
+        return self.streams.get(table, self.rng)
+
+    def _timestamps(self, n, rng):
+        """n random 'YYYY-MM-DD HH:MM' strings between DT_MIN and DT_MAX."""
+        mins = rng.integers(0, self.minutes + 1, n)
+        return (self._dates(mins // 1440) + " " + self._hm_str[mins % 1440]).tolist()
+
+    def _days_between(self, start, end, rng):
+        """Random day offsets start[i] <= d <= end (end scalar or array)."""
+        return start + rng.integers(0, end - start + 1)
+
+    def employee_dates(self, n):
+        """Hire day offsets plus (hire, birth, termination or None, created_at) per employee."""
+        rng = self.rng
+        hire = rng.integers(0, self.days + 1, n)
+        birth = hire - BIRTH_MAX_DAYS + rng.integers(0, BIRTH_MAX_DAYS - BIRTH_MIN_DAYS + 1, n)
+        # age at hire must be 18..65 whole years; otherwise fall back to 30 years
+        years = (self._year[hire - self._lo] - self._year[birth - self._lo]
+                 - (self._month_day[hire - self._lo] < self._month_day[birth - self._lo]))
+        birth = np.where((years >= 18) & (years <= 65), birth, hire - BIRTH_FALLBACK_DAYS)
+        terminated = rng.random(n) < self.termination_rate
+        term = self._days_between(hire, self.days, rng)
+        term = np.where(term > hire, term, hire + TERMINATION_FALLBACK_DAYS)
+        term_str = [t if flag else None for t, flag in zip(self._dates(term).tolist(), terminated.tolist())]
+        dates = list(zip(self._dates(hire).tolist(), self._dates(birth).tolist(), term_str, self._timestamps(n, rng)))
+        return hire, dates
+
+    def column(self, values):
+        """NumPy view (no copy) of a typed array, e.g. an EmployeeStore column or an
+        index array of license holders."""
+        return np.frombuffer(values, dtype=values.typecode)
+
+    def payroll_rows(self, emp_ids, hire_days, first_id):
+        """Payroll rows (at least one per employee, pay_date >= hire) with IDs from first_id."""
+        rng = self._stream("payroll")
+        counts = rng.integers(self.payroll_range[0], self.payroll_range[1] + 1, len(emp_ids))
+        n = int(counts.sum())
+        hires = np.repeat(hire_days, counts)
+        pay = self._days_between(hires, self.days, rng)
+        amounts = np.round(rng.uniform(self.amount_range[0], self.amount_range[1], n), 2)
+        notes = self.notes[rng.integers(0, len(self.notes), n)]
+        return list(zip(range(first_id, first_id + n), np.repeat(emp_ids, counts).tolist(), amounts.tolist(),
+                        self._dates(pay).tolist(), notes.tolist(), self._timestamps(n, rng)))
+
+    def license_rows(self, emp_ids, hire_days, first_id):
+        """License rows issued on/after hire, expiring 1-5 years later but by DATE_MAX."""
+        rng = self._stream("employee_license")
+        counts = rng.integers(self.license_range[0], self.license_range[1] + 1, len(emp_ids))
+        n = int(counts.sum())
+        issued = self._days_between(np.repeat(hire_days, counts), self.days, rng)
+        expiry = np.minimum(issued + rng.integers(365, 365*5 + 1, n), self.days)
+        names = self.license_names[rng.integers(0, len(self.license_names), n)]
+        notes = self.notes[rng.integers(0, len(self.notes), n)]
+        return list(zip(range(first_id, first_id + n), np.repeat(emp_ids, counts).tolist(), names.tolist(),
+                        self._dates(issued).tolist(), self._dates(expiry).tolist(), notes.tolist(),
+                        self._timestamps(n, rng)))
+
+    def shift_rows(self, emp_ids, first_id):
+        """On-call rows: day 1..7, start 06:00-20:45 on a quarter hour, 2-8 hours long."""
+        rng = self._stream("oncall_shift")
+        counts = rng.integers(self.shifts_range[0], self.shifts_range[1] + 1, len(emp_ids))
+        n = int(counts.sum())
+        dow = rng.integers(1, 8, n)
+        hour = rng.integers(6, 21, n)
+        minute = np.array(MINUTE_CHOICES)[rng.integers(0, len(MINUTE_CHOICES), n)]
+        end_hour = np.minimum(23, hour + rng.integers(2, 9, n))
+        esc = rng.integers(1, 6, n)
+        return list(zip(range(first_id, first_id + n), np.repeat(emp_ids, counts).tolist(), dow.tolist(),
+                        self._hm_str[hour * 60 + minute].tolist(), self._hm_str[end_hour * 60 + minute].tolist(),
+                        esc.tolist(), self._timestamps(n, rng)))
@@ -19,6 +19,11 @@ ALTER TABLE employee
 ALTER TABLE employee
   ALTER COLUMN hire_date SET NOT NULL;
 
+-- 3.2.5: email and phone must be unique (the generator de-duplicates both)
+ALTER TABLE employee
+  ADD CONSTRAINT uq_employee_email UNIQUE (email),
+  ADD CONSTRAINT uq_employee_phone UNIQUE (phone);
+
 ALTER TABLE payroll
   ALTER COLUMN employee_id SET NOT NULL,
   ALTER COLUMN amount SET NOT NULL,